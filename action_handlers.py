@@ -1,5 +1,7 @@
 from tkinter import messagebox
-import database_operations # Import database functions
+import database_operations
+import reservation_cache # Write-through cache in front of database_operations
+from reservation_record import Reservation
 
 def edit_reservation_handler(app_instance, event):
     """Initiates the editing process for a selected reservation."""
@@ -8,18 +10,51 @@ def edit_reservation_handler(app_instance, event):
         return
 
     values = app_instance.reservations_tree.item(item_id, 'values')
-    if values and len(values) > 0:
-        flight_number_to_edit = values[0]
-        reservation_to_edit = database_operations.get_reservation_by_flight_number_db(flight_number_to_edit)
-        if reservation_to_edit:
-            app_instance.show_book_flight(reservation_data=reservation_to_edit)
-        else:
-            messagebox.showerror("Error", "Could not retrieve reservation details from database.")
+    if values and len(values) >= 6:
+        # The row already holds every field, so there is no need to read it back from the database
+        reservation_id = int(item_id) # Rows are keyed by their reservation id
+        reservation_to_edit = Reservation._make(values[:6])
+        reservation_cache.get_cache().put(reservation_id, reservation_to_edit)
+        app_instance.show_book_flight(reservation_data=reservation_to_edit, reservation_id=reservation_id)
+        _load_editing_version(app_instance, reservation_id, reservation_to_edit)
     else:
         messagebox.showerror("Error", "No reservation data found for editing.")
 
+def _load_editing_version(app_instance, reservation_id, shown):
+    """
+    Reads the row version of the reservation being edited, so saving it can detect changes made by
+    other desks in the meantime. If the row already differs from the shown values, the form is refilled.
+    The submit button stays disabled until the version has loaded.
+    """
+    import booking_ui
+
+    def on_loaded(result):
+        if app_instance.editing_reservation_id != reservation_id:
+            return # The form was submitted or left already
+        if result is None:
+            messagebox.showerror("Edit Reservation",
+                                 f"The reservation of {shown.name} on flight {shown.flight_number} no longer exists.")
+            app_instance.refresh_reservation_rows(deleted=[reservation_id])
+            app_instance.show_view_reservations()
+            return
+        current, app_instance.editing_version = result
+        if current != shown:
+            booking_ui._fill_booking_form(app_instance, current)
+        else:
+            app_instance.booking_submit_button.configure(state="normal")
+
+    def on_failed(error):
+        if app_instance.editing_reservation_id != reservation_id:
+            return
+        messagebox.showerror("Edit Reservation",
+                             f"Could not load the reservation of {shown.name} on flight {shown.flight_number}: {error}")
+        app_instance.show_view_reservations()
+
+    app_instance.db_worker.submit(database_operations.get_reservation_version_db, reservation_id,
+                                  on_success=on_loaded, on_error=on_failed)
+
 def delete_reservation_handler(app_instance, event):
-    """Deletes a reservation from the database and refreshes the view."""
+    """Deletes a reservation in the background and removes its row from the view once it is gone."""
     item_id = app_instance.reservations_tree.identify_row(event.y)
     if not item_id:
         return
@@ -29,12 +64,71 @@ def delete_reservation_handler(app_instance, event):
         messagebox.showerror("Error", "No reservation data found for deletion.")
         return
 
-    flight_number_to_delete = values[0]
+    reservation_id = int(item_id) # Rows are keyed by their reservation id
+    flight_number, name = values[0], values[1]
 
-    if messagebox.askyesno("Delete Reservation", f"Are you sure you want to delete reservation for Flight Number: {flight_number_to_delete}?"):
-        success = database_operations.delete_reservation_db(flight_number_to_delete)
-        if success:
-            messagebox.showinfo("Deletion Successful", "Reservation deleted from database.")
-            app_instance.show_view_reservations()
-        else:
-            messagebox.showerror("Deletion Failed", "Could not delete reservation from database.")
+    if messagebox.askyesno("Delete Reservation", f"Are you sure you want to delete the reservation of {name} on Flight Number: {flight_number}?"):
+        def on_deleted(success):
+            if success:
+                messagebox.showinfo("Deletion Successful", "Reservation deleted from database.")
+                app_instance.refresh_reservation_rows(deleted=[reservation_id])
+            else:
+                messagebox.showerror("Deletion Failed", "Could not delete reservation from database.")
+                # Shows the row as it is now, e.g. gone if someone else deleted it first
+                app_instance.refresh_reservation_rows(deleted=[reservation_id], changed=[reservation_id])
+
+        app_instance.db_worker.submit(reservation_cache.get_cache().delete_reservation, reservation_id,
+                                      on_success=on_deleted)
+
+def _selected_reservation_ids(app_instance):
+    view = getattr(app_instance, "reservations_view", None)
+    return sorted(view.selected) if view is not None else []
+
+def delete_selected_handler(app_instance):
+    """Deletes every selected reservation in one background transaction, after a single confirmation."""
+    reservation_ids = _selected_reservation_ids(app_instance)
+    if not reservation_ids:
+        return
+    if not messagebox.askyesno("Delete Reservations",
+                               f"Are you sure you want to delete the {len(reservation_ids):,} selected reservation(s)?"):
+        return
+    view = app_instance.reservations_view
+
+    def on_deleted(deleted):
+        if deleted is None:
+            messagebox.showerror("Deletion Failed", "Could not delete the selected reservations. None were deleted.")
+            return
+        view.clear_selection()
+        messagebox.showinfo("Deletion Successful", f"{deleted:,} reservation(s) deleted from database.")
+        app_instance.refresh_reservation_rows(deleted=reservation_ids)
+
+    app_instance.db_worker.submit(reservation_cache.get_cache().delete_reservations, reservation_ids,
+                                  on_success=on_deleted)
+
+def edit_selected_handler(app_instance):
+    """Asks for new field values, then applies them to every selected reservation in one background transaction."""
+    import reservations_ui
+    reservation_ids = _selected_reservation_ids(app_instance)
+    if not reservation_ids:
+        return
+    view = app_instance.reservations_view
+
+    def apply(changes):
+        labels = dict(reservations_ui.BATCH_EDIT_FIELDS)
+        summary = ", ".join(f"{labels[field]} to {value}" for field, value in changes.items())
+        if not messagebox.askyesno("Edit Reservations",
+                                   f"Change {summary} for the {len(reservation_ids):,} selected reservation(s)?"):
+            return
+
+        def on_updated(updated):
+            if updated is None:
+                return # Already reported (e.g. a seat taken on the new date); nothing was changed
+            view.clear_selection()
+            messagebox.showinfo("Reservations Updated", f"{updated:,} reservation(s) updated.")
+            # Rows may now fall outside the current filter or search, so they are removed and re-read
+            app_instance.refresh_reservation_rows(deleted=reservation_ids, changed=reservation_ids)
+
+        app_instance.db_worker.submit(reservation_cache.get_cache().update_reservations, reservation_ids, changes,
+                                      on_success=on_updated)
+
+    reservations_ui.open_batch_edit_dialog(app_instance, len(reservation_ids), apply)
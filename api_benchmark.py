@@ -0,0 +1,196 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import api_client # HTTP client for api_server
+import benchmark # Shared percentile summary and run metadata
+import database_operations # Import database functions
+import db_connection # Pooled, long-lived connections
+import synthetic_data # Deterministic reservation generator
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZE = "10k"
+DEFAULT_CLIENTS = "1,8,32"
+DEFAULT_DURATION = 5.0
+DEFAULT_WRITE_RATIO = 0.1
+READ_OPERATIONS = ("lookup", "page", "seek", "search")
+SEARCH_TERMS = ("anna", "silva", "tokyo", "berlin", "nakamura", "lisbon")
+
+
+def start_server(db_path, readers, log):
+    """Starts api_server on a free loopback port; returns the process and its base URL."""
+    process = subprocess.Popen([sys.executable, os.path.join(APP_DIR, "api_server.py"), "--db", db_path,
+                                "--port", "0", "--readers", str(readers)],
+                               cwd=APP_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = process.stdout.readline().strip() # "Listening on http://host:port"
+    if not line.startswith("Listening on "):
+        process.kill()
+        raise RuntimeError(f"api_server did not start (exit code {process.wait()})")
+    url = line.split()[-1]
+    log(f"api_server listening on {url}")
+    return process, url
+
+
+def client_loop(url, size, write_ratio, deadline, seed, next_index, stats):
+    """One desk: issues a random read/write mix until the deadline, recording latencies per operation."""
+    client = api_client.ApiClient(url)
+    rng = random.Random(seed)
+    own = [] # (id, reservation) pairs this client inserted and may update or delete
+    latencies = {}
+    errors = {}
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            if own and rng.random() < 0.5:
+                operation = rng.choice(("update", "delete"))
+                reservation_id, reservation = own.pop(rng.randrange(len(own)))
+                if operation == "update":
+                    # Only the name changes, so the seat stays this client's own
+                    reservation = reservation._replace(name=rng.choice(synthetic_data.FIRST_NAMES) + " "
+                                                       + rng.choice(synthetic_data.LAST_NAMES))
+                    own.append((reservation_id, reservation))
+                    call = lambda: client.update_reservation_db(reservation_id, reservation)
+                else:
+                    call = lambda: client.delete_reservation_db(reservation_id)
+            else:
+                operation = "insert"
+                index = next_index()
+                reservation = next(synthetic_data.generate_reservations(1, seed=seed, start=index))
+                call = lambda: own.append((client.insert_reservation_db(reservation), reservation))
+        else:
+            operation = rng.choice(READ_OPERATIONS)
+            if operation == "lookup":
+                reservation_id = rng.randrange(size) + 1 # The loaded rows have ids 1..size
+                call = lambda: client.get_reservation_db(reservation_id)
+            elif operation == "page":
+                call = lambda: client.query_reservation_rows_db(None, "Date", rng.random() < 0.5)
+            elif operation == "seek":
+                position = rng.randrange(size)
+                call = lambda: client.get_reservation_cursor_at_db(position, None, "Date")
+            else:
+                text = rng.choice(SEARCH_TERMS)
+                call = lambda: client.search_reservation_rows_db(text)
+        started = time.perf_counter()
+        try:
+            call()
+        except (api_client.ApiError, OSError):
+            errors[operation] = errors.get(operation, 0) + 1
+            continue
+        latencies.setdefault(operation, []).append(time.perf_counter() - started)
+    stats.append((latencies, errors))
+
+
+def run_clients(url, size, clients, args, next_index):
+    """Runs `clients` concurrent desks for the configured duration; returns their result entries."""
+    stats = []
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=client_loop, args=(url, size, args.write_ratio, deadline,
+                                                           args.seed * 1000 + number, next_index, stats))
+               for number in range(clients)]
+    monitor = api_client.ApiClient(url)
+    contention_before = monitor.request("GET", "/health")["contention"]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    merged, errors = {}, {}
+    for thread_latencies, thread_errors in stats:
+        for operation, values in thread_latencies.items():
+            merged.setdefault(operation, []).extend(values)
+        for operation, count in thread_errors.items():
+            errors[operation] = errors.get(operation, 0) + count
+    results = []
+    for operation in sorted(set(merged) | set(errors)):
+        result = benchmark.summarize(operation, size, merged.get(operation, []), errors.get(operation, 0))
+        result["clients"] = clients
+        # summarize() reports one caller's rate; with many desks the aggregate over wall time is what matters
+        result["throughput_ops_per_sec"] = round(len(merged.get(operation, [])) / elapsed, 1)
+        results.append(result)
+    all_latencies = [value for values in merged.values() for value in values]
+    total = benchmark.summarize("all", size, all_latencies, sum(errors.values()))
+    total["clients"] = clients
+    total["throughput_ops_per_sec"] = round(len(all_latencies) / elapsed, 1)
+    # Write contention inside the server during this run (retries, lock waits, version conflicts)
+    contention_after = monitor.request("GET", "/health")["contention"]
+    total["contention"] = {key: round(contention_after[key] - contention_before[key], 3) for key in contention_after}
+    results.append(total)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure api_server throughput and latency over loopback.")
+    parser.add_argument("--size", type=synthetic_data.parse_count, default=DEFAULT_SIZE,
+                        help="reservations loaded before the run (default: %(default)s)")
+    parser.add_argument("--clients", default=DEFAULT_CLIENTS,
+                        help="comma-separated numbers of concurrent desks (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per client count")
+    parser.add_argument("--write-ratio", type=float, default=DEFAULT_WRITE_RATIO,
+                        help="share of requests that are writes (default: %(default)s)")
+    parser.add_argument("--readers", type=int, default=4, help="reader threads of the server")
+    parser.add_argument("--seed", type=int, default=synthetic_data.DEFAULT_SEED, help="random seed")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    try:
+        client_counts = [int(count) for count in args.clients.split(",") if count.strip()]
+    except ValueError:
+        parser.error("--clients must be comma-separated integers")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    workdir = tempfile.mkdtemp(prefix="flysky-api-bench-")
+    db_path = os.path.join(workdir, "api_bench.db")
+    db_connection.configure(db_path=db_path)
+    with contextlib.redirect_stdout(sys.stderr): # Keep stdout for the JSON report
+        database_operations.init_db()
+    log(f"loading {args.size:,} rows...")
+    synthetic_data.load_reservations(args.size, seed=args.seed)
+    db_connection.close_all()
+
+    lock = threading.Lock()
+    counter = [args.size] # New records continue after the loaded ones, so their seats are free
+
+    def next_index():
+        with lock:
+            counter[0] += 1
+            return counter[0]
+
+    report = {"environment": benchmark.environment(), "seed": args.seed, "duration_sec": args.duration,
+              "write_ratio": args.write_ratio, "server_readers": args.readers, "results": []}
+    process = None
+    try:
+        process, url = start_server(db_path, args.readers, log)
+        for clients in client_counts:
+            log(f"[{clients} clients] running for {args.duration:g} s...")
+            report["results"].extend(run_clients(url, args.size, clients, args, next_index))
+    except RuntimeError as e:
+        log(f"API benchmark failed: {e}")
+        return 1
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        log(f"Report written to {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
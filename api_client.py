@@ -0,0 +1,305 @@
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+
+from reservation_record import FIELDS, Reservation, as_reservation
+
+API_URL_ENV_VAR = "FLYSKY_API_URL" # When set, the app talks to api_server at this URL instead of the local file
+DEFAULT_TIMEOUT = 30.0
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE") # Safe to send again when the connection dropped
+STALE_CONNECTION_SEC = 15.0 # Idle time after which a connection is replaced rather than risk a POST on it
+
+# Query parameter used for each database_operations filter key
+FILTER_PARAMS = {
+    "Flight Number": "flight_number",
+    "Name": "name",
+    "Departure": "departure",
+    "Destination": "destination",
+    "Date From": "date_from",
+    "Date To": "date_to",
+}
+
+
+class ApiError(Exception):
+    """An error response from the API server."""
+
+    def __init__(self, status, title, message):
+        super().__init__(message)
+        self.status = status
+        self.title = title
+        self.message = message
+
+
+def encode_cursor(cursor):
+    return None if cursor is None else json.dumps(list(cursor))
+
+
+def decode_cursor(text):
+    return None if text in (None, "") else tuple(json.loads(text))
+
+
+def encode_rows(rows):
+    """(cursor, Reservation) pairs as JSON-ready [cursor, [fields...]] lists."""
+    return [[list(cursor), list(reservation)] for cursor, reservation in rows]
+
+
+def decode_rows(rows):
+    return [(tuple(cursor), Reservation._make(values)) for cursor, values in rows]
+
+
+def filter_params(filters):
+    return {FILTER_PARAMS[key]: value for key, value in (filters or {}).items() if value}
+
+
+class ApiClient:
+    """
+    Blocking JSON client for api_server, with one keep-alive HTTP connection per thread.
+    Its *_db methods take and return the same values as the functions of database_operations.
+    """
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT):
+        parsed = urllib.parse.urlsplit(base_url)
+        if parsed.scheme != "http" or not parsed.hostname:
+            raise ValueError(f"Unsupported API URL: {base_url}")
+        self.base_url = base_url
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def request(self, method, path, params=None, body=None):
+        """Sends one request and returns the decoded JSON body; raises ApiError for error statuses."""
+        if params:
+            path += "?" + urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        retry = method.upper() in IDEMPOTENT_METHODS
+        if not retry and time.monotonic() - getattr(self._local, "last_used", 0.0) > STALE_CONNECTION_SEC:
+            # The server may have closed it while idle, and a request that may already have been applied
+            # cannot be sent again; start from a fresh connection instead
+            self._drop_connection()
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection; reconnect once if the request can be repeated
+                self._drop_connection()
+                if attempt or not retry:
+                    raise
+        self._local.last_used = time.monotonic()
+        result = json.loads(data) if data else None
+        if response.status >= 400:
+            error = (result or {}).get("error", {})
+            raise ApiError(response.status, error.get("title", "Server Error"), error.get("message", response.reason))
+        return result
+
+    # --- Same signatures as database_operations ---
+    def init_db(self):
+        self.request("GET", "/health")
+
+    def search_index_available(self):
+        return self.request("GET", "/health")["search_index"]
+
+    def insert_reservation_db(self, reservation_data):
+        return self.request("POST", "/reservations", body=dict(zip(FIELDS, _as_tuple(reservation_data))))["id"]
+
+    def update_reservation_db(self, reservation_id, reservation_data, expected_version=None):
+        body = dict(zip(FIELDS, _as_tuple(reservation_data)), version=expected_version)
+        return self.request("PUT", f"/reservations/{int(reservation_id)}", body=body)["ok"]
+
+    def delete_reservation_db(self, reservation_id):
+        return self.request("DELETE", f"/reservations/{int(reservation_id)}")["ok"]
+
+    def delete_reservations_db(self, reservation_ids):
+        return self.request("POST", "/reservations/batch-delete", body={"ids": list(reservation_ids)})["deleted"]
+
+    def update_reservations_db(self, reservation_ids, changes):
+        body = {"ids": list(reservation_ids), "changes": dict(changes)}
+        return self.request("POST", "/reservations/batch-update", body=body)["updated"]
+
+    def get_reservation_version_db(self, reservation_id):
+        try:
+            result = self.request("GET", f"/reservations/{int(reservation_id)}")
+        except ApiError as e:
+            if e.status == 404:
+                return None
+            raise
+        return Reservation._make(result["reservation"]), result["version"]
+
+    def get_reservation_db(self, reservation_id):
+        result = self.get_reservation_version_db(reservation_id)
+        return result[0] if result else None
+
+    def query_reservation_rows_db(self, filters=None, sort_by=None, descending=False, cursor=None, limit=100,
+                                  backwards=False, reservation_id=None):
+        params = filter_params(filters)
+        params.update(sort=sort_by, desc=int(bool(descending)), cursor=encode_cursor(cursor), limit=limit,
+                      backwards=int(bool(backwards)), id=reservation_id)
+        return decode_rows(self.request("GET", "/reservations", params)["rows"])
+
+    def get_reservation_cursor_at_db(self, position, filters=None, sort_by=None, descending=False):
+        params = filter_params(filters)
+        params.update(position=position, sort=sort_by, desc=int(bool(descending)))
+        return decode_cursor(self.request("GET", "/reservations/seek", params)["cursor"])
+
+    def count_reservations_db(self, filters=None):
+        return self.request("GET", "/reservations/count", filter_params(filters))["count"]
+
+    def get_all_reservations_db(self):
+        return [reservation for rows in self.iter_reservations_db() for reservation in rows]
+
+    def iter_reservations_db(self, filters=None, sort_by=None, descending=False, search_text=None, batch_size=1000,
+                             conn=None, with_ids=False):
+        """Streams matching reservations in batches by following keyset cursors page by page."""
+        if search_text:
+            if filters or sort_by:
+                raise ValueError("The API streams search results in match order, without filters")
+            fetch = lambda cursor: self.search_reservation_rows_db(search_text, cursor, batch_size)
+        else:
+            fetch = lambda cursor: self.query_reservation_rows_db(filters, sort_by, descending, cursor, batch_size)
+        cursor = None
+        while True:
+            rows = fetch(cursor)
+            if not rows:
+                break
+            # Cursors end with the reservation id
+            yield [(cursor[-1], reservation) if with_ids else reservation for cursor, reservation in rows]
+            cursor = rows[-1][0]
+
+    def next_free_seat_db(self, flight_number, date, cabin="Economy", preference=None):
+        params = {"flight_number": flight_number, "date": date, "cabin": cabin, "preference": preference}
+        return self.request("GET", "/seats", params)["next"]
+
+    def seat_availability_db(self, flight_number, date):
+        return self.request("GET", "/seats", {"flight_number": flight_number, "date": date})["availability"]
+
+    def dashboard_stats_db(self, today=None, top_routes=5, upcoming_days=7):
+        stats = self.request("GET", "/stats", {"today": today, "top_routes": top_routes, "upcoming_days": upcoming_days})
+        for key in ("top_routes", "upcoming_dates", "load_factors"):
+            stats[key] = [tuple(row) for row in stats[key]]
+        return stats
+
+    def daily_counts_db(self, first_date, last_date):
+        return [tuple(day) for day in self.request("GET", "/stats/daily", {"from": first_date, "to": last_date})["days"]]
+
+    def journal_position_db(self):
+        return self.request("GET", "/changes/position")["position"]
+
+    def changes_since_db(self, since=0, limit=1000):
+        return self.request("GET", "/changes", params={"since": since, "limit": limit})
+
+    def prune_journal_db(self, through_seq):
+        return self.request("POST", "/changes/prune", body={"through": through_seq})["pruned"]
+
+    def search_archive_db(self, text=None, limit=500):
+        rows = self.request("GET", "/archive", params={"text": text or None, "limit": limit})["rows"]
+        return [Reservation._make(row) for row in rows]
+
+    def search_reservation_rows_db(self, text, cursor=None, limit=100, backwards=False, reservation_id=None):
+        params = {"q": text, "cursor": encode_cursor(cursor), "limit": limit, "backwards": int(bool(backwards)),
+                  "id": reservation_id}
+        return decode_rows(self.request("GET", "/search", params)["rows"])
+
+    def count_search_matches_db(self, text, cursor=None, limit=100):
+        result = self.request("GET", "/search/count", {"q": text, "cursor": encode_cursor(cursor), "limit": limit})
+        return result["count"], decode_cursor(result["cursor"])
+
+    def get_search_cursor_at_db(self, text, position):
+        return decode_cursor(self.request("GET", "/search/seek", {"q": text, "position": position})["cursor"])
+
+
+def _as_tuple(reservation_data):
+    return tuple(as_reservation(reservation_data))
+
+
+# Functions of database_operations that install() routes to the server
+REMOTE_FUNCTIONS = (
+    "init_db", "search_index_available", "insert_reservation_db", "update_reservation_db", "delete_reservation_db",
+    "delete_reservations_db", "update_reservations_db",
+    "get_reservation_db", "get_reservation_version_db", "query_reservation_rows_db", "get_reservation_cursor_at_db",
+    "count_reservations_db", "get_all_reservations_db", "iter_reservations_db", "search_reservation_rows_db",
+    "count_search_matches_db", "get_search_cursor_at_db", "next_free_seat_db", "seat_availability_db",
+    "dashboard_stats_db", "daily_counts_db", "journal_position_db", "changes_since_db", "prune_journal_db",
+    "search_archive_db",
+)
+
+# Functions of database_operations built only on REMOTE_FUNCTIONS, so they reach the server unchanged
+REMOTE_COMPOSITES = ("query_reservations_db",)
+
+
+def local_functions(database_operations):
+    """Names of the public data layer functions (init_db and the *_db functions) of the given module."""
+    return [name for name, value in vars(database_operations).items()
+            if name.endswith("_db") and not name.startswith("_") and callable(value)]
+
+
+def install(database_operations, base_url):
+    """
+    Routes the data layer to the API server: the functions in REMOTE_FUNCTIONS of the given
+    database_operations module are replaced, in place, by calls to the server at base_url.
+    Every other public *_db function is replaced by one that reports it is not available remotely,
+    so nothing silently falls back to the local file. Failures are reported through
+    database_operations.report_error like local ones, so callers (the Tk client, the cache) keep
+    working unchanged.
+    :return: The ApiClient.
+    """
+    client = ApiClient(base_url)
+    failure_values = {"insert_reservation_db": False, "update_reservation_db": False, "delete_reservation_db": False,
+                      "query_reservation_rows_db": [], "search_reservation_rows_db": [], "count_reservations_db": 0,
+                      "count_search_matches_db": (0, None), "search_index_available": False,
+                      "seat_availability_db": {}, "daily_counts_db": [], "search_archive_db": [],
+                      "rebuild_search_index_db": False, "rebuild_seat_maps_db": False,
+                      "rebuild_summary_stats_db": False, "reservation_report_db": []}
+
+    def like_local(call, name):
+        # Looks like a database_operations function, so perf_stats.instrument_module times it too
+        call.__name__ = call.__qualname__ = name
+        call.__module__ = database_operations.__name__
+        call.__doc__ = getattr(database_operations, name).__doc__
+        return call
+
+    def remote(name):
+        method = getattr(client, name)
+        if name == "iter_reservations_db":
+            return method # Errors propagate to the caller, as with the local function
+
+        def call(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            except ApiError as e:
+                database_operations.report_error(e.title, e.message)
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                database_operations.report_error("Server Error", f"Could not reach the reservation server: {e}")
+            return failure_values.get(name)
+        return like_local(call, name)
+
+    def unavailable(name):
+        def call(*args, **kwargs):
+            database_operations.report_error("Server Error", f"{name} is not available remotely.")
+            return failure_values.get(name)
+        return like_local(call, name)
+
+    for name in local_functions(database_operations):
+        if name not in REMOTE_FUNCTIONS and name not in REMOTE_COMPOSITES:
+            setattr(database_operations, name, unavailable(name))
+    for name in REMOTE_FUNCTIONS:
+        setattr(database_operations, name, remote(name))
+    return client
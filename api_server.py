@@ -0,0 +1,437 @@
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import sys
+import time
+import urllib.parse
+
+import archive # Archive file of past reservations
+import change_journal # Page size of "changes since" requests
+import database_operations # Import database functions
+import db_connection # Pooled, long-lived connections
+import seat_inventory # Cabins and seat preferences
+from api_client import FILTER_PARAMS, decode_cursor, encode_cursor, encode_rows
+from reservation_record import FIELDS, Reservation
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_READERS = 4
+WRITE_QUEUE_SIZE = 1000 # Pending writes before clients are made to wait
+MAX_BODY_BYTES = 1 << 20
+MAX_PAGE_SIZE = 5000
+KEEP_ALIVE_TIMEOUT = 30.0
+IDLE_CHECKPOINT_SEC = 1.0 # Seconds without writes before the writer checkpoints the WAL
+MAX_CHECKPOINT_INTERVAL_SEC = 10.0 # ...and at least this often while writes keep coming
+CHECKPOINT_WAIT_MS = 200 # How long a checkpoint waits for readers to leave the old WAL
+
+# Status for errors reported by database_operations, by title; anything else is a 500
+ERROR_STATUS = {"Not Found": 404, "Update Conflict": 409, "Seat Error": 409}
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """Turned into a JSON error response with the given status."""
+
+    def __init__(self, status, message, title=None):
+        super().__init__(message)
+        self.status = status
+        self.title = title or STATUS_TEXT.get(status, "Error")
+        self.message = message
+
+
+class _ErrorCollector:
+    """Per-call error handler for database_operations on the executor threads."""
+
+    def __init__(self):
+        self.errors = []
+
+    def __call__(self, title, message):
+        self.errors.append((title, message))
+
+
+def _call_db(func, *args):
+    """Runs a data layer call on an executor thread, turning reported errors into an HttpError."""
+    collector = _ErrorCollector()
+    database_operations.set_error_handler(collector)
+    try:
+        result = func(*args)
+    except ValueError as e: # Bad filter, sort column or cursor
+        raise HttpError(400, str(e))
+    finally:
+        database_operations.set_error_handler(None)
+    if collector.errors:
+        title, message = collector.errors[-1]
+        raise HttpError(ERROR_STATUS.get(title, 500), message, title)
+    return result
+
+
+class ReservationServer:
+    """
+    Local HTTP/JSON service over database_operations. Reads run concurrently on a pool of reader
+    threads, each with its own pooled WAL connection. Writes go through one queue and are applied
+    one at a time by a single writer thread, so desks never contend for SQLite's write lock.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, readers=DEFAULT_READERS):
+        self.host = host
+        self.port = port
+        self.readers = concurrent.futures.ThreadPoolExecutor(max_workers=readers, thread_name_prefix="api-reader")
+        self.writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self.write_queue = None
+        self.server = None
+        self.requests = 0
+        self.writes = 0
+
+    # --- Executors ---
+    async def read(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, _call_db, func, *args)
+
+    async def write(self, func, *args):
+        """Queues a write for the single writer and waits for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self.write_queue.put((func, args, future))
+        return await future
+
+    async def _writer_loop(self):
+        """
+        Applies queued writes one at a time. When no write has come for a moment, or writes have kept
+        coming for a while, the writer runs a TRUNCATE checkpoint: the reader threads rarely all pause,
+        so SQLite's automatic checkpoints would never start the WAL over and it would keep growing.
+        """
+        loop = asyncio.get_running_loop()
+        checkpoint_due = False
+        last_checkpoint = time.monotonic()
+        while True:
+            if checkpoint_due and time.monotonic() - last_checkpoint >= MAX_CHECKPOINT_INTERVAL_SEC:
+                item = None
+            else:
+                try:
+                    item = await asyncio.wait_for(self.write_queue.get(), IDLE_CHECKPOINT_SEC if checkpoint_due else None)
+                except asyncio.TimeoutError:
+                    item = None
+            if item is None:
+                checkpoint_due = False
+                last_checkpoint = time.monotonic()
+                await loop.run_in_executor(self.writer, database_operations.checkpoint_db, "TRUNCATE",
+                                           CHECKPOINT_WAIT_MS)
+                continue
+            func, args, future = item
+            checkpoint_due = True
+            try:
+                result = await loop.run_in_executor(self.writer, func, *args)
+            except Exception as e: # Handed to the waiting request
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            self.writes += 1
+
+    # --- Routing ---
+    async def dispatch(self, method, path, query, body):
+        """Returns (status, JSON-ready body) for one request."""
+        parts = [urllib.parse.unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["health"] and method == "GET":
+            return 200, {"ok": True, "search_index": database_operations.search_index_available(),
+                         "requests": self.requests, "writes": self.writes, "write_queue": self.write_queue.qsize(),
+                         "contention": database_operations.contention_stats()}
+
+        if parts == ["reservations"]:
+            if method == "POST":
+                reservation_id = await self.write(_call_db, database_operations.insert_reservation_db,
+                                                  _reservation_from(body))
+                return 201, {"ok": True, "id": reservation_id}
+            if method == "GET":
+                rows = await self.read(database_operations.query_reservation_rows_db, _filters(query),
+                                       _sort(query), _flag(query, "desc"), _cursor(query), _limit(query),
+                                       _flag(query, "backwards"), _id(query))
+                return 200, {"rows": encode_rows(rows)}
+            raise HttpError(405, f"{method} not allowed on /reservations")
+
+        if parts == ["reservations", "batch-delete"] and method == "POST":
+            deleted = await self.write(_call_db, database_operations.delete_reservations_db, _ids_from(body))
+            return 200, {"deleted": deleted}
+
+        if parts == ["reservations", "batch-update"] and method == "POST":
+            updated = await self.write(_call_db, database_operations.update_reservations_db,
+                                       _ids_from(body), _changes_from(body))
+            return 200, {"updated": updated}
+
+        if parts == ["reservations", "count"] and method == "GET":
+            return 200, {"count": await self.read(database_operations.count_reservations_db, _filters(query))}
+
+        if parts == ["reservations", "seek"] and method == "GET":
+            cursor = await self.read(database_operations.get_reservation_cursor_at_db, _int(query, "position", 0),
+                                     _filters(query), _sort(query), _flag(query, "desc"))
+            return 200, {"cursor": encode_cursor(cursor)}
+
+        if len(parts) == 2 and parts[0] == "reservations" and parts[1].isdigit():
+            reservation_id = int(parts[1])
+            if method == "GET":
+                result = await self.read(database_operations.get_reservation_version_db, reservation_id)
+                if result is None:
+                    raise HttpError(404, f"Reservation {reservation_id} does not exist.")
+                return 200, {"id": reservation_id, "reservation": list(result[0]), "version": result[1]}
+            if method == "PUT":
+                return 200, {"ok": await self.write(_call_db, database_operations.update_reservation_db, reservation_id,
+                                                    _reservation_from(body), _version_from(body))}
+            if method == "DELETE":
+                return 200, {"ok": await self.write(_call_db, database_operations.delete_reservation_db, reservation_id)}
+            raise HttpError(405, f"{method} not allowed on /reservations/<id>")
+
+        if parts == ["stats"] and method == "GET":
+            stats = await self.read(database_operations.dashboard_stats_db, query.get("today") or None,
+                                    _int(query, "top_routes", 5), _int(query, "upcoming_days", 7))
+            return 200, stats
+
+        if parts == ["stats", "daily"] and method == "GET":
+            first_date, last_date = query.get("from"), query.get("to")
+            if not first_date or not last_date:
+                raise HttpError(400, "'from' and 'to' dates are required")
+            return 200, {"days": await self.read(database_operations.daily_counts_db, first_date, last_date)}
+
+        if parts == ["seats"] and method == "GET":
+            flight_number, date = query.get("flight_number"), query.get("date")
+            if not flight_number or not date:
+                raise HttpError(400, "'flight_number' and 'date' are required")
+            cabin = query.get("cabin") or seat_inventory.DEFAULT_CABIN
+            seat = await self.read(database_operations.next_free_seat_db, flight_number, date, cabin,
+                                   query.get("preference") or None)
+            availability = await self.read(database_operations.seat_availability_db, flight_number, date)
+            return 200, {"next": seat, "availability": availability}
+
+        if parts == ["changes"] and method == "GET":
+            limit = min(_int(query, "limit", change_journal.DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+            return 200, await self.read(database_operations.changes_since_db, _int(query, "since", 0), limit)
+
+        if parts == ["changes", "position"] and method == "GET":
+            return 200, {"position": await self.read(database_operations.journal_position_db)}
+
+        if parts == ["changes", "prune"] and method == "POST":
+            pruned = await self.write(_call_db, database_operations.prune_journal_db, _through_from(body))
+            return 200, {"pruned": pruned}
+
+        if parts == ["archive"] and method == "GET":
+            rows = await self.read(database_operations.search_archive_db, query.get("text") or None,
+                                   min(_int(query, "limit", archive.DEFAULT_SEARCH_LIMIT), MAX_PAGE_SIZE))
+            return 200, {"rows": [list(row) for row in rows]}
+
+        if parts == ["search"] and method == "GET":
+            rows = await self.read(database_operations.search_reservation_rows_db, _text(query), _cursor(query),
+                                   _limit(query), _flag(query, "backwards"), _id(query))
+            return 200, {"rows": encode_rows(rows)}
+
+        if parts == ["search", "count"] and method == "GET":
+            count, cursor = await self.read(database_operations.count_search_matches_db, _text(query),
+                                            _cursor(query), _limit(query))
+            return 200, {"count": count, "cursor": encode_cursor(cursor)}
+
+        if parts == ["search", "seek"] and method == "GET":
+            cursor = await self.read(database_operations.get_search_cursor_at_db, _text(query),
+                                     _int(query, "position", 0))
+            return 200, {"cursor": encode_cursor(cursor)}
+
+        raise HttpError(404, f"No route for {method} {path}")
+
+    # --- HTTP ---
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError: # Longer than the stream's line limit; the connection cannot be resynchronised
+                    keep_alive, status, body = False, 400, _bad_request("Request line too long")
+                else:
+                    if not request_line:
+                        break
+                    keep_alive, status, body = await self._handle_request(request_line, reader)
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _handle_request(self, request_line, reader):
+        """Reads one request after its request line; returns (keep alive, status, body)."""
+        self.requests += 1
+        try:
+            method, target, version = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        except ValueError:
+            return False, 400, _bad_request("Malformed request line")
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError: # Longer than the stream's line limit
+                return False, 400, _bad_request("Header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = (version == "HTTP/1.1") != (headers.get("connection", "").lower() == "close")
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0: # The body cannot be found, so neither can the next request
+            return False, 400, _bad_request("Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            return False, 413, {"error": {"title": "Payload Too Large", "message": "Request body too large"}}
+        raw_body = await reader.readexactly(length) if length else b""
+
+        url = urllib.parse.urlsplit(target)
+        query = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+        try:
+            body = json.loads(raw_body) if raw_body else None
+            status, result = await self.dispatch(method.upper(), url.path, query, body)
+        except HttpError as e:
+            status, result = e.status, {"error": {"title": e.title, "message": e.message}}
+        except json.JSONDecodeError as e:
+            status, result = 400, {"error": {"title": "Bad Request", "message": f"Invalid JSON body: {e}"}}
+        except Exception as e: # Reported to the client instead of killing the connection
+            status, result = 500, {"error": {"title": "Server Error", "message": str(e)}}
+        return keep_alive, status, result
+
+    async def serve(self, ready=None):
+        """Runs the server until cancelled. `ready` (a callable) receives the bound (host, port)."""
+        self.write_queue = asyncio.Queue(WRITE_QUEUE_SIZE)
+        writer_task = asyncio.create_task(self._writer_loop())
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        if ready:
+            ready(host, port)
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            writer_task.cancel()
+            self.readers.shutdown(wait=False, cancel_futures=True)
+            self.writer.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Request parsing helpers ---
+def _reservation_from(body):
+    if not isinstance(body, dict):
+        raise HttpError(400, "Expected a JSON object with the reservation fields")
+    missing = [field for field in FIELDS if not str(body.get(field) or "").strip()]
+    if missing:
+        raise HttpError(400, f"Missing field(s): {', '.join(missing)}")
+    return Reservation(*(str(body[field]).strip() for field in FIELDS))
+
+
+def _version_from(body):
+    version = body.get("version")
+    if version is not None and not isinstance(version, int):
+        raise HttpError(400, "'version' must be an integer")
+    return version
+
+
+def _ids_from(body):
+    ids = body.get("ids") if isinstance(body, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+        raise HttpError(400, "Expected a JSON object with an 'ids' list of reservation ids")
+    return ids
+
+
+def _changes_from(body):
+    changes = body.get("changes")
+    if not isinstance(changes, dict) or not all(isinstance(value, str) and value.strip() for value in changes.values()):
+        raise HttpError(400, "Expected 'changes' to be an object of non-empty field values")
+    return {field: value.strip() for field, value in changes.items()}
+
+
+def _through_from(body):
+    through = body.get("through") if isinstance(body, dict) else None
+    if not isinstance(through, int) or isinstance(through, bool):
+        raise HttpError(400, "Expected a JSON object with an integer 'through' sequence number")
+    return through
+
+
+def _filters(query):
+    return {key: query[param] for key, param in FILTER_PARAMS.items() if query.get(param)}
+
+
+def _sort(query):
+    return query.get("sort") or None
+
+
+def _flag(query, name):
+    return query.get(name, "0").lower() in ("1", "true", "yes")
+
+
+def _int(query, name, default):
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        raise HttpError(400, f"'{name}' must be an integer")
+
+
+def _id(query):
+    """The optional 'id' parameter restricting a query to one reservation (for changed-rows queries)."""
+    return _int(query, "id", None) if query.get("id") else None
+
+
+def _limit(query):
+    return max(1, min(_int(query, "limit", database_operations.QUERY_PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def _cursor(query):
+    try:
+        return decode_cursor(query.get("cursor"))
+    except (ValueError, TypeError):
+        raise HttpError(400, "'cursor' must be a JSON array")
+
+
+def _text(query):
+    text = query.get("q", "")
+    if not text.strip():
+        raise HttpError(400, "'q' (search text) is required")
+    return text
+
+
+def _bad_request(message):
+    """Error body for a request that could not be parsed."""
+    return {"error": {"title": "Bad Request", "message": message}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the reservations database as a local JSON API.")
+    parser.add_argument("--db", default=db_connection.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="interface to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port, 0 for any free one (default: %(default)s)")
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="concurrent reader threads")
+    args = parser.parse_args(argv)
+
+    db_connection.configure(db_path=args.db)
+    with contextlib.redirect_stdout(sys.stderr): # stdout only carries the address line
+        database_operations.init_db()
+
+    def ready(host, port):
+        print(f"Listening on http://{host}:{port}", flush=True)
+
+    server = ReservationServer(args.host, args.port, args.readers)
+    try:
+        asyncio.run(server.serve(ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import contextlib
+import os
+
+import db_connection # Path of the hot database, which the archive file is named after
+import seat_inventory # Seats of archived flights are released
+
+# Reservations of past dates are moved out of the hot reservations table into a separate SQLite file,
+# so listings, searches, exports and their indexes only cover current bookings. The archive is
+# ATTACHed to a connection only for the duration of an archiving run or an explicit history lookup.
+#
+# Layout: rows are clustered by (date, flight_number, reservation id) in a WITHOUT ROWID table, city
+# names are stored once in `places` and referenced by id, and the row version is dropped (archived
+# rows are read-only). Only flight numbers and names are indexed, for history lookups.
+SCHEMA_NAME = "archive"
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_SEARCH_LIMIT = 500
+
+ARCHIVED_TABLE = '''
+    CREATE TABLE IF NOT EXISTS archive.{name} (
+        date TEXT NOT NULL,
+        flight_number TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        departure INTEGER NOT NULL,
+        destination INTEGER NOT NULL,
+        seat_number TEXT NOT NULL,
+        PRIMARY KEY (date, flight_number, id)
+    ) WITHOUT ROWID
+'''
+
+ARCHIVE_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS archive.places (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)',
+    ARCHIVED_TABLE.format(name="archived_reservations"),
+    'CREATE INDEX IF NOT EXISTS archive.idx_archived_flight_number ON archived_reservations (flight_number)',
+    'CREATE INDEX IF NOT EXISTS archive.idx_archived_name ON archived_reservations (name COLLATE NOCASE)',
+)
+
+# Archived rows in reservation column order, with the city names joined back in
+ARCHIVED_ROWS = '''
+    SELECT a.flight_number, a.name, dep.name, dst.name, a.date, a.seat_number
+    FROM archive.archived_reservations AS a
+    JOIN archive.places AS dep ON dep.id = a.departure
+    JOIN archive.places AS dst ON dst.id = a.destination
+'''
+
+_path = None
+
+
+def configure(path=None):
+    """Sets the archive file; None goes back to the default next to the hot database."""
+    global _path
+    _path = path
+
+
+def path():
+    """The archive file: as configured, or e.g. flights_archive.db next to flights.db."""
+    if _path is not None:
+        return _path
+    root, ext = os.path.splitext(db_connection.get_manager().db_path)
+    return f"{root}_archive{ext or '.db'}"
+
+
+def exists():
+    return os.path.exists(path())
+
+
+@contextlib.contextmanager
+def attached(conn, create=False):
+    """
+    ATTACHes the archive to `conn` for the duration of the block. Must be entered outside a transaction.
+    :param create: Create the archive file and its tables if needed (for archiving); history reads don't.
+    """
+    conn.execute(f"ATTACH DATABASE ? AS {SCHEMA_NAME}", (path(),))
+    try:
+        # Same durability trade-off as the hot database; a rollback journal would fsync on every batch
+        conn.execute(f"PRAGMA {SCHEMA_NAME}.journal_mode = WAL")
+        conn.execute(f"PRAGMA {SCHEMA_NAME}.synchronous = NORMAL")
+        with conn:
+            _add_reservation_ids(conn) # History reads need the current layout too
+            if create:
+                for statement in ARCHIVE_SCHEMA:
+                    conn.execute(statement)
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute(f"DETACH DATABASE {SCHEMA_NAME}")
+
+
+def _add_reservation_ids(conn):
+    """
+    Adds the reservation id to archives from before it existed. Their rows get id 0: they were unique
+    by date and flight number already. Dropping the old table drops its indexes, so they are created
+    again here rather than only by archiving runs.
+    """
+    columns = [row[1] for row in conn.execute(f"PRAGMA {SCHEMA_NAME}.table_info(archived_reservations)")]
+    if not columns or "id" in columns:
+        return
+    conn.execute(ARCHIVED_TABLE.format(name="archived_reservations_new"))
+    conn.execute('''INSERT INTO archive.archived_reservations_new
+                    (date, flight_number, id, name, departure, destination, seat_number)
+                    SELECT date, flight_number, 0, name, departure, destination, seat_number
+                    FROM archive.archived_reservations''')
+    conn.execute("DROP TABLE archive.archived_reservations")
+    conn.execute("ALTER TABLE archive.archived_reservations_new RENAME TO archived_reservations")
+    for statement in ARCHIVE_SCHEMA[2:]:
+        conn.execute(statement)
+
+
+def count_due(conn, cutoff):
+    """Reservations in the hot table dated before `cutoff` (YYYY-MM-DD)."""
+    return conn.execute("SELECT COUNT(*) FROM main.reservations WHERE date < ?", (cutoff,)).fetchone()[0]
+
+
+def _place_ids(conn, names):
+    conn.executemany("INSERT OR IGNORE INTO archive.places (name) VALUES (?)", [(name,) for name in names])
+    placeholders = ", ".join("?" * len(names))
+    return dict(conn.execute(f"SELECT name, id FROM archive.places WHERE name IN ({placeholders})", list(names)))
+
+
+def copy_batch(conn, cutoff, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    First half of moving a batch: copies up to batch_size of the oldest reservations dated before
+    `cutoff` into the archive, inside the caller's write transaction, and leaves them in the hot table.
+    With WAL a transaction over two files is atomic per file only, so the copy is committed on its
+    own before purge_batch deletes anything. Rows are copied with INSERT OR REPLACE: when a run stops
+    between the two steps, the next one copies the same rows again harmlessly.
+    :return: The copied (id, *FIELDS) rows; empty when nothing is left to archive.
+    """
+    rows = conn.execute('''SELECT id, flight_number, name, departure, destination, date, seat_number
+                           FROM main.reservations WHERE date < ? ORDER BY date LIMIT ?''',
+                        (cutoff, batch_size)).fetchall()
+    if not rows:
+        return []
+    places = _place_ids(conn, {row[3] for row in rows} | {row[4] for row in rows})
+    conn.executemany('''INSERT OR REPLACE INTO archive.archived_reservations
+                        (date, flight_number, id, name, departure, destination, seat_number)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                     [(row[5], row[1], row[0], row[2], places[row[3]], places[row[4]], row[6]) for row in rows])
+    return rows
+
+
+def purge_batch(conn, rows):
+    """
+    Second half, in a new write transaction after copy_batch committed: deletes from the hot table
+    those of `rows` that are unchanged and present in the archive, and releases their seats. Deleting
+    fires the usual triggers, so the search index and summary tables follow. A row edited or cancelled
+    in between stays as it is now, and its copy is taken out of the archive again.
+    :return: The number of moved rows.
+    """
+    moved = []
+    for row in rows:
+        deleted = conn.execute('''
+            DELETE FROM main.reservations
+            WHERE id = ? AND flight_number = ? AND name = ? AND departure = ? AND destination = ? AND date = ?
+                AND seat_number = ? AND EXISTS (
+                    SELECT 1 FROM archive.archived_reservations AS a
+                    JOIN archive.places AS dep ON dep.id = a.departure
+                    JOIN archive.places AS dst ON dst.id = a.destination
+                    WHERE a.date = reservations.date AND a.flight_number = reservations.flight_number
+                        AND a.id = reservations.id AND a.name = reservations.name
+                        AND a.seat_number = reservations.seat_number
+                        AND dep.name = reservations.departure AND dst.name = reservations.destination)''',
+            tuple(row)).rowcount
+        if deleted:
+            moved.append(row[1:]) # Seat maps take rows in column order, without the id
+        else:
+            conn.execute("DELETE FROM archive.archived_reservations WHERE date = ? AND flight_number = ? AND id = ?",
+                         (row[5], row[1], row[0]))
+    seat_inventory.release_rows(conn, moved)
+    return len(moved)
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM archive.archived_reservations").fetchone()[0]
+
+
+def search(conn, text=None, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    Archived reservations, newest first, whose flight number or city equals `text` or whose name starts
+    with it (case-insensitive); all of them when text is empty. Returns rows in reservation column order.
+    """
+    if not text:
+        return conn.execute(ARCHIVED_ROWS + " ORDER BY a.date DESC, a.flight_number, a.id LIMIT ?", (limit,)).fetchall()
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return conn.execute(ARCHIVED_ROWS + '''
+        WHERE a.flight_number = ? OR a.name LIKE ? ESCAPE '\\'
+            OR a.departure IN (SELECT id FROM archive.places WHERE name = ? COLLATE NOCASE)
+            OR a.destination IN (SELECT id FROM archive.places WHERE name = ? COLLATE NOCASE)
+        ORDER BY a.date DESC, a.flight_number, a.id LIMIT ?''', (text, escaped + "%", text, text, limit)).fetchall()
@@ -0,0 +1,226 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import database_operations # Import database functions
+import db_connection # Pooled, long-lived connections
+import synthetic_data # Deterministic reservation generator
+
+DEFAULT_SIZES = "10k"
+DEFAULT_SAMPLES = 200
+DEFAULT_LIST_SAMPLES = 3
+DEFAULT_LIST_LIMIT = 1000000 # Larger tables skip the full listing, which holds every row in memory
+
+OPERATIONS = ("insert", "lookup", "update", "delete", "page", "sort", "list_all", "search")
+
+
+def percentile(sorted_values, q):
+    """Linearly interpolated percentile (0 <= q <= 100) of an already sorted list."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(operation, size, latencies, errors=0, rows=None):
+    """Turns per-call latencies (seconds) into a result entry; times are reported in milliseconds."""
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    result = {
+        "operation": operation,
+        "size": size,
+        "samples": len(latencies),
+        "errors": errors,
+        "throughput_ops_per_sec": round(len(latencies) / total, 1) if total > 0 else None,
+        "mean_ms": round(total / len(latencies) * 1000, 4) if latencies else None,
+    }
+    for q in (50, 95, 99):
+        value = percentile(latencies, q)
+        result[f"p{q}_ms"] = round(value * 1000, 4) if value is not None else None
+    result["max_ms"] = round(latencies[-1] * 1000, 4) if latencies else None
+    if rows is not None:
+        result["rows_per_sec"] = round(rows / total, 1) if total > 0 else None
+    return result
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    value = func(*args)
+    return time.perf_counter() - started, value
+
+
+class ErrorCounter:
+    """Error handler for database_operations that counts errors instead of showing dialogs."""
+
+    def __init__(self):
+        self.count = 0
+        self.last = None
+
+    def __call__(self, title, message):
+        self.count += 1
+        self.last = f"{title}: {message}"
+
+    def take(self):
+        count, self.count = self.count, 0
+        return count
+
+
+def run_size(size, args, workdir, log):
+    """Builds a database of `size` rows and benchmarks every selected operation against it."""
+    path = os.path.join(workdir, f"bench_{size}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db_connection.configure(db_path=path)
+    errors = ErrorCounter()
+    database_operations.set_error_handler(errors)
+    with contextlib.redirect_stdout(sys.stderr): # Keep stdout for the JSON report
+        database_operations.init_db()
+
+    log(f"[{size:,}] loading rows...")
+    elapsed = synthetic_data.load_reservations(size, seed=args.seed)
+    results = [{
+        "operation": "bulk_load",
+        "size": size,
+        "samples": 1,
+        "errors": 0,
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": round(size / elapsed, 1) if elapsed > 0 else None,
+    }]
+    db_connection.get_connection().execute("ANALYZE")
+
+    rng = random.Random(args.seed)
+    samples = min(args.samples, size) if size else 0
+    # New rows get indexes past the loaded ones so their seats never collide; the table started empty,
+    # so the loaded rows have ids 1..size and the new ones the ids after them
+    new_rows = list(synthetic_data.generate_reservations(args.samples, seed=args.seed + 1, start=size))
+    new_ids = range(size + 1, size + 1 + len(new_rows))
+    existing = [rng.randrange(size) + 1 for _ in range(samples)] if size else []
+    search_terms = [rng.choice(synthetic_data.FIRST_NAMES)[:rng.randint(2, 5)] for _ in range(args.samples)]
+
+    def measure(operation, calls, rows_of=None):
+        if operation not in args.operations:
+            return
+        log(f"[{size:,}] {operation} x{len(calls)}")
+        latencies, rows = [], 0
+        errors.take()
+        for func, call_args in calls:
+            latency, value = timed(func, *call_args)
+            latencies.append(latency)
+            if rows_of is not None:
+                rows += rows_of(value)
+        results.append(summarize(operation, size, latencies, errors.take(), rows if rows_of else None))
+
+    measure("insert", [(database_operations.insert_reservation_db, (row,)) for row in new_rows])
+    measure("lookup", [(database_operations.get_reservation_db, (reservation_id,)) for reservation_id in existing])
+    measure("update", [(database_operations.update_reservation_db, (reservation_id, row._replace(name=row.name[::-1])))
+                       for reservation_id, row in zip(new_ids, new_rows)])
+    measure("page", [(database_operations.query_reservation_rows_db,
+                      ({}, rng.choice(tuple(database_operations.SORT_COLUMNS)), rng.random() < 0.5, None, 100))
+                     for _ in range(args.samples)], rows_of=len)
+    if "sort" in args.operations:
+        # A page from a random position of a random sort order, like scrolling a sorted view; the
+        # cursor of the position is looked up beforehand, so only the page query is timed
+        sort_calls = []
+        for _ in range(args.samples):
+            sort_by, descending = rng.choice(tuple(database_operations.SORT_COLUMNS)), rng.random() < 0.5
+            cursor = database_operations.get_reservation_cursor_at_db(rng.randrange(size) if size else 0, None,
+                                                                      sort_by, descending)
+            sort_calls.append((database_operations.query_reservation_rows_db, ({}, sort_by, descending, cursor, 100)))
+        measure("sort", sort_calls, rows_of=len)
+    if size <= args.list_limit:
+        measure("list_all", [(database_operations.get_all_reservations_db, ())] * args.list_samples, rows_of=len)
+    elif "list_all" in args.operations:
+        results.append({"operation": "list_all", "size": size, "skipped": f"size above --list-limit {args.list_limit}"})
+    measure("search", [(database_operations.search_reservation_rows_db, (term, None, 100)) for term in search_terms],
+            rows_of=len)
+    measure("delete", [(database_operations.delete_reservation_db, (reservation_id,)) for reservation_id in new_ids])
+
+    database_operations.set_error_handler(None)
+    db_connection.close_all()
+    if not args.keep:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return results
+
+
+def environment():
+    """Metadata that identifies a run, so results can be compared between commits and machines."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "connection_settings": db_connection.get_manager().settings,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark database_operations on synthetic data (no display needed).")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="comma-separated table sizes, e.g. 10k,1m,10m (default: %(default)s)")
+    parser.add_argument("--operations", default=",".join(OPERATIONS),
+                        help="comma-separated subset of: " + ", ".join(OPERATIONS))
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="calls measured per operation")
+    parser.add_argument("--list-samples", type=int, default=DEFAULT_LIST_SAMPLES, help="calls measured for list_all")
+    parser.add_argument("--list-limit", type=synthetic_data.parse_count, default=DEFAULT_LIST_LIMIT,
+                        help="skip list_all above this table size (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=synthetic_data.DEFAULT_SEED, help="random seed")
+    parser.add_argument("--workdir", help="directory for the benchmark databases (default: a temporary one)")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark databases")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [synthetic_data.parse_count(size) for size in args.sizes.split(",") if size.strip()]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    args.operations = [op.strip() for op in args.operations.split(",") if op.strip()]
+    unknown = set(args.operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operation(s): {', '.join(sorted(unknown))}")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="flysky-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    report = {"environment": environment(), "seed": args.seed, "results": []}
+    try:
+        for size in sizes:
+            report["results"].extend(run_size(size, args, workdir, log))
+    finally:
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        log(f"Report written to {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,54 +1,65 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-from tkcalendar import Calendar
+import database_operations
+
+# Form entries in display order, with the placeholder each one shows for a new booking
+FORM_PLACEHOLDERS = (
+    ("name", "Enter your full name"),
+    ("flight_number", "e.g. FS123"),
+    ("departure", "e.g. New York"),
+    ("destination", "e.g. London"),
+    ("seat_number", "e.g. 12A"),
+)
+DATE_PLACEHOLDER = "Pick a date"
 
 def open_date_picker(app_instance, date_entry_var):
-    """Opens a Toplevel window with a calendar to select a date."""
-    top = tk.Toplevel(app_instance.root)
-    top.title("Select Date")
-    top.transient(app_instance.root)
-    top.grab_set()
-
-    cal = Calendar(top, selectmode='day',
-                   font="Inter 10",
-                   background="#007bff", foreground='white',
-                   normalbackground="white", weekendbackground="#f0f2f5",
-                   bordercolor="#007bff", othermonthforeground="#888888",
-                   othermonthbackground="#e0e0e0", headersbackground="#007bff",
-                   headersforeground="white", selectbackground="#0056b3",
-                   selectforeground="white")
-    cal.pack(pady=20, padx=20)
-
-    def set_date():
-        selected_date = cal.selection_get()
-        if selected_date:
-            date_entry_var.set(selected_date.strftime("%Y-%m-%d"))
-        top.destroy()
-
-    ttk.Button(top, text="Select", style="Primary.TButton", command=set_date).pack(pady=10)
-
-    app_instance.root.update_idletasks()
-    x = app_instance.root.winfo_x() + (app_instance.root.winfo_width() // 2) - (top.winfo_width() // 2)
-    y = app_instance.root.winfo_y() + (app_instance.root.winfo_height() // 2) - (top.winfo_height() // 2)
-    top.geometry(f"+{x}+{y}")
-
-def show_book_flight_ui(app_instance, reservation_data=None):
+    """Shows the shared date picker (built on first use, then only hidden and shown again)."""
+    import date_picker # Pulls in tkcalendar, which is slow to import and only needed here
+    date_picker.get_date_picker(app_instance).open(date_entry_var)
+
+def show_book_flight_ui(app_instance, reservation_data=None, reservation_id=None):
     """
     Displays the flight booking form, optionally pre-filling it for editing.
+    The form is built on the first visit; later visits only refill its entries.
     :param app_instance: The main FlySkyApp instance.
-    :param reservation_data: A dictionary containing reservation data to pre-fill the form, or None for a new booking.
+    :param reservation_data: A Reservation to pre-fill the form, or None for a new booking.
+    :param reservation_id: The id of the reservation being edited.
     """
     app_instance.clear_content_area()
 
-    app_instance.editing_flight_number = reservation_data.get("Flight Number") if reservation_data else None
-
-    header_frame = ttk.Frame(app_instance.content_area, style="TFrame")
+    app_instance.editing_reservation_id = reservation_id if reservation_data else None
+    app_instance.editing_version = None
+
+    if not app_instance.show_page("book"):
+        _build_booking_form(app_instance)
+    _fill_booking_form(app_instance, reservation_data)
+
+def _fill_booking_form(app_instance, reservation_data):
+    """Resets the form entries to the reservation being edited, or to the placeholders."""
+    for field, placeholder in FORM_PLACEHOLDERS:
+        entry = app_instance.booking_entries[field]
+        entry.delete(0, tk.END)
+        entry.insert(0, getattr(reservation_data, field) if reservation_data else placeholder)
+    app_instance.date_var.set(reservation_data.date if reservation_data else DATE_PLACEHOLDER)
+
+    editing = app_instance.editing_reservation_id is not None
+    submit_button_text = "Update Reservation" if editing else "Confirm Booking"
+    # An edit can only be saved once its row version is known, or changes by other desks would be overwritten
+    submit_state = "disabled" if editing and app_instance.editing_version is None else "normal"
+    app_instance.booking_submit_button.configure(text=submit_button_text, state=submit_state)
+
+def _build_booking_form(app_instance):
+    page = ttk.Frame(app_instance.content_area, style="TFrame")
+    page.pack(fill="both", expand=True)
+    app_instance.pages["book"] = page
+
+    header_frame = ttk.Frame(page, style="TFrame")
     header_frame.pack(fill="x", pady=(20, 10))
 
     ttk.Label(header_frame, text="Book a Flight", style="Title.TLabel", font=("Inter", 20, "bold")).pack(side="left", padx=20)
 
-    form_frame = ttk.Frame(app_instance.content_area, style="Card.TFrame", padding="30 30 30 30")
+    form_frame = ttk.Frame(page, style="Card.TFrame", padding="30 30 30 30")
     form_frame.pack(fill="x", padx=20, pady=10)
 
     form_frame.columnconfigure(0, weight=1)
@@ -57,24 +68,20 @@ def show_book_flight_ui(app_instance, reservation_data=None):
     # Full Name
     ttk.Label(form_frame, text="Full Name", style="FormLabel.TLabel", anchor="w").grid(row=0, column=0, sticky="w", pady=(10, 0), padx=5)
     name_entry = ttk.Entry(form_frame, width=50, style="TEntry")
-    name_entry.insert(0, reservation_data.get("Name", "Enter your full name") if reservation_data else "Enter your full name")
     name_entry.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(0, 15), padx=5)
 
     # Flight Number
     ttk.Label(form_frame, text="Flight Number", style="FormLabel.TLabel", anchor="w").grid(row=2, column=0, sticky="w", pady=(10, 0), padx=5)
     flight_number_entry = ttk.Entry(form_frame, width=50, style="TEntry")
-    flight_number_entry.insert(0, reservation_data.get("Flight Number", "e.g. FS123") if reservation_data else "e.g. FS123")
     flight_number_entry.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(0, 15), padx=5)
 
     # Departure and Destination (side by side)
     ttk.Label(form_frame, text="Departure", style="FormLabel.TLabel", anchor="w").grid(row=4, column=0, sticky="w", pady=(10, 0), padx=5)
     departure_entry = ttk.Entry(form_frame, width=25, style="TEntry")
-    departure_entry.insert(0, reservation_data.get("Departure", "e.g. New York") if reservation_data else "e.g. New York")
     departure_entry.grid(row=5, column=0, sticky="ew", pady=(0, 15), padx=5)
 
     ttk.Label(form_frame, text="Destination", style="FormLabel.TLabel", anchor="w").grid(row=4, column=1, sticky="w", pady=(10, 0), padx=5)
     destination_entry = ttk.Entry(form_frame, width=25, style="TEntry")
-    destination_entry.insert(0, reservation_data.get("Destination", "e.g. London") if reservation_data else "e.g. London")
     destination_entry.grid(row=5, column=1, sticky="ew", pady=(0, 15), padx=5)
 
     # Date and Seat Number (side by side)
@@ -82,7 +89,6 @@ def show_book_flight_ui(app_instance, reservation_data=None):
     date_frame = ttk.Frame(form_frame, style="Card.TFrame")
     date_frame.grid(row=7, column=0, sticky="ew", pady=(0, 15), padx=5)
 
-    app_instance.date_var.set(reservation_data.get("Date", "Pick a date") if reservation_data else "Pick a date")
     date_entry = ttk.Entry(date_frame, width=20, style="TEntry", textvariable=app_instance.date_var)
     date_entry.pack(side="left", fill="x", expand=True)
 
@@ -91,9 +97,20 @@ def show_book_flight_ui(app_instance, reservation_data=None):
     calendar_icon.bind("<Button-1>", lambda e: open_date_picker(app_instance, app_instance.date_var))
 
     ttk.Label(form_frame, text="Seat Number", style="FormLabel.TLabel", anchor="w").grid(row=6, column=1, sticky="w", pady=(10, 0), padx=5)
-    seat_number_entry = ttk.Entry(form_frame, width=25, style="TEntry")
-    seat_number_entry.insert(0, reservation_data.get("Seat", "e.g. 12A") if reservation_data else "e.g. 12A")
-    seat_number_entry.grid(row=7, column=1, sticky="ew", pady=(0, 15), padx=5)
+    seat_frame = ttk.Frame(form_frame, style="Card.TFrame")
+    seat_frame.grid(row=7, column=1, sticky="ew", pady=(0, 15), padx=5)
+    seat_number_entry = ttk.Entry(seat_frame, width=18, style="TEntry")
+    seat_number_entry.pack(side="left", fill="x", expand=True)
+    ttk.Button(seat_frame, text="Auto", style="Secondary.TButton", width=6,
+               command=lambda: auto_assign_seat(app_instance)).pack(side="right", padx=(5, 0))
+
+    app_instance.booking_entries = {
+        "name": name_entry,
+        "flight_number": flight_number_entry,
+        "departure": departure_entry,
+        "destination": destination_entry,
+        "seat_number": seat_number_entry,
+    }
 
     # Buttons (Cancel and Book Flight)
     button_frame = ttk.Frame(form_frame, style="Card.TFrame")
@@ -101,8 +118,29 @@ def show_book_flight_ui(app_instance, reservation_data=None):
 
     ttk.Button(button_frame, text="Cancel", style="Secondary.TButton", command=app_instance.show_home).pack(side="left", padx=(0, 10))
 
-    submit_button_text = "Update Reservation" if app_instance.editing_flight_number is not None else "Confirm Booking"
-    ttk.Button(button_frame, text=submit_button_text, style="Primary.TButton", command=lambda: app_instance.submit_booking(
+    app_instance.booking_submit_button = ttk.Button(button_frame, text="Confirm Booking", style="Primary.TButton", command=lambda: app_instance.submit_booking(
         name_entry.get(), flight_number_entry.get(), departure_entry.get(),
         destination_entry.get(), app_instance.date_var.get(), seat_number_entry.get()
-    )).pack(side="left")
+    ))
+    app_instance.booking_submit_button.pack(side="left")
+
+def auto_assign_seat(app_instance):
+    """Fills the seat entry with the next best free seat of the entered flight and date."""
+    flight_number = app_instance.booking_entries["flight_number"].get().strip()
+    date = app_instance.date_var.get()
+    placeholders = dict(FORM_PLACEHOLDERS)
+    if not flight_number or flight_number == placeholders["flight_number"] or date in ("", DATE_PLACEHOLDER):
+        messagebox.showerror("Seat Assignment", "Enter the flight number and date first.")
+        return
+
+    def on_found(seat):
+        if seat is None:
+            messagebox.showinfo("Seat Assignment", f"Flight {flight_number} on {date} has no free seats left.")
+            return
+        entry = app_instance.booking_entries["seat_number"]
+        entry.delete(0, tk.END)
+        entry.insert(0, seat)
+
+    # The seat is only suggested here; it is taken for good, atomically, when the booking is saved
+    app_instance.db_worker.submit(database_operations.next_free_seat_db, flight_number, date,
+                                  on_success=on_found, key="next_free_seat")
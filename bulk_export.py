@@ -0,0 +1,166 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import db_connection # Pooled, long-lived connections
+from reservation_record import FIELDS
+
+DEFAULT_BATCH_SIZE = 5000
+FORMATS = ("csv", "jsonl")
+
+
+class ExportResult:
+    """Summary of an export run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.exported = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.exported / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"Exported {self.exported} row(s) to {self.path} "
+                f"in {self.elapsed:.2f}s ({self.rows_per_sec:,.0f} rows/sec)")
+
+
+def detect_format(path):
+    """Guesses ('csv' or 'jsonl', compressed) from the file extension, e.g. 'out.jsonl.gz'."""
+    lowered = path.lower()
+    compressed = lowered.endswith(".gz")
+    if compressed:
+        lowered = lowered[:-3]
+    if lowered.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl", compressed
+    return "csv", compressed
+
+
+def open_output(path, compressed=False):
+    """Opens the output file for text writing, gzip-compressed if requested."""
+    if compressed:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def write_csv(f, batches, on_batch):
+    """Writes a header row (the column names bulk_import accepts) and then every batch."""
+    writer = csv.writer(f)
+    writer.writerow(FIELDS)
+    for rows in batches:
+        writer.writerows(rows)
+        on_batch(len(rows))
+
+
+def write_jsonl(f, batches, on_batch):
+    """Writes one JSON object per reservation, keyed by column name."""
+    for rows in batches:
+        f.writelines(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n" for row in rows)
+        on_batch(len(rows))
+
+
+def export_reservations(path, file_format=None, compressed=None, filters=None, sort_by=None, descending=False,
+                        search_text=None, batch_size=DEFAULT_BATCH_SIZE, conn=None, progress=None):
+    """
+    Streams the matching reservations into a CSV or JSONL file, one fetchmany batch at a time.
+    :param file_format: 'csv' or 'jsonl'; defaults to the file extension.
+    :param compressed: Whether to gzip the output; defaults to True for a '.gz' extension.
+    :param filters, sort_by, descending, search_text: Same meaning as in database_operations.iter_reservations_db.
+    :param conn: Connection to use; defaults to the calling thread's pooled connection.
+    :param progress: Optional callable receiving the ExportResult after every batch.
+    :return: An ExportResult. On error the partial file is removed and the exception re-raised.
+    """
+    import database_operations
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    detected_format, detected_compressed = detect_format(path)
+    file_format = file_format or detected_format
+    compressed = detected_compressed if compressed is None else compressed
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+    write = write_csv if file_format == "csv" else write_jsonl
+
+    result = ExportResult(path)
+    start = time.perf_counter()
+
+    def on_batch(count):
+        result.exported += count
+        result.elapsed = time.perf_counter() - start
+        if progress:
+            progress(result)
+
+    batches = database_operations.iter_reservations_db(filters, sort_by, descending, search_text,
+                                                       batch_size=batch_size, conn=conn)
+    try:
+        with open_output(path, compressed) as f:
+            write(f, batches, on_batch)
+    except BaseException:
+        batches.close()
+        if os.path.exists(path):
+            os.remove(path) # Never leave a truncated export that looks complete
+        raise
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    import database_operations
+    parser = argparse.ArgumentParser(description="Export reservations to CSV or JSONL (optionally gzip-compressed).")
+    parser.add_argument("path", help="output file; a '.gz' extension compresses it")
+    parser.add_argument("--format", choices=FORMATS, help="output format (default: from file extension)")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output regardless of extension")
+    parser.add_argument("--search", help="only export full-text search matches for this text")
+    parser.add_argument("--flight-number", help="only export this flight number")
+    parser.add_argument("--name", help="only export names starting with this text (case-insensitive)")
+    parser.add_argument("--departure", help="only export this departure city")
+    parser.add_argument("--destination", help="only export this destination city")
+    parser.add_argument("--date-from", help="only export dates on or after this one (YYYY-MM-DD)")
+    parser.add_argument("--date-to", help="only export dates on or before this one (YYYY-MM-DD)")
+    parser.add_argument("--sort", choices=tuple(database_operations.SORT_COLUMNS), help="sort column (default: insertion order)")
+    parser.add_argument("--desc", action="store_true", help="sort in descending order")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows fetched per batch")
+    parser.add_argument("--db", default=db_connection.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="do not print per-batch progress")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        return 2
+
+    filters = {
+        "Flight Number": args.flight_number,
+        "Name": args.name,
+        "Departure": args.departure,
+        "Destination": args.destination,
+        "Date From": args.date_from,
+        "Date To": args.date_to,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+
+    db_connection.configure(db_path=args.db)
+    database_operations.init_db()
+
+    def report(result):
+        print(f"  {result.exported:,} rows exported ({result.rows_per_sec:,.0f} rows/sec)", file=sys.stderr)
+
+    try:
+        result = export_reservations(args.path, file_format=args.format, compressed=True if args.gzip else None,
+                                     filters=filters, sort_by=args.sort, descending=args.desc,
+                                     search_text=args.search, batch_size=args.batch_size,
+                                     progress=None if args.quiet else report)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+
+    print(result.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
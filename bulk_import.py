@@ -0,0 +1,242 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import database_operations # Write transactions (BEGIN IMMEDIATE, retried on lock contention)
+import db_connection # Pooled, long-lived connections
+import seat_inventory # Seats are taken as rows are imported
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Database columns in insert order, with the header names accepted for each one.
+# Both the raw column names and the labels used throughout the UI are recognised.
+COLUMN_ALIASES = (
+    ("flight_number", ("flight_number", "Flight Number")),
+    ("name", ("name", "Name")),
+    ("departure", ("departure", "Departure")),
+    ("destination", ("destination", "Destination")),
+    ("date", ("date", "Date")),
+    ("seat_number", ("seat_number", "Seat", "Seat Number")),
+)
+
+INSERT_SQL = '''
+    INSERT INTO reservations (flight_number, name, departure, destination, date, seat_number)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+class ImportResult:
+    """Summary of a bulk import run."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = [] # (line number, reason, raw record) per rejected row
+        self.elapsed = 0.0
+
+    @property
+    def processed(self):
+        return self.inserted + len(self.rejected)
+
+    @property
+    def rows_per_sec(self):
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"Imported {self.inserted} row(s), rejected {len(self.rejected)} "
+                f"in {self.elapsed:.2f}s ({self.rows_per_sec:,.0f} rows/sec)")
+
+
+def detect_format(path):
+    """Guesses 'csv' or 'jsonl' from the file extension."""
+    lowered = path.lower()
+    if lowered.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+def read_csv_records(path):
+    """Lazily yields (line number, record dict) pairs from a CSV file with a header row."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+
+
+def read_jsonl_records(path):
+    """Lazily yields (line number, record dict) pairs from a JSON Lines file."""
+    with open(path, encoding="utf-8") as f:
+        for line_num, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_num, ValueError(f"Invalid JSON: {e}")
+                continue
+            yield line_num, record
+
+
+def record_to_row(record):
+    """Maps a record onto the reservations column order, raising ValueError if it is incomplete."""
+    if not isinstance(record, dict):
+        raise ValueError("Record is not an object")
+    row = []
+    for column, aliases in COLUMN_ALIASES:
+        value = None
+        for alias in aliases:
+            if record.get(alias) not in (None, ""):
+                value = str(record[alias]).strip()
+                break
+        if not value:
+            raise ValueError(f"Missing value for '{column}'")
+        row.append(value)
+    return tuple(row)
+
+
+def _insert_batch(conn, batch, result):
+    """
+    Inserts one batch in a single write transaction, isolating rows that violate constraints.
+    Seats are taken in the same transaction; rows whose seat is taken or not on the seat map are rejected.
+    """
+    rows = [row for _, row, _ in batch]
+
+    def insert_all(conn):
+        refused = seat_inventory.take_rows(conn, rows)
+        if refused:
+            raise seat_inventory.SeatError(f"{len(refused)} seat(s) refused") # Rolls the whole batch back
+        conn.executemany(INSERT_SQL, rows)
+
+    try:
+        database_operations._write_transaction(conn, insert_all)
+        result.inserted += len(batch)
+        return
+    except (sqlite3.IntegrityError, seat_inventory.SeatError):
+        pass # The whole batch was rolled back; retry row by row to find the offenders
+
+    def insert_each(conn):
+        # Counted per attempt, since a transaction that loses the write lock is run again
+        inserted, rejected = 0, []
+        for line_num, row, record in batch:
+            try:
+                cursor = conn.execute(INSERT_SQL, row)
+            except sqlite3.IntegrityError as e:
+                rejected.append((line_num, f"Constraint violation: {e}", record))
+                continue
+            try:
+                seat_inventory.assign(conn, row[0], row[4], row[5])
+            except seat_inventory.SeatError as e:
+                conn.execute("DELETE FROM reservations WHERE id = ?", (cursor.lastrowid,))
+                rejected.append((line_num, str(e), record))
+                continue
+            inserted += 1
+        return inserted, rejected
+
+    inserted, rejected = database_operations._write_transaction(conn, insert_each)
+    result.inserted += inserted
+    result.rejected.extend(rejected)
+
+
+def import_records(records, batch_size=DEFAULT_BATCH_SIZE, conn=None, progress=None):
+    """
+    Inserts (line number, record) pairs in batched transactions.
+    :param records: Iterable of (line number, record dict) pairs; records may be exceptions for unreadable lines.
+    :param batch_size: Number of rows committed per transaction.
+    :param conn: Connection to use; defaults to the calling thread's pooled connection.
+    :param progress: Optional callable receiving the ImportResult after every batch.
+    :return: An ImportResult.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    conn = conn or db_connection.get_connection()
+    result = ImportResult()
+    start = time.perf_counter()
+    batch = []
+    for line_num, record in records:
+        if isinstance(record, Exception):
+            result.rejected.append((line_num, str(record), None))
+            continue
+        try:
+            row = record_to_row(record)
+        except ValueError as e:
+            result.rejected.append((line_num, str(e), record))
+            continue
+        batch.append((line_num, row, record))
+        if len(batch) >= batch_size:
+            _insert_batch(conn, batch, result)
+            batch = []
+            result.elapsed = time.perf_counter() - start
+            if progress:
+                progress(result)
+    if batch:
+        _insert_batch(conn, batch, result)
+    result.elapsed = time.perf_counter() - start
+    if progress:
+        progress(result)
+    return result
+
+
+def import_reservations(path, file_format=None, batch_size=DEFAULT_BATCH_SIZE, conn=None, progress=None):
+    """Streams reservations from a CSV or JSONL file into the database."""
+    file_format = file_format or detect_format(path)
+    if file_format == "csv":
+        records = read_csv_records(path)
+    elif file_format == "jsonl":
+        records = read_jsonl_records(path)
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+    return import_records(records, batch_size=batch_size, conn=conn, progress=progress)
+
+
+def write_rejects(path, rejected):
+    """Writes rejected rows as JSON Lines so they can be fixed and re-imported."""
+    with open(path, "w", encoding="utf-8") as f:
+        for line_num, reason, record in rejected:
+            f.write(json.dumps({"line": line_num, "reason": reason, "record": record}) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import reservations from CSV or JSONL.")
+    parser.add_argument("path", help="CSV (with header row) or JSONL file to import")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from file extension)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per committed transaction")
+    parser.add_argument("--db", default=db_connection.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--rejects", help="write rejected rows to this JSONL file")
+    parser.add_argument("--quiet", action="store_true", help="do not print per-batch progress")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"Input file not found: {args.path}", file=sys.stderr)
+        return 2
+
+    db_connection.configure(db_path=args.db)
+    database_operations.init_db()
+
+    def report(result):
+        print(f"  {result.processed:,} rows processed ({result.rows_per_sec:,.0f} rows/sec)", file=sys.stderr)
+
+    try:
+        result = import_reservations(args.path, file_format=args.format, batch_size=args.batch_size,
+                                     progress=None if args.quiet else report)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+
+    print(result.summary())
+    if result.rejected:
+        for line_num, reason, _ in result.rejected[:10]:
+            print(f"  line {line_num}: {reason}", file=sys.stderr)
+        if len(result.rejected) > 10:
+            print(f"  ... and {len(result.rejected) - 10} more", file=sys.stderr)
+        if args.rejects:
+            write_rejects(args.rejects, result.rejected)
+            print(f"Rejected rows written to {args.rejects}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
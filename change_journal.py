@@ -0,0 +1,115 @@
+import seat_inventory # Replicas keep their seat maps in step with the applied rows
+from reservation_record import FIELDS
+
+# Append-only log of every change to the reservations table, written by triggers so bulk imports,
+# purges and archiving are logged as well as single edits. Entries only name the changed reservation
+# id; readers join the current row, so the journal stays small however wide the rows are.
+# AUTOINCREMENT keeps sequence numbers from ever being reused, also after old entries are pruned.
+DEFAULT_PAGE_SIZE = 1000
+LOOKUP_CHUNK = 500 # Reservation ids per IN (...) lookup
+
+JOURNAL_TABLE = '''
+    CREATE TABLE IF NOT EXISTS change_journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT NOT NULL,
+        reservation_id INTEGER NOT NULL,
+        changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+    )
+'''
+
+JOURNAL_TRIGGERS = {
+    "journal_insert": '''CREATE TRIGGER IF NOT EXISTS journal_insert AFTER INSERT ON reservations BEGIN
+        INSERT INTO change_journal (op, reservation_id) VALUES ('insert', new.id);
+    END''',
+    "journal_update": '''CREATE TRIGGER IF NOT EXISTS journal_update AFTER UPDATE ON reservations BEGIN
+        INSERT INTO change_journal (op, reservation_id) VALUES ('update', new.id);
+    END''',
+    "journal_delete": '''CREATE TRIGGER IF NOT EXISTS journal_delete AFTER DELETE ON reservations BEGIN
+        INSERT INTO change_journal (op, reservation_id) VALUES ('delete', old.id);
+    END''',
+}
+
+# Columns of the rows handed out with the entries and applied to replicas
+ROW_FIELDS = ("id",) + FIELDS + ("version",)
+ROW_COLUMNS = ", ".join(ROW_FIELDS)
+
+
+def create(conn):
+    """Creates the journal table and its triggers (entries start with the next change)."""
+    conn.execute(JOURNAL_TABLE)
+    for statement in JOURNAL_TRIGGERS.values():
+        conn.execute(statement)
+
+
+def drop_triggers(conn):
+    """Stops journaling, for replicas: they copy the source's entries instead of writing their own."""
+    for name in JOURNAL_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def position(conn):
+    """Sequence number of the latest change ever logged (0 if none), also after pruning."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_journal'").fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(conn, since, limit=DEFAULT_PAGE_SIZE):
+    """
+    The journal entries after sequence number `since`, oldest first, served by the primary key.
+    Each comes with the row as it is now (None if it no longer exists), so applying a page in order
+    brings a copy up to date; a later entry for the same reservation simply applies the same row again.
+    Run several pages inside one read transaction to get them from a single snapshot.
+    :return: A JSON-ready dict: changes ({seq, op, reservation_id, changed_at, row}), next (sequence
+             number to continue from), last (latest sequence number), and gap, which is True when
+             entries after `since` were already pruned and the copy has to be seeded again.
+    """
+    last = position(conn)
+    first = conn.execute("SELECT MIN(seq) FROM change_journal").fetchone()[0]
+    # Behind the oldest kept entry, or ahead of the source (e.g. it was restored from an older copy)
+    if since > last or (since < last and (first is None or since + 1 < first)):
+        return {"changes": [], "next": since, "last": last, "gap": True}
+    entries = conn.execute(f'''
+        SELECT j.seq, j.op, j.reservation_id, j.changed_at, {", ".join("r." + field for field in ROW_FIELDS)}
+        FROM change_journal AS j LEFT JOIN reservations AS r ON r.id = j.reservation_id
+        WHERE j.seq > ? ORDER BY j.seq LIMIT ?''', (since, limit)).fetchall()
+    changes = [{"seq": seq, "op": op, "reservation_id": reservation_id, "changed_at": changed_at,
+                "row": list(row) if row[0] is not None else None}
+               for seq, op, reservation_id, changed_at, *row in entries]
+    return {"changes": changes, "next": changes[-1]["seq"] if changes else since, "last": last, "gap": False}
+
+
+def apply_changes(conn, changes):
+    """
+    Applies a page of changes_since() to a replica inside the caller's write transaction: rows are
+    upserted or deleted, seat maps follow, and the entries are copied into the replica's own journal
+    so its position() is the source's sequence number it has caught up to.
+    """
+    latest = {} # reservation id -> row (or None) of its last entry in the page
+    for change in changes:
+        latest[change["reservation_id"]] = change["row"]
+    reservation_ids = list(latest)
+    old_rows = []
+    for start in range(0, len(reservation_ids), LOOKUP_CHUNK):
+        chunk = reservation_ids[start:start + LOOKUP_CHUNK]
+        old_rows.extend(conn.execute(f"SELECT {ROW_COLUMNS} FROM reservations WHERE id IN "
+                                     f"({', '.join('?' * len(chunk))})", chunk))
+    # Seat maps take rows in column order, without the id
+    seat_inventory.release_rows(conn, [row[1:] for row in old_rows])
+    conn.executemany("DELETE FROM reservations WHERE id = ?",
+                     [(reservation_id,) for reservation_id, row in latest.items() if row is None])
+    new_rows = [tuple(row) for row in latest.values() if row is not None]
+    # An upsert keeps the row, so the replica's search index and summary triggers see an update
+    conn.executemany(f'''INSERT INTO reservations ({ROW_COLUMNS}) VALUES ({", ".join("?" * len(ROW_FIELDS))})
+                         ON CONFLICT (id) DO UPDATE SET flight_number = excluded.flight_number, name = excluded.name,
+                             departure = excluded.departure, destination = excluded.destination,
+                             date = excluded.date, seat_number = excluded.seat_number,
+                             version = excluded.version''', new_rows)
+    seat_inventory.take_rows(conn, [row[1:] for row in new_rows]) # Seats taken twice in the source simply stay taken
+    conn.executemany("INSERT OR IGNORE INTO change_journal (seq, op, reservation_id, changed_at) VALUES (?, ?, ?, ?)",
+                     [(change["seq"], change["op"], change["reservation_id"], change["changed_at"])
+                      for change in changes])
+
+
+def prune(conn, through_seq):
+    """Deletes the entries up to and including `through_seq`; consumers still behind it will see a gap."""
+    return conn.execute("DELETE FROM change_journal WHERE seq <= ?", (through_seq,)).rowcount
@@ -0,0 +1,480 @@
+import argparse
+import contextlib
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+import archive # Archive file of past reservations
+import db_connection # Pooled, long-lived connections
+import seat_inventory # Cabins and seat preferences for the seats command
+from reservation_record import FIELDS, Reservation
+
+EXIT_OK = 0
+EXIT_FAILED = 1 # Database or I/O error
+EXIT_USAGE = 2 # Invalid arguments (also used by argparse)
+EXIT_NOT_FOUND = 3 # A reservation id given on the command line does not exist
+EXIT_CONFLICT = 4 # The seat is already taken, or the row changed meanwhile
+EXIT_REJECTED = 5 # Bulk insert finished but rejected some records
+
+QUERY_FORMATS = ("jsonl", "json", "csv")
+FIELD_OPTIONS = (
+    ("flight_number", "--flight-number"),
+    ("name", "--name"),
+    ("departure", "--departure"),
+    ("destination", "--destination"),
+    ("date", "--date"),
+    ("seat_number", "--seat"),
+)
+BULK_UPDATE_FIELDS = ("departure", "destination", "date") # Same as database_operations.BATCH_UPDATE_FIELDS
+
+
+class CliError(Exception):
+    """A failure reported on stderr as {"error": {"code", "message", "details"}} with one of the EXIT_* codes."""
+
+    def __init__(self, code, message, exit_code=EXIT_FAILED, details=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.exit_code = exit_code
+        self.details = details
+
+    def to_dict(self):
+        error = {"code": self.code, "message": self.message}
+        if self.details is not None:
+            error["details"] = self.details
+        return {"error": error}
+
+
+# Errors reported by database_operations that exit with EXIT_CONFLICT, by title
+CONFLICT_ERRORS = ("Update Conflict:", "Seat Error:")
+
+
+class ErrorCollector:
+    """Error handler for database_operations that keeps the messages instead of showing them."""
+
+    def __init__(self):
+        self.errors = []
+
+    def __call__(self, title, message):
+        self.errors.append(f"{title}: {message}")
+
+    def raise_if_any(self, default_message):
+        """Raises a CliError carrying the collected messages (or default_message if there are none)."""
+        errors, self.errors = self.errors, []
+        if errors and errors[-1].startswith(CONFLICT_ERRORS):
+            raise CliError("conflict", errors[-1], EXIT_CONFLICT, errors[:-1] or None)
+        raise CliError("database_error", errors[-1] if errors else default_message, EXIT_FAILED,
+                       errors[:-1] or None)
+
+
+def write_json(data):
+    sys.stdout.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+
+def check_date(value):
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CliError("invalid_argument", f"Invalid date '{value}', expected YYYY-MM-DD", EXIT_USAGE)
+    return value
+
+
+# --- Shared options ---
+def add_filter_arguments(parser):
+    parser.add_argument("--where-flight-number", dest="f_flight_number", help="only this flight number")
+    parser.add_argument("--where-name", dest="f_name", help="only names starting with this text (case-insensitive)")
+    parser.add_argument("--where-departure", dest="f_departure", help="only this departure city")
+    parser.add_argument("--where-destination", dest="f_destination", help="only this destination city")
+    parser.add_argument("--date-from", dest="f_date_from", help="only dates on or after this one (YYYY-MM-DD)")
+    parser.add_argument("--date-to", dest="f_date_to", help="only dates on or before this one (YYYY-MM-DD)")
+
+
+def filters_from_args(args):
+    """Builds the database_operations filter dictionary from the --where-*/--date-* options."""
+    for value in (args.f_date_from, args.f_date_to):
+        if value:
+            check_date(value)
+    filters = {
+        "Flight Number": args.f_flight_number,
+        "Name": args.f_name,
+        "Departure": args.f_departure,
+        "Destination": args.f_destination,
+        "Date From": args.f_date_from,
+        "Date To": args.f_date_to,
+    }
+    return {key: value for key, value in filters.items() if value}
+
+
+def add_field_arguments(parser):
+    for field, option in FIELD_OPTIONS:
+        parser.add_argument(option, dest=field)
+
+
+# --- Subcommands ---
+def cmd_insert(args, database_operations, errors):
+    if args.file:
+        import bulk_import
+        if not os.path.exists(args.file):
+            raise CliError("file_not_found", f"Input file not found: {args.file}", EXIT_USAGE)
+        try:
+            result = bulk_import.import_reservations(args.file, file_format=args.format, batch_size=args.batch_size)
+        except (OSError, sqlite3.Error, ValueError) as e:
+            raise CliError("import_failed", str(e))
+        if args.rejects and result.rejected:
+            bulk_import.write_rejects(args.rejects, result.rejected)
+        write_json({"inserted": result.inserted, "rejected": len(result.rejected),
+                    "elapsed_sec": round(result.elapsed, 3), "rows_per_sec": round(result.rows_per_sec, 1)})
+        if result.rejected:
+            raise CliError("records_rejected", f"{len(result.rejected)} record(s) rejected", EXIT_REJECTED,
+                           [{"line": line, "reason": reason} for line, reason, _ in result.rejected[:100]])
+        return EXIT_OK
+
+    missing = [option for field, option in FIELD_OPTIONS if not getattr(args, field)]
+    if missing:
+        raise CliError("invalid_argument", f"Missing {', '.join(missing)} (or use --file)", EXIT_USAGE)
+    reservation = Reservation(*(getattr(args, field).strip() for field in FIELDS))
+    check_date(reservation.date)
+    reservation_id = database_operations.insert_reservation_db(reservation)
+    if not reservation_id:
+        errors.raise_if_any("Insert failed")
+    write_json({"inserted": 1, "id": reservation_id, "reservation": reservation._asdict()})
+    return EXIT_OK
+
+
+def cmd_update(args, database_operations, errors):
+    found = database_operations.get_reservation_version_db(args.target)
+    if found is None:
+        raise CliError("not_found", f"Reservation {args.target} does not exist", EXIT_NOT_FOUND)
+    current, version = found
+    if args.if_version is not None and args.if_version != version:
+        raise CliError("conflict", f"Reservation {args.target} is at version {version}, not {args.if_version}",
+                       EXIT_CONFLICT)
+    changes = {field: getattr(args, field).strip() for field, _ in FIELD_OPTIONS if getattr(args, field)}
+    if not changes:
+        raise CliError("invalid_argument", "Nothing to update; pass at least one field option", EXIT_USAGE)
+    if "date" in changes:
+        check_date(changes["date"])
+    updated = current._replace(**changes)
+    # Only applies if nobody changed the row since it was read above; unchanged fields are not overwritten
+    if not database_operations.update_reservation_db(args.target, updated, version):
+        errors.raise_if_any("Update failed")
+    write_json({"updated": 1, "id": args.target, "reservation": updated._asdict(), "version": version + 1})
+    return EXIT_OK
+
+
+def split_missing(database_operations, reservation_ids):
+    """Splits reservation ids into (existing, missing) ones."""
+    missing = [rid for rid in reservation_ids if database_operations.get_reservation_db(rid) is None]
+    return [rid for rid in reservation_ids if rid not in missing], missing
+
+
+def cmd_delete(args, database_operations, errors):
+    filters = filters_from_args(args)
+    if args.ids and filters:
+        raise CliError("invalid_argument", "Pass either reservation ids or filter options, not both", EXIT_USAGE)
+    if not args.ids and not filters:
+        raise CliError("invalid_argument", "Pass reservation ids or at least one filter option", EXIT_USAGE)
+
+    if filters:
+        if args.dry_run:
+            write_json({"would_delete": database_operations.count_reservations_db(filters)})
+            return EXIT_OK
+        deleted = database_operations.delete_matching_reservations_db(filters)
+        if deleted is None:
+            errors.raise_if_any("Delete failed")
+        write_json({"deleted": deleted})
+        return EXIT_OK
+
+    existing, missing = split_missing(database_operations, args.ids)
+    if not args.dry_run and existing:
+        # All of them in one transaction: either every listed reservation is deleted or none is
+        if database_operations.delete_reservations_db(existing) is None:
+            errors.raise_if_any("Delete failed")
+    write_json({"would_delete" if args.dry_run else "deleted": len(existing), "missing": missing})
+    if missing:
+        raise CliError("not_found", f"{len(missing)} reservation(s) do not exist", EXIT_NOT_FOUND, missing)
+    return EXIT_OK
+
+
+def cmd_bulk_update(args, database_operations, errors):
+    filters = filters_from_args(args)
+    if args.ids and filters:
+        raise CliError("invalid_argument", "Pass either reservation ids or filter options, not both", EXIT_USAGE)
+    if not args.ids and not filters:
+        raise CliError("invalid_argument", "Pass reservation ids or at least one filter option", EXIT_USAGE)
+    changes = {field: getattr(args, field).strip() for field in BULK_UPDATE_FIELDS if getattr(args, field)}
+    if not changes:
+        raise CliError("invalid_argument", "Nothing to update; pass --departure, --destination or --date", EXIT_USAGE)
+    if "date" in changes:
+        check_date(changes["date"])
+
+    if filters:
+        missing = []
+        existing = [reservation_id for batch in database_operations.iter_reservations_db(filters, with_ids=True)
+                    for reservation_id, _ in batch]
+    else:
+        existing, missing = split_missing(database_operations, args.ids)
+    if args.dry_run:
+        write_json({"would_update": len(existing), "missing": missing})
+    else:
+        updated = database_operations.update_reservations_db(existing, changes) if existing else 0
+        if updated is None:
+            errors.raise_if_any("Update failed")
+        write_json({"updated": updated, "changes": changes, "missing": missing})
+    if missing:
+        raise CliError("not_found", f"{len(missing)} reservation(s) do not exist", EXIT_NOT_FOUND, missing)
+    return EXIT_OK
+
+
+def cmd_archive(args, database_operations, errors):
+    if (args.before is None) == (args.older_than_days is None):
+        raise CliError("invalid_argument", "Pass either --before DATE or --older-than-days N", EXIT_USAGE)
+    if args.older_than_days is not None:
+        if args.older_than_days < 0:
+            raise CliError("invalid_argument", "--older-than-days cannot be negative", EXIT_USAGE)
+        cutoff = (datetime.date.today() - datetime.timedelta(days=args.older_than_days)).isoformat()
+    else:
+        cutoff = check_date(args.before)
+    if args.batch_size < 1:
+        raise CliError("invalid_argument", "--batch-size must be at least 1", EXIT_USAGE)
+    archive.configure(args.archive)
+    if args.dry_run:
+        due = database_operations.count_archivable_db(cutoff)
+        if due is None:
+            errors.raise_if_any("Counting failed")
+        write_json({"cutoff": cutoff, "would_archive": due})
+        return EXIT_OK
+    moved = database_operations.archive_reservations_db(cutoff, args.batch_size)
+    if moved is None:
+        errors.raise_if_any("Archiving failed")
+    write_json({"cutoff": cutoff, "archived": moved, "archive": archive.path(),
+                "archived_total": database_operations.count_archived_db()})
+    return EXIT_OK
+
+
+def cmd_history(args, database_operations, errors):
+    archive.configure(args.archive)
+    reservations = database_operations.search_archive_db(args.text, args.limit)
+    if errors.errors:
+        errors.raise_if_any("History lookup failed")
+    for reservation in reservations:
+        write_json(reservation._asdict())
+    return EXIT_OK
+
+
+def cmd_changes(args, database_operations, errors):
+    page = database_operations.changes_since_db(args.since, args.limit)
+    if page is None:
+        errors.raise_if_any("Reading the change journal failed")
+    write_json(page)
+    return EXIT_OK
+
+
+def cmd_prune_journal(args, database_operations, errors):
+    pruned = database_operations.prune_journal_db(args.through)
+    if pruned is None:
+        errors.raise_if_any("Pruning the change journal failed")
+    write_json({"pruned": pruned, "position": database_operations.journal_position_db()})
+    return EXIT_OK
+
+
+def cmd_query(args, database_operations, errors):
+    filters = filters_from_args(args)
+    batches = database_operations.iter_reservations_db(filters, args.sort, args.desc, args.search, with_ids=True)
+    remaining = args.limit
+    out = sys.stdout
+    writer = csv.writer(out) if args.format == "csv" else None
+    if writer:
+        writer.writerow(("id",) + FIELDS)
+    elif args.format == "json":
+        out.write("[")
+    count = 0
+    try:
+        for rows in batches:
+            if remaining is not None:
+                rows = rows[:remaining]
+                remaining -= len(rows)
+            if writer:
+                writer.writerows((reservation_id,) + reservation for reservation_id, reservation in rows)
+            else:
+                for reservation_id, reservation in rows:
+                    text = json.dumps(dict(id=reservation_id, **reservation._asdict()), ensure_ascii=False)
+                    if args.format == "json":
+                        out.write(("," if count else "") + "\n  " + text)
+                    else:
+                        out.write(text + "\n")
+                    count += 1
+            if remaining == 0:
+                break
+    except sqlite3.Error as e:
+        raise CliError("database_error", f"Error querying reservations: {e}")
+    finally:
+        batches.close()
+    if args.format == "json":
+        out.write("\n]\n" if count else "]\n")
+    return EXIT_OK
+
+
+def cmd_report(args, database_operations, errors):
+    filters = filters_from_args(args)
+    total = database_operations.count_reservations_db(filters)
+    groups = database_operations.reservation_report_db(args.group_by, filters)
+    if errors.errors:
+        errors.raise_if_any("Report failed")
+    if args.format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow((args.group_by, "reservations"))
+        writer.writerows(groups)
+    else:
+        write_json({"total": total, "filters": filters, "group_by": args.group_by,
+                    "groups": [{"group": group, "reservations": count} for group, count in groups]})
+    return EXIT_OK
+
+
+def cmd_seats(args, database_operations, errors):
+    check_date(args.date)
+    seat = database_operations.next_free_seat_db(args.flight_number, args.date, args.cabin, args.preference)
+    availability = database_operations.seat_availability_db(args.flight_number, args.date)
+    if errors.errors:
+        errors.raise_if_any("Seat lookup failed")
+    write_json({"flight_number": args.flight_number, "date": args.date, "next_free_seat": seat,
+                "availability": availability})
+    return EXIT_OK
+
+
+def cmd_export(args, database_operations, errors):
+    import bulk_export
+    try:
+        result = bulk_export.export_reservations(args.path, compressed=True if args.gzip else None,
+                                                 filters=filters_from_args(args), sort_by=args.sort,
+                                                 descending=args.desc, search_text=args.search)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        raise CliError("export_failed", str(e))
+    write_json({"exported": result.exported, "path": result.path, "elapsed_sec": round(result.elapsed, 3)})
+    return EXIT_OK
+
+
+def build_parser(sort_columns, report_groups):
+    parser = argparse.ArgumentParser(
+        description="FlySky reservations from the command line. Never imports tkinter, so it runs without a display.")
+    parser.add_argument("--db", default=db_connection.DB_PATH, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    insert = commands.add_parser("insert", help="insert one reservation, or bulk insert a CSV/JSONL file")
+    add_field_arguments(insert)
+    insert.add_argument("--file", help="CSV (with header row) or JSONL file to bulk insert")
+    insert.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from file extension)")
+    insert.add_argument("--batch-size", type=int, default=5000, help="rows per committed transaction")
+    insert.add_argument("--rejects", help="write rejected records to this JSONL file")
+    insert.set_defaults(handler=cmd_insert)
+
+    update = commands.add_parser("update", help="change fields of one reservation")
+    update.add_argument("target", type=int, metavar="ID", help="id of the reservation to change (see query)")
+    add_field_arguments(update)
+    update.add_argument("--if-version", type=int, help="only update if the reservation is at this row version")
+    update.set_defaults(handler=cmd_update)
+
+    delete = commands.add_parser("delete", help="delete reservations by id or by filter (purge)")
+    delete.add_argument("ids", type=int, nargs="*", metavar="ID")
+    add_filter_arguments(delete)
+    delete.add_argument("--dry-run", action="store_true", help="only report how many rows would be deleted")
+    delete.set_defaults(handler=cmd_delete)
+
+    bulk_update = commands.add_parser("bulk-update",
+                                      help="change the departure, destination or date of many reservations at once")
+    bulk_update.add_argument("ids", type=int, nargs="*", metavar="ID")
+    add_filter_arguments(bulk_update)
+    for field, option in FIELD_OPTIONS:
+        if field in BULK_UPDATE_FIELDS:
+            bulk_update.add_argument(option, dest=field, help=f"new {field} of every matching reservation")
+    bulk_update.add_argument("--dry-run", action="store_true", help="only report how many rows would be updated")
+    bulk_update.set_defaults(handler=cmd_bulk_update)
+
+    for name, help_text, handler in (("query", "print matching reservations", cmd_query),
+                                     ("export", "stream matching reservations to a file", cmd_export)):
+        sub = commands.add_parser(name, help=help_text)
+        if name == "export":
+            sub.add_argument("path", help="output file; .csv or .jsonl, add .gz to compress")
+            sub.add_argument("--gzip", action="store_true", help="gzip the output regardless of extension")
+        add_filter_arguments(sub)
+        sub.add_argument("--search", help="full-text search text")
+        sub.add_argument("--sort", choices=sort_columns, help="sort column (default: insertion order)")
+        sub.add_argument("--desc", action="store_true", help="sort in descending order")
+        if name == "query":
+            sub.add_argument("--limit", type=int, help="stop after this many rows")
+            sub.add_argument("--format", choices=QUERY_FORMATS, default="jsonl", help="output format (default: %(default)s)")
+        sub.set_defaults(handler=handler)
+
+    report = commands.add_parser("report", help="reservation counts grouped by route, city or date")
+    report.add_argument("--group-by", choices=report_groups, default="route", help="grouping (default: %(default)s)")
+    report.add_argument("--format", choices=("json", "csv"), default="json", help="output format (default: %(default)s)")
+    add_filter_arguments(report)
+    report.set_defaults(handler=cmd_report)
+
+    seats = commands.add_parser("seats", help="free seats of a flight on a date and the next best one")
+    seats.add_argument("flight_number", metavar="FLIGHT_NUMBER")
+    seats.add_argument("date", metavar="DATE", help="YYYY-MM-DD")
+    seats.add_argument("--cabin", choices=seat_inventory.cabin_names(), default=seat_inventory.DEFAULT_CABIN,
+                       help="cabin to suggest a seat in (default: %(default)s)")
+    seats.add_argument("--preference", choices=seat_inventory.PREFERENCES, help="prefer window or aisle seats")
+    seats.set_defaults(handler=cmd_seats)
+
+    archive_command = commands.add_parser("archive", help="move reservations of past dates into the archive file")
+    archive_command.add_argument("--before", metavar="DATE", help="archive reservations dated before this day")
+    archive_command.add_argument("--older-than-days", type=int, metavar="N", help="archive reservations more than N days old")
+    archive_command.add_argument("--batch-size", type=int, default=archive.DEFAULT_BATCH_SIZE,
+                                 help="rows moved per committed transaction (default: %(default)s)")
+    archive_command.add_argument("--dry-run", action="store_true", help="only report how many rows would be archived")
+    archive_command.set_defaults(handler=cmd_archive)
+
+    history = commands.add_parser("history", help="look up archived reservations (JSON lines, newest first)")
+    history.add_argument("text", nargs="?", help="flight number, city, or start of the name (default: all)")
+    history.add_argument("--limit", type=int, default=archive.DEFAULT_SEARCH_LIMIT, help="at most this many rows")
+    history.set_defaults(handler=cmd_history)
+
+    changes = commands.add_parser("changes", help="journal entries after a sequence number, with their current rows")
+    changes.add_argument("--since", type=int, default=0, help="last sequence number already seen (default: %(default)s)")
+    changes.add_argument("--limit", type=int, default=1000, help="at most this many entries (default: %(default)s)")
+    changes.set_defaults(handler=cmd_changes)
+
+    prune_journal = commands.add_parser("prune-journal", help="drop change journal entries every consumer has seen")
+    prune_journal.add_argument("through", type=int, metavar="SEQ", help="drop entries up to and including this one")
+    prune_journal.set_defaults(handler=cmd_prune_journal)
+
+    for sub in (archive_command, history):
+        sub.add_argument("--archive", metavar="PATH", help="archive file (default: <db name>_archive.db next to --db)")
+    return parser
+
+
+def main(argv=None):
+    import database_operations
+    parser = build_parser(tuple(database_operations.SORT_COLUMNS), tuple(database_operations.REPORT_GROUPS))
+    args = parser.parse_args(argv)
+
+    errors = ErrorCollector()
+    database_operations.set_error_handler(errors)
+    try:
+        if args.command != "insert" and not os.path.exists(args.db):
+            raise CliError("database_not_found", f"Database not found: {args.db}", EXIT_USAGE)
+        db_connection.configure(db_path=args.db)
+        with contextlib.redirect_stdout(sys.stderr): # Keep stdout for results
+            database_operations.init_db()
+        if errors.errors:
+            errors.raise_if_any("Database initialization failed")
+        return args.handler(args, database_operations, errors)
+    except CliError as e:
+        sys.stderr.write(json.dumps(e.to_dict(), ensure_ascii=False) + "\n")
+        return e.exit_code
+    except BrokenPipeError:
+        # The reader (e.g. `head`) went away; nothing left to report
+        sys.stderr.close()
+        return EXIT_OK
+    finally:
+        database_operations.set_error_handler(None)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,142 +1,1008 @@
+import datetime
+import random
+import re
 import sqlite3
-from tkinter import messagebox # Used for displaying errors
+import sys
+import threading
+import time
+import archive # Past reservations moved out of the hot table
+import change_journal # Trigger-written log of changes, for incremental backups and replicas
+import db_connection # Pooled, long-lived connections
+import perf_stats # Lock wait and retry backoff histograms
+import seat_inventory # Per flight/date seat bitsets
+import summary_stats # Trigger-maintained aggregates for the dashboard
+from reservation_record import FIELDS, Reservation, ReservationTable, as_reservation
+
+QUERY_PAGE_SIZE = 100
+
+# Sortable columns (by their display name) and the SQL expression each one sorts on
+SORT_COLUMNS = {
+    "Flight Number": "flight_number",
+    "Name": "name COLLATE NOCASE",
+    "Departure": "departure",
+    "Destination": "destination",
+    "Date": "date",
+    "Seat": "seat_number",
+}
+
+# Filter criteria accepted by query_reservations_db and count_reservations_db
+FILTER_KEYS = ("Flight Number", "Name", "Departure", "Destination", "Date From", "Date To")
+
+# Fields update_reservations_db can set on many reservations at once (e.g. moving a cancelled flight)
+BATCH_UPDATE_FIELDS = ("departure", "destination", "date")
+LOOKUP_CHUNK = 500 # Reservation ids per IN (...) lookup, well below SQLite's limit on bound parameters
+
+# Every passenger of a flight has a reservation with the same flight number, so reservations are keyed
+# by a surrogate id. AUTOINCREMENT keeps ids from being reused, so a stale id never names another booking.
+RESERVATIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        flight_number TEXT NOT NULL,
+        name TEXT NOT NULL,
+        departure TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        date TEXT NOT NULL,
+        seat_number TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 1
+    )
+'''
+RESERVATION_COLUMNS = "id, " + ", ".join(FIELDS) # Rows handed to callers that need to tell bookings apart
+
+# One covering index per sort order: the sort column, then the id (unique, so it breaks ties and keyset
+# cursors seek on both), then the remaining columns, so a page of sorted rows is read from the index
+# alone. The same indexes serve the filters of query_reservations_db.
+RESERVATION_INDEXES = tuple(
+    f'CREATE INDEX IF NOT EXISTS idx_reservations_by_{expression.split()[0]} ON reservations '
+    f'({", ".join([expression, "id"] + [field for field in FIELDS if field != expression.split()[0]])})'
+    for expression in SORT_COLUMNS.values()
+) + ('CREATE INDEX IF NOT EXISTS idx_reservations_route ON reservations (departure, destination)',)
+
+# Schema version kept in PRAGMA user_version; init_db migrates databases of older versions
+SCHEMA_VERSION = 2
+# Single-column indexes of version 0, replaced by the covering ones
+OBSOLETE_INDEXES = ("idx_reservations_flight_number", "idx_reservations_name", "idx_reservations_destination",
+                    "idx_reservations_date", "idx_reservations_seat")
+
+# Full-text index over the searchable columns, kept in sync with reservations by triggers.
+# 'prefix' builds extra index entries so short search-as-you-type prefixes stay fast, and
+# remove_diacritics makes matching accent-insensitive (e.g. "emile" finds "Émile").
+SEARCH_INDEX_SCHEMA = (
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS reservations_fts USING fts5(
+        flight_number, name, departure, destination,
+        content='reservations', tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS reservations_fts_insert AFTER INSERT ON reservations BEGIN
+        INSERT INTO reservations_fts (rowid, flight_number, name, departure, destination)
+        VALUES (new.rowid, new.flight_number, new.name, new.departure, new.destination);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS reservations_fts_delete AFTER DELETE ON reservations BEGIN
+        INSERT INTO reservations_fts (reservations_fts, rowid, flight_number, name, departure, destination)
+        VALUES ('delete', old.rowid, old.flight_number, old.name, old.departure, old.destination);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS reservations_fts_update
+    AFTER UPDATE OF flight_number, name, departure, destination ON reservations BEGIN
+        INSERT INTO reservations_fts (reservations_fts, rowid, flight_number, name, departure, destination)
+        VALUES ('delete', old.rowid, old.flight_number, old.name, old.departure, old.destination);
+        INSERT INTO reservations_fts (rowid, flight_number, name, departure, destination)
+        VALUES (new.rowid, new.flight_number, new.name, new.departure, new.destination);
+    END''',
+)
+
+# Writes run in short BEGIN IMMEDIATE transactions. When another connection holds the write lock past
+# busy_timeout, the transaction is retried this many times, sleeping with exponential backoff and jitter.
+WRITE_RETRIES = 5
+RETRY_BASE_DELAY = 0.05 # seconds before the first retry; doubles on each further one
+RETRY_MAX_DELAY = 1.0
+LOCK_WAIT_THRESHOLD = 0.001 # seconds; a BEGIN IMMEDIATE slower than this had to wait for another writer
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+CHECKPOINT_RETRY_DELAY = 0.005 # seconds between attempts while another checkpoint is running
+
+_search_index_available = False
+
+_contention_lock = threading.Lock()
+_contention = {"write_transactions": 0, "lock_waits": 0, "retries": 0, "lock_errors": 0, "conflicts": 0,
+               "lock_wait_ms": 0.0}
+
+_error_handlers = threading.local()
+
+def set_error_handler(handler):
+    """Sets the callable (title, message) that reports database errors raised on the calling thread."""
+    _error_handlers.handler = handler
+
+def report_error(title, message):
+    """
+    Reports a database error through the calling thread's handler. Without one, a messagebox is shown
+    when a Tk root window exists, and the error is printed to stderr otherwise (headless tools, benchmarks).
+    """
+    handler = getattr(_error_handlers, "handler", None)
+    if handler is not None:
+        handler(title, message)
+        return
+    tkinter = sys.modules.get("tkinter") # Never imported here, so headless use needs no display
+    if tkinter is not None and getattr(tkinter, "_default_root", None) is not None:
+        from tkinter import messagebox
+        messagebox.showerror(title, message)
+    else:
+        print(f"{title}: {message}", file=sys.stderr)
+
+def contention_stats():
+    """
+    Counters of write contention since the process started (or the last reset): write transactions,
+    transactions that had to wait for the write lock, retries after a locked database, lock errors given
+    up on, lost updates caught by a row version check, and the total time spent waiting for the write lock.
+    """
+    with _contention_lock:
+        stats = dict(_contention)
+    stats["lock_wait_ms"] = round(stats["lock_wait_ms"], 3)
+    return stats
+
+def reset_contention_stats():
+    with _contention_lock:
+        for key in _contention:
+            _contention[key] = 0
+
+def _count_contention(key, amount=1):
+    with _contention_lock:
+        _contention[key] += amount
+
+def _is_lock_error(error):
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+def _write_transaction(conn, work):
+    """
+    Runs work(conn) in a BEGIN IMMEDIATE transaction and commits it. Taking the write lock up front means
+    a transaction never fails half way when it tries to upgrade from reading to writing; if the lock
+    cannot be had within busy_timeout, the whole transaction is retried with backoff.
+    :return: What work returned.
+    """
+    delay = RETRY_BASE_DELAY
+    for attempt in range(WRITE_RETRIES + 1):
+        started = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            waited = time.perf_counter() - started
+            perf_stats.record("db.write_lock_wait", waited)
+            _count_contention("lock_wait_ms", waited * 1000.0)
+            if waited > LOCK_WAIT_THRESHOLD:
+                _count_contention("lock_waits")
+            result = work(conn)
+            conn.commit()
+            _count_contention("write_transactions")
+            return result
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.rollback()
+            if not _is_lock_error(e):
+                raise
+            if attempt == WRITE_RETRIES:
+                _count_contention("lock_errors")
+                raise
+            _count_contention("retries")
+            pause = min(delay, RETRY_MAX_DELAY) * random.uniform(0.5, 1.5) # Jitter keeps desks from retrying in step
+            with perf_stats.timer("db.write_retry_backoff"):
+                time.sleep(pause)
+            _count_contention("lock_wait_ms", (time.perf_counter() - started) * 1000.0) # Busy wait plus backoff
+            delay *= 2
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
 
 def init_db():
     """Initializes the SQLite database and creates the reservations table."""
-    conn = None
     try:
-        conn = sqlite3.connect('flights.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reservations (
-                flight_number TEXT PRIMARY KEY UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                departure TEXT NOT NULL,
-                destination TEXT NOT NULL,
-                date TEXT NOT NULL,
-                seat_number TEXT NOT NULL
-            )
-        ''')
-        conn.commit()
+        conn = db_connection.get_connection()
+        with conn: # Commits on success, rolls back on error
+            conn.execute(RESERVATIONS_TABLE.format(name="reservations"))
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(reservations)")]
+        if columns != ["id", *FIELDS, "version"]:
+            _write_transaction(conn, lambda conn: _migrate_reservations_table(conn, columns))
+        with conn:
+            _init_indexes(conn.cursor())
+        _init_search_index(conn)
+        _init_seat_maps(conn)
+        _write_transaction(conn, summary_stats.create)
+        _write_transaction(conn, change_journal.create)
         print("Database initialized successfully.")
     except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error initializing database: {e}")
-    finally:
-        if conn:
-            conn.close()
+        report_error("Database Error", f"Error initializing database: {e}")
 
-def insert_reservation_db(reservation_data):
-    """Inserts a new reservation into the database."""
-    conn = None
+def _migrate_reservations_table(conn, columns):
+    """
+    Rebuilds an older reservations table in the current layout: keyed by a reservation id rather than
+    a unique flight number, with row versions. Every row keeps its rowid as its id, so the search index
+    stays valid. Rebuilding the table drops its indexes and triggers, which init_db creates again right
+    after. The change journal named flight numbers, so it starts over after its last sequence number:
+    replicas see a gap and are seeded again.
+    """
+    print("Migrating reservations to reservation ids...")
+    journal = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_journal'").fetchone()
+    position = change_journal.position(conn) if journal else 0
+    conn.execute("DROP TABLE IF EXISTS change_journal")
+    conn.execute(RESERVATIONS_TABLE.format(name="reservations_new"))
+    # Row version for optimistic concurrency, starting at 1 in databases created before it existed
+    version = "version" if "version" in columns else "1"
+    conn.execute(f'''INSERT INTO reservations_new (id, {", ".join(FIELDS)}, version)
+                     SELECT rowid, {", ".join(FIELDS)}, {version} FROM reservations''')
+    conn.execute("DROP TABLE reservations")
+    conn.execute("ALTER TABLE reservations_new RENAME TO reservations")
+    if position:
+        change_journal.create(conn)
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_journal', ?)", (position + 1,))
+
+def _init_indexes(cursor):
+    """
+    Creates the indexes backing the sort orders and filters of query_reservations_db. Databases of an
+    older SCHEMA_VERSION get their obsolete indexes replaced first, which on a large table takes a while, once.
+    """
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION:
+        if cursor.execute("SELECT EXISTS (SELECT 1 FROM reservations)").fetchone()[0]:
+            print("Migrating the reservation indexes...")
+        for name in OBSOLETE_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    for statement in RESERVATION_INDEXES:
+        cursor.execute(statement)
+    if version < SCHEMA_VERSION:
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            cursor.execute("ANALYZE reservations") # Planner statistics for the new indexes
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _init_search_index(conn):
+    """Creates the FTS5 search index and its triggers, filling it from existing rows the first time."""
+    global _search_index_available
     try:
-        conn = sqlite3.connect('flights.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO reservations (flight_number, name, departure, destination, date, seat_number)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (reservation_data['Flight Number'], reservation_data['name'],
-              reservation_data['Departure'], reservation_data['Destination'],
-              reservation_data['Date'], reservation_data['Seat']))
-        conn.commit()
+        with conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reservations_fts'").fetchone()
+            for statement in SEARCH_INDEX_SCHEMA:
+                conn.execute(statement)
+            if not exists:
+                conn.execute("INSERT INTO reservations_fts (reservations_fts) VALUES ('rebuild')")
+        _search_index_available = True
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 fall back to the name prefix filter for searching
+        print(f"Full-text search unavailable: {e}")
+        _search_index_available = False
+
+def _init_seat_maps(conn):
+    """Creates the seat inventory table, filling it from existing reservations the first time."""
+    def create(conn):
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'seat_maps'").fetchone()
+        conn.execute(seat_inventory.SEAT_MAPS_SCHEMA)
+        if not exists:
+            seat_inventory.rebuild(conn)
+    _write_transaction(conn, create)
+
+def search_index_available():
+    """Returns True if init_db could set up the FTS5 search index."""
+    return _search_index_available
+
+def rebuild_search_index_db():
+    """Rebuilds the search index from the reservations table (e.g. after editing the file with other tools)."""
+    try:
+        conn = db_connection.get_connection()
+        with conn:
+            conn.execute("INSERT INTO reservations_fts (reservations_fts) VALUES ('rebuild')")
         return True
-    except sqlite3.IntegrityError:
-        messagebox.showerror("Booking Error", f"Flight Number '{reservation_data['Flight Number']}' already exists. Please use a unique Flight Number.")
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error rebuilding search index: {e}")
+        return False
+
+def insert_reservation_db(reservation_data):
+    """
+    Inserts a new reservation (a Reservation, or a dictionary keyed by field names or labels) into the database.
+    :return: The id of the new reservation, or False on error (e.g. the seat is already taken on that flight).
+    """
+    try:
+        reservation = as_reservation(reservation_data)
+        conn = db_connection.get_connection()
+
+        def insert(conn):
+            # The seat is taken in the same transaction, so a failed insert gives it back
+            seat_inventory.assign(conn, reservation.flight_number, reservation.date, reservation.seat_number)
+            return conn.execute('''
+                INSERT INTO reservations (flight_number, name, departure, destination, date, seat_number)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', reservation).lastrowid
+
+        return _write_transaction(conn, insert)
+    except seat_inventory.SeatError as e:
+        report_error("Seat Error", str(e))
         return False
     except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error inserting reservation: {e}")
+        report_error("Database Error", f"Error inserting reservation: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
-def update_reservation_db(old_flight_number, reservation_data):
-    """Updates an existing reservation in the database."""
-    conn = None
+def update_reservation_db(reservation_id, reservation_data, expected_version=None):
+    """
+    Updates an existing reservation in the database and bumps its row version.
+    :param expected_version: The version read when the edit started (see get_reservation_version_db). When
+                             given, the update only applies if nobody changed the row since; otherwise it is
+                             reported as a conflict instead of silently overwriting the other change.
+    :return: True if saved, False on error, on conflict or if the reservation does not exist.
+    """
     try:
-        conn = sqlite3.connect('flights.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE reservations
-            SET name = ?, flight_number = ?, departure = ?, destination = ?, date = ?, seat_number = ?
-            WHERE flight_number = ?
-        ''', (reservation_data['name'], reservation_data['Flight Number'],
-              reservation_data['Departure'], reservation_data['Destination'],
-              reservation_data['Date'], reservation_data['Seat'], old_flight_number))
-        conn.commit()
+        reservation = as_reservation(reservation_data)
+        conn = db_connection.get_connection()
+
+        def update(conn):
+            sql = '''
+                UPDATE reservations
+                SET flight_number = ?, name = ?, departure = ?, destination = ?, date = ?, seat_number = ?,
+                    version = version + 1
+                WHERE id = ?
+            '''
+            params = reservation + (reservation_id,)
+            if expected_version is not None:
+                sql += ' AND version = ?'
+                params += (expected_version,)
+            old_rows = conn.execute('SELECT flight_number, name, departure, destination, date, seat_number '
+                                    'FROM reservations WHERE id = ?', (reservation_id,)).fetchall()
+            if conn.execute(sql, params).rowcount:
+                # Move the seat only if the flight, date or seat changed, so old free-text seats can stay
+                moved = [row for row in old_rows if (row[0], row[4], row[5]) != (reservation.flight_number,
+                                                                                 reservation.date, reservation.seat_number)]
+                if moved:
+                    seat_inventory.release_rows(conn, moved)
+                    seat_inventory.assign(conn, reservation.flight_number, reservation.date, reservation.seat_number)
+                return None
+            if expected_version is None:
+                return "missing"
+            # Nothing matched the expected version: tell a concurrent edit from a concurrent delete
+            row = conn.execute('SELECT version FROM reservations WHERE id = ?', (reservation_id,)).fetchone()
+            return "changed" if row else "deleted"
+
+        conflict = _write_transaction(conn, update)
+        if conflict == "missing":
+            report_error("Not Found", f"Reservation {reservation_id} does not exist.")
+            return False
+        if conflict:
+            _count_contention("conflicts")
+            report_error("Update Conflict",
+                         f"Reservation {reservation_id} ({reservation.name}, flight {reservation.flight_number}) was "
+                         f"{conflict} by someone else after you opened it. Your changes were not saved; reload it and try again.")
+            return False
         return True
-    except sqlite3.IntegrityError:
-        messagebox.showerror("Update Error", f"New Flight Number '{reservation_data['Flight Number']}' already exists. Please use a unique Flight Number.")
+    except seat_inventory.SeatError as e:
+        report_error("Seat Error", str(e))
         return False
     except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error updating reservation: {e}")
+        report_error("Database Error", f"Error updating reservation: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
-def delete_reservation_db(flight_number):
-    """Deletes a reservation from the database."""
-    conn = None
+def delete_reservation_db(reservation_id):
+    """
+    Deletes a reservation from the database, releasing its seat.
+    :return: True if deleted, False on error or if the reservation does not exist.
+    """
     try:
-        conn = sqlite3.connect('flights.db')
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM reservations WHERE flight_number = ?', (flight_number,))
-        conn.commit()
+        conn = db_connection.get_connection()
+
+        def delete(conn):
+            rows = conn.execute('SELECT flight_number, name, departure, destination, date, seat_number '
+                                'FROM reservations WHERE id = ?', (reservation_id,)).fetchall()
+            conn.execute('DELETE FROM reservations WHERE id = ?', (reservation_id,))
+            seat_inventory.release_rows(conn, rows)
+            return bool(rows)
+
+        if not _write_transaction(conn, delete):
+            report_error("Not Found", f"Reservation {reservation_id} does not exist.")
+            return False
         return True
     except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error deleting reservation: {e}")
+        report_error("Database Error", f"Error deleting reservation: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
+
+def _rows_by_id(conn, reservation_ids):
+    """Reads the (id, *FIELDS) rows of the given reservation ids; missing ones are skipped."""
+    rows = []
+    for start in range(0, len(reservation_ids), LOOKUP_CHUNK):
+        chunk = reservation_ids[start:start + LOOKUP_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        rows.extend(conn.execute(f'SELECT {RESERVATION_COLUMNS} FROM reservations WHERE id IN ({placeholders})', chunk))
+    return rows
+
+def delete_reservations_db(reservation_ids):
+    """
+    Deletes many reservations by id in one transaction, releasing their seats.
+    Ids that do not exist (any more) are skipped.
+    :return: The number of deleted rows, or None on error (nothing is deleted then).
+    """
+    reservation_ids = list(dict.fromkeys(reservation_ids))
+    try:
+        conn = db_connection.get_connection()
+
+        def delete(conn):
+            rows = _rows_by_id(conn, reservation_ids)
+            conn.executemany('DELETE FROM reservations WHERE id = ?', [(row[0],) for row in rows])
+            seat_inventory.release_rows(conn, [row[1:] for row in rows])
+            return len(rows)
+
+        return _write_transaction(conn, delete)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error deleting reservations: {e}")
+        return None
+
+def update_reservations_db(reservation_ids, changes):
+    """
+    Sets the same fields on many reservations in one transaction and bumps their row versions, e.g. a
+    date change for every booking of a flight. When the date changes the seats move along with it; if
+    any seat is already taken on the new date, nothing is changed.
+    :param changes: {field: new value} for fields in BATCH_UPDATE_FIELDS.
+    :return: The number of updated rows, or None on error.
+    """
+    unknown = set(changes) - set(BATCH_UPDATE_FIELDS)
+    if unknown or not changes:
+        raise ValueError(f"update_reservations_db can only set {', '.join(BATCH_UPDATE_FIELDS)}")
+    reservation_ids = list(dict.fromkeys(reservation_ids))
+    fields = [field for field in BATCH_UPDATE_FIELDS if field in changes]
+    values = tuple(changes[field] for field in fields)
+    assignments = ", ".join(f"{field} = ?" for field in fields)
+    try:
+        conn = db_connection.get_connection()
+
+        def update(conn):
+            old_rows = _rows_by_id(conn, reservation_ids)
+            conn.executemany(f'UPDATE reservations SET {assignments}, version = version + 1 WHERE id = ?',
+                             [values + (row[0],) for row in old_rows])
+            if "date" in changes:
+                # Seats not on the seat map (free text in old databases) are not tracked, so they are left alone
+                moved = [row[1:] for row in old_rows
+                         if row[5] != changes["date"] and seat_inventory.locate(row[6]) is not None]
+                seat_inventory.release_rows(conn, moved)
+                new_rows = [Reservation._make(row)._replace(**changes) for row in moved]
+                refused = [new_rows[index] for index in seat_inventory.take_rows(conn, new_rows)]
+                if refused:
+                    listed = ", ".join(f"{res.seat_number} ({res.flight_number})" for res in refused[:10])
+                    more = f" and {len(refused) - 10} more" if len(refused) > 10 else ""
+                    raise seat_inventory.SeatError(f"{len(refused)} seat(s) are already taken on {changes['date']}: "
+                                                   f"{listed}{more}. No reservations were changed.")
+            return len(old_rows)
+
+        return _write_transaction(conn, update)
+    except seat_inventory.SeatError as e:
+        report_error("Seat Error", str(e))
+        return None
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error updating reservations: {e}")
+        return None
 
 def get_all_reservations_db():
-    """Retrieves all reservations from the database."""
-    conn = None
+    """Retrieves all reservations from the database as a columnar ReservationTable."""
     try:
-        conn = sqlite3.connect('flights.db')
+        conn = db_connection.get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT flight_number, name, departure, destination, date, seat_number FROM reservations')
-        rows = cursor.fetchall()
-        reservations_list = []
-        for row in rows:
-            reservations_list.append({
-                "Flight Number": row[0],
-                "Name": row[1],
-                "Departure": row[2],
-                "Destination": row[3],
-                "Date": row[4],
-                "Seat": row[5]
-            })
-        return reservations_list
-    except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error fetching reservations: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
+        return ReservationTable.from_cursor(cursor)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error fetching reservations: {e}")
+        return ReservationTable()
 
-def get_reservation_by_flight_number_db(flight_number):
-    """Retrieves a single reservation from the database by Flight Number."""
-    conn = None
+def get_reservation_version_db(reservation_id):
+    """
+    Retrieves a reservation together with its row version, to pass to update_reservation_db as expected_version.
+    :return: A (Reservation, version) pair, or None if there is no such reservation.
+    """
     try:
-        conn = sqlite3.connect('flights.db')
+        conn = db_connection.get_connection()
+        row = conn.execute('SELECT flight_number, name, departure, destination, date, seat_number, version '
+                           'FROM reservations WHERE id = ?', (reservation_id,)).fetchone()
+        return (Reservation._make(row[:6]), row[6]) if row else None
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error fetching reservation {reservation_id}: {e}")
+        return None
+
+def next_free_seat_db(flight_number, date, cabin=seat_inventory.DEFAULT_CABIN, preference=None):
+    """
+    Suggests the next best free seat of a flight on a date: the front-most free seat of the cabin,
+    window or aisle seats first if `preference` asks for them.
+    :return: A seat number such as '9A', or None if the cabin is full.
+    """
+    try:
+        return seat_inventory.next_free_seat(db_connection.get_connection(), flight_number, date, cabin, preference)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error reading seat map: {e}")
+        return None
+
+def seat_availability_db(flight_number, date):
+    """Free and total seats per cabin of a flight on a date, e.g. {"Economy": {"free": 310, "capacity": 312}}."""
+    try:
+        return seat_inventory.availability(db_connection.get_connection(), flight_number, date)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error reading seat map: {e}")
+        return {}
+
+def rebuild_seat_maps_db():
+    """Recomputes the seat inventory from the reservations table (e.g. after editing the file with other tools)."""
+    try:
+        _write_transaction(db_connection.get_connection(), seat_inventory.rebuild)
+        return True
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error rebuilding seat maps: {e}")
+        return False
+
+def get_reservation_db(reservation_id):
+    """Retrieves a single Reservation from the database by its id."""
+    try:
+        conn = db_connection.get_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT flight_number, name, departure, destination, date, seat_number FROM reservations WHERE flight_number = ?', (flight_number,))
-        row = cursor.fetchone()
-        if row:
-            return {
-                "Flight Number": row[0],
-                "Name": row[1],
-                "Departure": row[2],
-                "Destination": row[3],
-                "Date": row[4],
-                "Seat": row[5]
-            }
+        cursor.row_factory = Reservation.row_factory
+        cursor.execute('SELECT flight_number, name, departure, destination, date, seat_number FROM reservations WHERE id = ?', (reservation_id,))
+        return cursor.fetchone()
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error fetching reservation {reservation_id}: {e}")
+        return None
+
+def _keyed_row_factory(key_count):
+    """row_factory for keyset queries: turns (*cursor keys, *FIELDS) rows into (cursor, Reservation) pairs."""
+    def factory(cursor, row):
+        return tuple(row[:key_count]), Reservation._make(row[key_count:])
+    return factory
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _filter_clauses(filters):
+    """Builds WHERE clauses and parameters for a dictionary of filter criteria."""
+    filters = filters or {}
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+    clauses, params = [], []
+    if filters.get("Flight Number"):
+        clauses.append("flight_number = ?")
+        params.append(filters["Flight Number"])
+    if filters.get("Name"):
+        # Case-insensitive prefix match, served by the NOCASE name index
+        clauses.append("name LIKE ? ESCAPE '\\'")
+        params.append(_escape_like(filters["Name"]) + "%")
+    if filters.get("Departure"):
+        clauses.append("departure = ?")
+        params.append(filters["Departure"])
+    if filters.get("Destination"):
+        clauses.append("destination = ?")
+        params.append(filters["Destination"])
+    if filters.get("Date From"):
+        clauses.append("date >= ?")
+        params.append(filters["Date From"])
+    if filters.get("Date To"):
+        clauses.append("date <= ?")
+        params.append(filters["Date To"])
+    return clauses, params
+
+def _sort_keys(sort_by):
+    """Returns the ORDER BY expressions for a sort column; the reservation id breaks ties so the order is total."""
+    if sort_by is None:
+        return ["id"]
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by '{sort_by}'")
+    return [SORT_COLUMNS[sort_by], "id"]
+
+def _keyset_query(columns, filters, sort_by, descending, cursor, reservation_id=None):
+    """Builds the SELECT for rows after `cursor` in the requested order (without LIMIT)."""
+    clauses, params = _filter_clauses(filters)
+    if reservation_id is not None:
+        clauses.append("id = ?")
+        params.append(reservation_id)
+    keys = _sort_keys(sort_by)
+    # The keys are selected raw (without collation) so they can be used as the next cursor
+    key_columns = [key.split()[0] for key in keys]
+    if cursor is not None:
+        if len(cursor) != len(keys):
+            raise ValueError("Cursor does not match the sort order")
+        # A collation goes on the parameter, which keeps the comparison a seek in the covering index
+        placeholders = ", ".join("?" + key[len(column):] for key, column in zip(keys, key_columns))
+        clauses.append(f"({', '.join(key_columns)}) {'<' if descending else '>'} ({placeholders})")
+        params.extend(cursor)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    direction = "DESC" if descending else "ASC"
+    order_by = ", ".join(f"{key} {direction}" for key in keys)
+    sql = f"SELECT {', '.join(key_columns)}, {columns} FROM reservations {where} ORDER BY {order_by}"
+    return sql, params, len(keys)
+
+def query_reservation_rows_db(filters=None, sort_by=None, descending=False, cursor=None, limit=QUERY_PAGE_SIZE,
+                              backwards=False, reservation_id=None):
+    """
+    Keyset query returning (cursor, Reservation) pairs, where each cursor is the keyset position of its row
+    and ends with the reservation id. With backwards=True the rows just before `cursor` are returned (still
+    in the requested order).
+    :param reservation_id: Optionally restrict the rows to this reservation (for changed-rows queries).
+    """
+    try:
+        sql, params, key_count = _keyset_query(
+            "flight_number, name, departure, destination, date, seat_number",
+            filters, sort_by, descending != backwards, cursor, reservation_id)
+        db_cursor = db_connection.get_connection().cursor()
+        db_cursor.row_factory = _keyed_row_factory(key_count)
+        rows = db_cursor.execute(f"{sql} LIMIT ?", params + [limit]).fetchall()
+        if backwards:
+            rows.reverse()
+        return rows
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error querying reservations: {e}")
+        return []
+
+def query_reservations_db(filters=None, sort_by=None, descending=False, cursor=None, limit=QUERY_PAGE_SIZE):
+    """
+    Retrieves one page of reservations using keyset pagination.
+    :param filters: Optional dictionary with any of FILTER_KEYS ("Name" is a case-insensitive prefix,
+                    "Date From"/"Date To" are inclusive YYYY-MM-DD bounds).
+    :param sort_by: A key of SORT_COLUMNS, or None for insertion order.
+    :param descending: Sort in descending order.
+    :param cursor: The cursor returned with the previous page, or None for the first page.
+    :param limit: Maximum number of reservations in the page.
+    :return: A (reservations, next_cursor) tuple; next_cursor is None after the last page.
+    """
+    rows = query_reservation_rows_db(filters, sort_by, descending, cursor, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0]
+    return [reservation for _, reservation in rows], next_cursor
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def cursor_sort_key(sort_by, cursor):
+    """Returns a Python value that orders cursors of `sort_by` exactly as SQLite orders their rows."""
+    if sort_by is not None and SORT_COLUMNS[sort_by].endswith("COLLATE NOCASE"):
+        # SQLite's NOCASE only folds ASCII letters
+        return (cursor[0].translate(_ASCII_LOWER),) + tuple(cursor[1:])
+    return tuple(cursor)
+
+def get_reservation_cursor_at_db(position, filters=None, sort_by=None, descending=False):
+    """
+    Returns the cursor from which query_reservations_db continues at row `position` of the
+    given order, or None for position 0. Used to jump (e.g. by dragging a scrollbar) without
+    paging through everything before; only the index is walked, no rows are read.
+    """
+    if position <= 0:
+        return None
+    try:
+        sql, params, key_count = _keyset_query("NULL", filters, sort_by, descending, None)
+        conn = db_connection.get_connection()
+        row = conn.execute(f"{sql} LIMIT 1 OFFSET ?", params + [position - 1]).fetchone()
+        return tuple(row[:key_count]) if row else None
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error querying reservations: {e}")
+        return None
+
+def count_reservations_db(filters=None):
+    """Returns the number of reservations in the database, optionally only those matching `filters`."""
+    try:
+        clauses, params = _filter_clauses(filters)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = db_connection.get_connection()
+        if not clauses:
+            return summary_stats.total(conn) # Kept current by triggers, so no table scan
+        return conn.execute(f'SELECT COUNT(*) FROM reservations{where}', params).fetchone()[0]
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error counting reservations: {e}")
+        return 0
+
+def dashboard_stats_db(today=None, top_routes=5, upcoming_days=7):
+    """
+    Totals, busiest routes, the next days with bookings and flights per load factor bucket, read from
+    the trigger-maintained summary tables, so it costs the same for a hundred or ten million reservations.
+    :param today: ISO date the upcoming days start from (default: today).
+    :return: A dictionary (see summary_stats.dashboard), or None on error.
+    """
+    try:
+        today = today or datetime.date.today().isoformat()
+        return summary_stats.dashboard(db_connection.get_connection(), today, top_routes, upcoming_days)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error reading dashboard statistics: {e}")
+        return None
+
+def daily_counts_db(first_date, last_date):
+    """
+    Reservations per day between two ISO dates (inclusive), from the summary tables: a primary key
+    range of at most one row per day, e.g. one month for the date picker.
+    :return: (date, reservations) pairs for the days that have reservations.
+    """
+    try:
+        return summary_stats.daily_counts(db_connection.get_connection(), first_date, last_date)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error reading daily reservation counts: {e}")
+        return []
+
+def journal_position_db():
+    """Sequence number of the latest change in the change journal (0 before the first one), or None on error."""
+    try:
+        return change_journal.position(db_connection.get_connection())
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error reading the change journal: {e}")
+        return None
+
+def changes_since_db(since=0, limit=change_journal.DEFAULT_PAGE_SIZE):
+    """
+    The changes after sequence number `since` with their current rows, read from the journal's primary
+    key, so catching up costs in proportion to what changed rather than to the size of the table.
+    :return: A dictionary (see change_journal.changes_since), or None on error.
+    """
+    try:
+        return change_journal.changes_since(db_connection.get_connection(), since, limit)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error reading the change journal: {e}")
+        return None
+
+def prune_journal_db(through_seq):
+    """Drops journal entries up to and including `through_seq` once every consumer is past them; returns how many."""
+    try:
+        return _write_transaction(db_connection.get_connection(),
+                                  lambda conn: change_journal.prune(conn, through_seq))
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error pruning the change journal: {e}")
+        return None
+
+def rebuild_summary_stats_db():
+    """Recomputes the summary tables from the reservations table (e.g. after editing the file with other tools)."""
+    try:
+        _write_transaction(db_connection.get_connection(), summary_stats.rebuild)
+        return True
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error rebuilding summary statistics: {e}")
+        return False
+
+def checkpoint_db(mode="TRUNCATE", wait_ms=None):
+    """
+    Copies the WAL back into the database file. SQLite's automatic checkpoints never wait for readers,
+    so with desks reading all the time the WAL is never started over and keeps growing; RESTART and
+    TRUNCATE wait for the readers of the old WAL to finish, then start it over (TRUNCATE also empties
+    the file, RESTART leaves it at the connection's journal_size_limit).
+    :param wait_ms: Milliseconds to wait for readers and writers, instead of the connection's busy timeout.
+    :return: The (busy, WAL pages, checkpointed pages) row of PRAGMA wal_checkpoint, where busy is 1 if
+             the wait ran out, or None on error.
+    """
+    mode = mode.upper()
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Unknown checkpoint mode '{mode}'")
+    busy_timeout = int(db_connection.get_manager().settings["busy_timeout"])
+    wait_ms = busy_timeout if wait_ms is None else int(wait_ms)
+    deadline = time.monotonic() + wait_ms / 1000.0
+    try:
+        conn = db_connection.get_connection()
+        conn.execute(f"PRAGMA busy_timeout={wait_ms}")
+        try:
+            while True:
+                result = tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+                # (1, -1, -1): another connection's automatic checkpoint holds the checkpoint lock, and
+                # SQLite gives up on that at once instead of waiting
+                if result != (1, -1, -1) or time.monotonic() >= deadline:
+                    return result
+                time.sleep(CHECKPOINT_RETRY_DELAY)
+        finally:
+            conn.execute(f"PRAGMA busy_timeout={busy_timeout}")
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error checkpointing the database: {e}")
+        return None
+
+# Groupings accepted by reservation_report_db, with the SQL expression each one groups on
+REPORT_GROUPS = {
+    "departure": "departure",
+    "destination": "destination",
+    "route": "departure || ' -> ' || destination",
+    "date": "date",
+    "month": "substr(date, 1, 7)",
+}
+
+# Reports served from the summary tables when no filter is given
+SUMMARY_REPORTS = {
+    "route": "SELECT departure || ' -> ' || destination AS grp, reservations AS n FROM stats_routes "
+             "WHERE reservations > 0 ORDER BY n DESC, grp",
+    "date": "SELECT date AS grp, reservations AS n FROM stats_dates WHERE reservations > 0 ORDER BY n DESC, grp",
+}
+
+def delete_matching_reservations_db(filters):
+    """
+    Deletes every reservation matching `filters` in one transaction (e.g. purging old dates).
+    At least one filter is required so an empty filter can never wipe the table.
+    :return: The number of deleted rows, or None on error.
+    """
+    clauses, params = _filter_clauses(filters)
+    if not clauses:
+        raise ValueError("delete_matching_reservations_db needs at least one filter")
+    try:
+        conn = db_connection.get_connection()
+        where = ' AND '.join(clauses)
+
+        def delete(conn):
+            rows = conn.execute('SELECT flight_number, name, departure, destination, date, seat_number '
+                                f'FROM reservations WHERE {where}', params).fetchall()
+            conn.execute(f"DELETE FROM reservations WHERE {where}", params)
+            seat_inventory.release_rows(conn, rows)
+            return len(rows)
+
+        return _write_transaction(conn, delete)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error deleting reservations: {e}")
+        return None
+
+def count_archivable_db(cutoff):
+    """Number of reservations dated before `cutoff` (YYYY-MM-DD) that archive_reservations_db would move."""
+    datetime.date.fromisoformat(cutoff) # Raises ValueError for anything but a YYYY-MM-DD date
+    try:
+        return archive.count_due(db_connection.get_connection(), cutoff)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error counting reservations to archive: {e}")
         return None
+
+def archive_reservations_db(cutoff, batch_size=archive.DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Moves the reservations dated before `cutoff` (YYYY-MM-DD) into the archive file, oldest first, in
+    short write transactions per batch so desks can keep booking while a large backlog is moved: one
+    copies the batch into the archive, the next deletes the archived rows from the hot table.
+    :param progress: Optional callable receiving the number of rows moved so far after each batch.
+    :return: The number of archived rows, or None on error (batches committed before it stay archived).
+    """
+    datetime.date.fromisoformat(cutoff)
+    moved = 0
+    try:
+        conn = db_connection.get_connection()
+        with archive.attached(conn, create=True):
+            while True:
+                rows = _write_transaction(conn, lambda conn: archive.copy_batch(conn, cutoff, batch_size))
+                if rows:
+                    moved += _write_transaction(conn, lambda conn: archive.purge_batch(conn, rows))
+                if progress is not None:
+                    progress(moved)
+                if len(rows) < batch_size:
+                    return moved
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error archiving reservations after {moved:,} rows: {e}")
+        return None
+
+def count_archived_db():
+    """Number of reservations in the archive file (0 if nothing was archived yet)."""
+    if not archive.exists():
+        return 0
+    try:
+        with archive.attached(db_connection.get_connection()) as conn:
+            return archive.count(conn)
     except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error fetching reservation by Flight Number: {e}")
+        report_error("Database Error", f"Error reading the archive: {e}")
         return None
+
+def search_archive_db(text=None, limit=archive.DEFAULT_SEARCH_LIMIT):
+    """
+    Looks up past reservations in the archive, newest first: by flight number, city, or the start of
+    the name. The archive is attached only for this call, so everyday queries never touch it.
+    """
+    if not archive.exists():
+        return []
+    try:
+        with archive.attached(db_connection.get_connection()) as conn:
+            return [Reservation._make(row) for row in archive.search(conn, (text or "").strip(), limit)]
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error searching the archive: {e}")
+        return []
+
+def reservation_report_db(group_by, filters=None):
+    """Returns (group, reservation count) pairs for the matching reservations, largest groups first."""
+    if group_by not in REPORT_GROUPS:
+        raise ValueError(f"Cannot group by '{group_by}'")
+    try:
+        clauses, params = _filter_clauses(filters)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        expression = REPORT_GROUPS[group_by]
+        conn = db_connection.get_connection()
+        if not clauses and group_by in SUMMARY_REPORTS:
+            # Unfiltered route and date counts are already aggregated in the summary tables
+            return conn.execute(SUMMARY_REPORTS[group_by]).fetchall()
+        return conn.execute(f'''
+            SELECT {expression} AS grp, COUNT(*) AS n FROM reservations{where}
+            GROUP BY grp ORDER BY n DESC, grp
+        ''', params).fetchall()
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error building reservation report: {e}")
+        return []
+
+def build_search_query(text):
+    """Turns free text into an FTS5 query matching rows that contain a prefix of every word, or None."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_reservation_rows_db(text, cursor=None, limit=QUERY_PAGE_SIZE, backwards=False, reservation_id=None):
+    """
+    Full-text search over flight number, name, departure and destination, paged by reservation id.
+    Every word of `text` must match the start of a word in one of those columns, in any order.
+    :param cursor: The (id,) cursor of the last row of the previous page, or None for the first page.
+    :param reservation_id: Optionally restrict the matches to this reservation (for changed-rows queries).
+    :return: A list of (cursor, Reservation) pairs, in id order.
+    """
+    match = build_search_query(text)
+    if match is None:
+        return []
+    clauses, params = ["reservations_fts MATCH ?"], [match]
+    if cursor is not None:
+        clauses.append(f"reservations_fts.rowid {'<' if backwards else '>'} ?")
+        params.append(cursor[0])
+    if reservation_id is not None:
+        clauses.append("r.id = ?")
+        params.append(reservation_id)
+    try:
+        db_cursor = db_connection.get_connection().cursor()
+        db_cursor.row_factory = _keyed_row_factory(1)
+        rows = db_cursor.execute(f'''
+            SELECT r.id, r.flight_number, r.name, r.departure, r.destination, r.date, r.seat_number
+            FROM reservations_fts JOIN reservations AS r ON r.id = reservations_fts.rowid
+            WHERE {' AND '.join(clauses)}
+            ORDER BY reservations_fts.rowid {'DESC' if backwards else 'ASC'} LIMIT ?
+        ''', params + [limit]).fetchall()
+        if backwards:
+            rows.reverse()
+        return rows
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error searching reservations: {e}")
+        return []
+
+def count_search_matches_db(text, cursor=None, limit=QUERY_PAGE_SIZE):
+    """
+    Counts up to `limit` search matches after `cursor`, reading only the index.
+    :return: A (count, last_cursor) tuple, so matches can be counted a page at a time.
+    """
+    match = build_search_query(text)
+    if match is None:
+        return 0, cursor
+    try:
+        conn = db_connection.get_connection()
+        rowids = conn.execute('''
+            SELECT rowid FROM reservations_fts WHERE reservations_fts MATCH ? AND rowid > ?
+            ORDER BY rowid LIMIT ?
+        ''', (match, cursor[0] if cursor else -1, limit)).fetchall()
+        return len(rowids), ((rowids[-1][0],) if rowids else cursor)
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error searching reservations: {e}")
+        return 0, cursor
+
+def get_search_cursor_at_db(text, position):
+    """Returns the cursor from which search_reservation_rows_db continues at match number `position`."""
+    match = build_search_query(text)
+    if position <= 0 or match is None:
+        return None
+    try:
+        conn = db_connection.get_connection()
+        row = conn.execute('''
+            SELECT rowid FROM reservations_fts WHERE reservations_fts MATCH ?
+            ORDER BY rowid LIMIT 1 OFFSET ?
+        ''', (match, position - 1)).fetchone()
+        return (row[0],) if row else None
+    except sqlite3.Error as e:
+        report_error("Database Error", f"Error searching reservations: {e}")
+        return None
+
+def iter_reservations_db(filters=None, sort_by=None, descending=False, search_text=None, batch_size=1000, conn=None,
+                         with_ids=False):
+    """
+    Streams the reservations matching the filters (and the full-text search, if given) as lists of
+    at most batch_size Reservation records, reading from one cursor with fetchmany so memory stays flat.
+    Errors are raised to the caller, since a partial stream must not look like a complete one.
+    :param with_ids: Yield (reservation id, Reservation) pairs instead of bare records.
+    """
+    clauses, params = _filter_clauses(filters)
+    if search_text:
+        match = build_search_query(search_text)
+        if match is not None:
+            clauses.append("id IN (SELECT rowid FROM reservations_fts WHERE reservations_fts MATCH ?)")
+            params.append(match)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    direction = "DESC" if descending else "ASC"
+    order_by = ", ".join(f"{key} {direction}" for key in _sort_keys(sort_by))
+    conn = conn or db_connection.get_connection()
+    db_cursor = conn.cursor()
+    db_cursor.row_factory = (lambda cursor, row: (row[0], Reservation._make(row[1:]))) if with_ids else Reservation.row_factory
+    db_cursor.execute(f'''
+        SELECT {RESERVATION_COLUMNS if with_ids else ", ".join(FIELDS)}
+        FROM reservations {where} ORDER BY {order_by}
+    ''', params)
+    try:
+        while True:
+            rows = db_cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
     finally:
-        if conn:
-            conn.close()
+        db_cursor.close()
@@ -0,0 +1,136 @@
+import calendar
+import datetime
+import tkinter as tk
+from tkinter import ttk
+
+import database_operations
+
+# Day colors by how busy the day is compared with the busiest day of the month, lightest first
+HEAT_COLORS = ("#e3f0ff", "#b3d4ff", "#6fa8f5", "#2f6fd0")
+PREFETCH_MONTHS = 1 # Months on each side of the shown one that are loaded ahead of time
+
+class DatePicker:
+    """
+    A date picker window that is built once and hidden between uses, so opening it again only
+    moves and shows it. Days are shaded by how many reservations they already have; the counts
+    come from the summary tables one month at a time on the database worker and are cached.
+    """
+
+    def __init__(self, app_instance):
+        from tkcalendar import Calendar # Imported on first use; it is slow to import and only needed here
+        self.app = app_instance
+        self.variable = None # StringVar the selected date is written to
+        self.month_counts = {} # (year, month) -> {ISO date: reservations}
+        self.events = {} # ISO date -> calendar event id of its shading
+
+        self.top = tk.Toplevel(app_instance.root)
+        self.top.withdraw()
+        self.top.title("Select Date")
+        self.top.transient(app_instance.root)
+        self.top.protocol("WM_DELETE_WINDOW", self.hide)
+
+        self.calendar = Calendar(self.top, selectmode='day',
+                                 font="Inter 10",
+                                 background="#007bff", foreground='white',
+                                 normalbackground="white", weekendbackground="#f0f2f5",
+                                 bordercolor="#007bff", othermonthforeground="#888888",
+                                 othermonthbackground="#e0e0e0", headersbackground="#007bff",
+                                 headersforeground="white", selectbackground="#0056b3",
+                                 selectforeground="white", showweeknumbers=False)
+        self.calendar.pack(pady=(20, 5), padx=20)
+        for level, color in enumerate(HEAT_COLORS):
+            self.calendar.tag_config(f"heat{level}", background=color, foreground="black")
+        self.calendar.bind("<<CalendarMonthChanged>>", lambda e: self.load_displayed_month())
+
+        self.legend = ttk.Label(self.top, text="", style="Subtitle.TLabel")
+        self.legend.pack(padx=20)
+        ttk.Button(self.top, text="Select", style="Primary.TButton", command=self.select).pack(pady=10)
+        self.top.bind("<Escape>", lambda e: self.hide())
+
+    def open(self, variable):
+        """Shows the picker for `variable`, starting at the date it holds (if any)."""
+        self.variable = variable
+        try:
+            current = datetime.date.fromisoformat(variable.get())
+        except ValueError:
+            current = datetime.date.today()
+        self.calendar.selection_set(current)
+        self.calendar.see(current)
+
+        root = self.app.root
+        self.top.update_idletasks()
+        x = root.winfo_x() + (root.winfo_width() // 2) - (self.top.winfo_reqwidth() // 2)
+        y = root.winfo_y() + (root.winfo_height() // 2) - (self.top.winfo_reqheight() // 2)
+        self.top.geometry(f"+{x}+{y}")
+        self.top.deiconify()
+        self.top.lift()
+        self.top.grab_set()
+        # Counts may have changed since the month was cached; show the cached shading now and refresh it
+        self.load_displayed_month(reload=True)
+
+    def hide(self):
+        self.top.grab_release()
+        self.top.withdraw()
+
+    def select(self):
+        selected_date = self.calendar.selection_get()
+        if selected_date and self.variable is not None:
+            self.variable.set(selected_date.strftime("%Y-%m-%d"))
+        self.hide()
+
+    # --- Heatmap ---
+    def load_displayed_month(self, reload=False):
+        """Shades the shown month from the cache, loading it (and its neighbours) in the background if needed."""
+        month, year = self.calendar.get_displayed_month()
+        shown = (year, month)
+        if shown in self.month_counts:
+            self._shade(shown)
+        for offset in range(-PREFETCH_MONTHS, PREFETCH_MONTHS + 1):
+            key = _add_months(shown, offset)
+            if key not in self.month_counts or (reload and key == shown):
+                self._request(key)
+
+    def _request(self, key):
+        year, month = key
+        first = datetime.date(year, month, 1)
+        last = datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+        def on_loaded(counts):
+            self.month_counts[key] = dict(counts)
+            month, year = self.calendar.get_displayed_month()
+            if (year, month) == key:
+                self._shade(key)
+
+        # Keyed per month, so a month that is still queued is not queued again
+        self.app.db_worker.submit(database_operations.daily_counts_db, first.isoformat(), last.isoformat(),
+                                  on_success=on_loaded, key=f"date-picker-{year}-{month:02d}")
+
+    def _shade(self, key):
+        year, month = key
+        counts = self.month_counts[key]
+        busiest = max(counts.values(), default=0)
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            date = datetime.date(year, month, day)
+            iso = date.isoformat()
+            event_id = self.events.pop(iso, None)
+            if event_id is not None:
+                self.calendar.calevent_remove(event_id)
+            count = counts.get(iso, 0)
+            if count:
+                level = min(len(HEAT_COLORS) - 1, (count * len(HEAT_COLORS) - 1) // busiest)
+                self.events[iso] = self.calendar.calevent_create(date, f"{count:,} reservations", f"heat{level}")
+        total = sum(counts.values())
+        self.legend.configure(text=f"{total:,} reservations this month, busiest day {busiest:,}" if total else
+                              "No reservations this month yet")
+
+def _add_months(key, offset):
+    year, month = key
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+def get_date_picker(app_instance):
+    """Returns the app's date picker, building it on first use."""
+    picker = getattr(app_instance, "date_picker", None)
+    if picker is None or not picker.top.winfo_exists():
+        picker = app_instance.date_picker = DatePicker(app_instance)
+    return picker
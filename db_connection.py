@@ -0,0 +1,122 @@
+import atexit
+import sqlite3
+import threading
+
+DB_PATH = 'flights.db'
+
+# Default connection settings. They can be changed with configure() before the
+# first connection is opened (or followed by close_all() to reopen with them).
+DEFAULT_SETTINGS = {
+    "busy_timeout": 5000,       # milliseconds to wait on a locked database
+    "mmap_size": 268435456,     # bytes of the file mapped into memory (256 MB)
+    "cache_size": -65536,       # negative = KiB of page cache (64 MB)
+    "synchronous": "NORMAL",    # NORMAL is safe with WAL and much cheaper than FULL
+    "cached_statements": 256,   # size of the per-connection prepared statement cache
+    "journal_size_limit": 67108864, # bytes the WAL file is truncated to when a checkpoint restarts it (64 MB)
+}
+
+_VALID_SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+class ConnectionManager:
+    """Keeps one long-lived, tuned SQLite connection per thread for a database file."""
+
+    def __init__(self, db_path=DB_PATH, **settings):
+        self.db_path = db_path
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings.update(settings)
+        self._validate(self.settings)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._open_hooks = [] # Callables run on every newly opened connection
+
+    @staticmethod
+    def _validate(settings):
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown connection setting(s): {', '.join(sorted(unknown))}")
+        if str(settings["synchronous"]).upper() not in _VALID_SYNCHRONOUS:
+            raise ValueError(f"synchronous must be one of {', '.join(_VALID_SYNCHRONOUS)}")
+
+    def configure(self, **settings):
+        """Updates connection settings; already open connections are closed so they reopen with them."""
+        new_settings = dict(self.settings)
+        new_settings.update(settings)
+        self._validate(new_settings)
+        self.settings = new_settings
+        self.close_all()
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path,
+                               timeout=self.settings["busy_timeout"] / 1000.0,
+                               cached_statements=self.settings["cached_statements"])
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.settings["busy_timeout"])}')
+        conn.execute(f'PRAGMA mmap_size={int(self.settings["mmap_size"])}')
+        conn.execute(f'PRAGMA cache_size={int(self.settings["cache_size"])}')
+        conn.execute(f'PRAGMA synchronous={str(self.settings["synchronous"]).upper()}')
+        conn.execute(f'PRAGMA journal_size_limit={int(self.settings["journal_size_limit"])}')
+        for hook in self._open_hooks:
+            hook(conn)
+        return conn
+
+    def add_open_hook(self, hook):
+        """Registers hook(conn) to run on each connection opened from now on (e.g. to install a trace callback)."""
+        self._open_hooks.append(hook)
+
+    def get_connection(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self):
+        """Closes every connection opened by this manager (e.g. on shutdown)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Connections owned by other threads can only be closed by them;
+                # they are dropped here and reopened on that thread's next use.
+                pass
+        self._local = threading.local()
+
+
+_default_manager = ConnectionManager()
+atexit.register(_default_manager.close_all)
+
+
+def get_manager():
+    """Returns the process-wide connection manager used by database_operations."""
+    return _default_manager
+
+
+def get_connection():
+    """Returns the calling thread's pooled connection to the default database."""
+    return _default_manager.get_connection()
+
+
+def add_open_hook(hook):
+    """Registers hook(conn) on the default manager."""
+    _default_manager.add_open_hook(hook)
+
+
+def configure(db_path=None, **settings):
+    """Changes the default database path and/or connection settings."""
+    if db_path is not None and db_path != _default_manager.db_path:
+        _default_manager.close_all()
+        _default_manager.db_path = db_path
+    if settings:
+        _default_manager.configure(**settings)
+
+
+def close_all():
+    """Closes all pooled connections of the default manager."""
+    _default_manager.close_all()
@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+
+import database_operations # Import database functions
+import db_connection # Pooled, long-lived connections
+import perf_stats # Queue wait timings
+
+POLL_INTERVAL_MS = 20
+IDLE_CHECKPOINT_SEC = 2.0 # Idle time after a request before the worker checkpoints the WAL
+CHECKPOINT_WAIT_MS = 200 # How long an idle checkpoint waits for other desks' readers and writers
+
+
+class DatabaseRequest:
+    """A database call queued on the DatabaseWorker."""
+
+    def __init__(self, func, args, kwargs, on_success, on_error, key):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_success = on_success
+        self.on_error = on_error
+        self.key = key
+        self.cancelled = False
+        self.submitted = time.perf_counter()
+
+
+class DatabaseWorker:
+    """
+    Runs database calls on a dedicated background thread so the Tk mainloop never waits on SQLite.
+    Results are passed back through a queue that the Tk thread polls with root.after, and the
+    callbacks run on the Tk thread. Requests submitted with a key replace any pending request with
+    the same key, which is how outdated loads and searches are dropped.
+    """
+
+    def __init__(self, root, on_busy_change=None, poll_interval=POLL_INTERVAL_MS, name="db-worker",
+                 checkpoint_idle=None):
+        """
+        :param root: The Tk root window used for polling.
+        :param on_busy_change: Optional callable receiving True when work starts and False when the queue drains.
+        :param name: Thread name, also used to label the worker's performance stats.
+        :param checkpoint_idle: Seconds without requests after which the worker runs a TRUNCATE checkpoint,
+                                so the WAL cannot keep growing; None never checkpoints.
+        """
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self.poll_interval = poll_interval
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._keyed = {} # key -> latest request submitted with that key
+        self._current = None
+        self._current_conn = None
+        self._running = True
+        self._checkpoint_idle = checkpoint_idle
+        self._checkpoint_due = False # A request ran since the last checkpoint
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, func, *args, on_success=None, on_error=None, key=None, **kwargs):
+        """
+        Queues func(*args, **kwargs) on the worker thread.
+        :param on_success: Called on the Tk thread with the return value.
+        :param on_error: Called on the Tk thread with the exception if func raised.
+        :param key: Optional request key; a pending request with the same key is cancelled.
+        :return: The DatabaseRequest, which can be passed to cancel().
+        """
+        request = DatabaseRequest(func, args, kwargs, on_success, on_error, key)
+        with self._lock:
+            if key is not None:
+                previous = self._keyed.get(key)
+                if previous is not None:
+                    self._cancel_locked(previous)
+                self._keyed[key] = request
+            self._pending += 1
+            became_busy = self._pending == 1
+        if became_busy and self.on_busy_change:
+            self.on_busy_change(True)
+        self._requests.put(request)
+        return request
+
+    def cancel(self, request_or_key):
+        """Cancels a request (or the pending request with the given key); its callbacks will not run."""
+        with self._lock:
+            if isinstance(request_or_key, DatabaseRequest):
+                request = request_or_key
+            else:
+                request = self._keyed.get(request_or_key)
+            if request is not None:
+                self._cancel_locked(request)
+
+    def _cancel_locked(self, request):
+        request.cancelled = True
+        if self._keyed.get(request.key) is request:
+            del self._keyed[request.key]
+        if request is self._current and self._current_conn is not None:
+            # Abort the statement that is running right now; safe to call from another thread
+            self._current_conn.interrupt()
+
+    def shutdown(self):
+        """Stops the worker thread after the queued requests and stops polling."""
+        self._running = False
+        self._requests.put(None)
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def post(self, callback):
+        """Runs callback() on the Tk thread at the next poll; safe to call from the worker, e.g. for progress."""
+        self._results.put((None, callback, None))
+
+    def _report_error(self, title, message):
+        """Error handler for database_operations on the worker thread: shows the message on the Tk thread."""
+        request = self._current
+        if request is not None and request.cancelled:
+            return # Errors of cancelled requests (e.g. 'interrupted') are expected
+        self.post(lambda: database_operations.report_error(title, message))
+
+    def _run(self):
+        database_operations.set_error_handler(self._report_error)
+        while True:
+            try:
+                request = self._requests.get(timeout=self._checkpoint_idle if self._checkpoint_due else None)
+            except queue.Empty:
+                self._checkpoint_due = False
+                database_operations.checkpoint_db("TRUNCATE", CHECKPOINT_WAIT_MS)
+                continue
+            if request is None:
+                break
+            with self._lock:
+                if request.cancelled:
+                    self._results.put((request, None, None))
+                    continue
+                self._current = request
+                self._current_conn = db_connection.get_connection()
+            perf_stats.record(f"worker.{self._thread.name}.queue_wait", time.perf_counter() - request.submitted)
+            try:
+                result, error = request.func(*request.args, **request.kwargs), None
+            except Exception as e: # Handed to on_error on the Tk thread
+                result, error = None, e
+            with self._lock:
+                self._current = None
+                self._current_conn = None
+            self._checkpoint_due = self._checkpoint_idle is not None
+            self._results.put((request, result, error))
+
+    def _poll(self):
+        while True:
+            try:
+                request, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                result() # A callback posted from the worker thread, e.g. an error dialog
+                continue
+            self._finish(request, result, error)
+        if self._running:
+            self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def _finish(self, request, result, error):
+        with self._lock:
+            if self._keyed.get(request.key) is request:
+                del self._keyed[request.key]
+            self._pending -= 1
+            became_idle = self._pending == 0
+        if not request.cancelled:
+            if error is not None:
+                if request.on_error:
+                    request.on_error(error)
+                else:
+                    database_operations.report_error("Database Error", str(error))
+            elif request.on_success:
+                request.on_success(result)
+        if became_idle and self.on_busy_change:
+            self.on_busy_change(False)
@@ -0,0 +1,134 @@
+import tkinter as tk
+from tkinter import ttk
+from tkinter import filedialog
+from tkinter import messagebox
+import database_operations
+import perf_stats # In-memory latency histograms
+
+REFRESH_MS = 1000
+COLUMNS = ("Metric", "Count", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Total ms")
+
+def _fmt(value):
+    return "" if value is None else f"{value:,.3f}"
+
+def toggle_debug_panel(app_instance):
+    """Shows the hidden performance stats panel, or hides it again if it is open."""
+    panel = getattr(app_instance, "debug_panel", None)
+    if panel is not None and panel.winfo_exists():
+        if panel.state() != "withdrawn":
+            panel.withdraw()
+        else:
+            panel.deiconify()
+            _refresh(app_instance)
+        return
+
+    panel = tk.Toplevel(app_instance.root)
+    panel.title("Performance Stats")
+    panel.geometry("900x520")
+    panel.protocol("WM_DELETE_WINDOW", panel.withdraw) # Closing only hides it, keeping the selection
+    app_instance.debug_panel = panel
+
+    toolbar = ttk.Frame(panel, padding="8 8 8 0")
+    toolbar.pack(fill="x")
+    app_instance.debug_recording = tk.BooleanVar(value=perf_stats.enabled())
+    ttk.Checkbutton(toolbar, text="Recording", variable=app_instance.debug_recording,
+                    command=lambda: perf_stats.enable(app_instance.debug_recording.get())).pack(side="left")
+    ttk.Button(toolbar, text="Reset", command=lambda: (perf_stats.reset(), database_operations.reset_contention_stats(),
+                                                       _refresh(app_instance))).pack(side="left", padx=5)
+    ttk.Button(toolbar, text="Dump JSON...", command=lambda: _dump(app_instance)).pack(side="left")
+    app_instance.debug_contention = ttk.Label(toolbar)
+    app_instance.debug_contention.pack(side="right")
+
+    panes = ttk.PanedWindow(panel, orient="vertical")
+    panes.pack(fill="both", expand=True, padx=8, pady=8)
+
+    table_frame = ttk.Frame(panes)
+    tree = ttk.Treeview(table_frame, columns=COLUMNS, show="headings", height=12)
+    for col in COLUMNS:
+        tree.heading(col, text=col, anchor="w")
+        tree.column(col, width=360 if col == "Metric" else 70, stretch=col == "Metric", anchor="w" if col == "Metric" else "e")
+    scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side="right", fill="y")
+    tree.pack(fill="both", expand=True)
+    tree.bind("<<TreeviewSelect>>", lambda e: _draw_histogram(app_instance))
+    panes.add(table_frame, weight=3)
+
+    canvas = tk.Canvas(panes, height=150, background="white", highlightthickness=0)
+    canvas.bind("<Configure>", lambda e: _draw_histogram(app_instance))
+    panes.add(canvas, weight=1)
+
+    app_instance.debug_tree = tree
+    app_instance.debug_canvas = canvas
+    app_instance.debug_snapshot = {}
+    app_instance.debug_after_id = None
+    _refresh(app_instance)
+
+def _refresh(app_instance):
+    """Reloads the table from perf_stats, and keeps doing so once a second while the panel is visible."""
+    panel = app_instance.debug_panel
+    if app_instance.debug_after_id is not None:
+        panel.after_cancel(app_instance.debug_after_id)
+        app_instance.debug_after_id = None
+    if not panel.winfo_exists() or panel.state() == "withdrawn":
+        return
+    contention = database_operations.contention_stats()
+    app_instance.debug_contention.configure(
+        text=f"Writes {contention['write_transactions']:,}  waited {contention['lock_waits']:,}  "
+             f"retries {contention['retries']:,}  "
+             f"lock errors {contention['lock_errors']:,}  conflicts {contention['conflicts']:,}  "
+             f"lock wait {contention['lock_wait_ms']:,.1f} ms")
+    tree = app_instance.debug_tree
+    snapshot = perf_stats.snapshot()
+    app_instance.debug_snapshot = snapshot
+    for iid in tree.get_children():
+        if iid not in snapshot:
+            tree.delete(iid)
+    for index, (name, stats) in enumerate(snapshot.items()):
+        values = (name, f"{stats['count']:,}", _fmt(stats["mean_ms"]), _fmt(stats["p50_ms"]), _fmt(stats["p95_ms"]),
+                  _fmt(stats["p99_ms"]), _fmt(stats["max_ms"]), _fmt(stats["total_ms"]))
+        if tree.exists(name):
+            tree.item(name, values=values)
+        else:
+            tree.insert("", index, iid=name, values=values)
+    _draw_histogram(app_instance)
+    app_instance.debug_after_id = panel.after(REFRESH_MS, lambda: _refresh(app_instance))
+
+def _draw_histogram(app_instance):
+    """Draws the bucket counts of the selected metric as a bar chart."""
+    canvas = app_instance.debug_canvas
+    canvas.delete("all")
+    selection = app_instance.debug_tree.selection()
+    stats = app_instance.debug_snapshot.get(selection[0]) if selection else None
+    if not stats:
+        canvas.create_text(10, 10, anchor="nw", text="Select a metric to see its latency histogram", fill="#666666")
+        return
+
+    counts = [stats["buckets"].get("le_%g" % bound, 0) for bound in perf_stats.BUCKET_BOUNDS_MS]
+    counts.append(stats["buckets"].get("overflow", 0))
+    used = [index for index, count in enumerate(counts) if count]
+    first, last = max(0, used[0] - 1), min(len(counts) - 1, used[-1] + 1)
+
+    width, height = canvas.winfo_width(), canvas.winfo_height()
+    bar_width = max(1, (width - 20) / (last - first + 1))
+    peak = max(counts)
+    for slot, index in enumerate(range(first, last + 1)):
+        x = 10 + slot * bar_width
+        bar_height = (height - 40) * counts[index] / peak
+        canvas.create_rectangle(x + 2, height - 20 - bar_height, x + bar_width - 2, height - 20, fill="#007bff", outline="")
+        label = "%g" % perf_stats.BUCKET_BOUNDS_MS[index] if index < len(perf_stats.BUCKET_BOUNDS_MS) else "more"
+        canvas.create_text(x + bar_width / 2, height - 10, text=label, font=("Inter", 7), fill="#333333")
+        if counts[index]:
+            canvas.create_text(x + bar_width / 2, height - 24 - bar_height, text=str(counts[index]),
+                               anchor="s", font=("Inter", 7), fill="#333333")
+    canvas.create_text(10, 4, anchor="nw", text=f"{selection[0]} (ms, upper bucket bounds)", fill="#333333")
+
+def _dump(app_instance):
+    path = filedialog.asksaveasfilename(parent=app_instance.debug_panel, title="Dump Performance Stats",
+                                        defaultextension=".json", filetypes=[("JSON", "*.json")])
+    if not path:
+        return
+    try:
+        perf_stats.dump(path)
+    except OSError as e:
+        messagebox.showerror("Dump Failed", f"Could not write {path}: {e}", parent=app_instance.debug_panel)
@@ -1,11 +1,24 @@
 import tkinter as tk
 from tkinter import ttk
 
+import database_operations
+
+DASHBOARD_TOP_ROUTES = 5
+DASHBOARD_UPCOMING_DAYS = 7
+LOAD_CHART_HEIGHT = 70
+
 def show_home_ui(app_instance):
-    """Displays the home page UI."""
+    """Displays the home page UI, building it on the first visit only; the dashboard is reloaded on every visit."""
     app_instance.clear_content_area()
+    if app_instance.show_page("home"):
+        refresh_dashboard(app_instance)
+        return
+
+    page = ttk.Frame(app_instance.content_area, style="TFrame")
+    page.pack(fill="both", expand=True)
+    app_instance.pages["home"] = page
 
-    welcome_frame = ttk.Frame(app_instance.content_area, style="TFrame")
+    welcome_frame = ttk.Frame(page, style="TFrame")
     welcome_frame.pack(pady=(30, 20))
 
     welcome_label = ttk.Label(welcome_frame, text="Welcome to FlySky Reservations", style="Title.TLabel")
@@ -15,7 +28,7 @@ def show_home_ui(app_instance):
     subtitle_label = ttk.Label(welcome_frame, text=subtitle_text, style="Subtitle.TLabel", wraplength=600)
     subtitle_label.pack()
 
-    cards_frame = ttk.Frame(app_instance.content_area, style="TFrame")
+    cards_frame = ttk.Frame(page, style="TFrame")
     cards_frame.pack(pady=30)
 
     # Book a Flight Card
@@ -37,3 +50,62 @@ def show_home_ui(app_instance):
     view_reservations_desc = "Manage your existing reservations, view details, edit or cancel if needed."
     ttk.Label(view_reservations_card, text=view_reservations_desc, style="CardDesc.TLabel", wraplength=200).pack(pady=(0, 15))
     ttk.Button(view_reservations_card, text="View Reservations", style="Primary.TButton", command=app_instance.show_view_reservations).pack()
+
+    _build_dashboard(app_instance, page)
+    refresh_dashboard(app_instance)
+
+def _build_dashboard(app_instance, page):
+    """Builds the statistics section under the cards; its values are filled in by refresh_dashboard."""
+    dashboard = ttk.Frame(page, style="Card.TFrame", padding="20 15 20 15")
+    dashboard.pack(fill="x", padx=40, pady=(0, 20))
+    for column in range(3):
+        dashboard.columnconfigure(column, weight=1, uniform="dashboard")
+
+    totals = ttk.Label(dashboard, text="Loading statistics...", style="CardTitle.TLabel")
+    totals.grid(row=0, column=0, columnspan=3, sticky="w", pady=(0, 10))
+
+    ttk.Label(dashboard, text="Busiest routes", style="CardDesc.TLabel", font=("Inter", 9, "bold")).grid(row=1, column=0, sticky="w")
+    ttk.Label(dashboard, text="Coming days", style="CardDesc.TLabel", font=("Inter", 9, "bold")).grid(row=1, column=1, sticky="w")
+    ttk.Label(dashboard, text="Flights by load factor", style="CardDesc.TLabel", font=("Inter", 9, "bold")).grid(row=1, column=2, sticky="w")
+
+    routes = ttk.Label(dashboard, text="", style="CardDesc.TLabel", justify="left")
+    routes.grid(row=2, column=0, sticky="nw")
+    dates = ttk.Label(dashboard, text="", style="CardDesc.TLabel", justify="left")
+    dates.grid(row=2, column=1, sticky="nw")
+    load_chart = tk.Canvas(dashboard, height=LOAD_CHART_HEIGHT, width=220, background="white", highlightthickness=0)
+    load_chart.grid(row=2, column=2, sticky="nw")
+
+    app_instance.dashboard_widgets = {"totals": totals, "routes": routes, "dates": dates, "load_chart": load_chart}
+
+def refresh_dashboard(app_instance):
+    """
+    Reloads the dashboard from the summary tables in the background. Only a few aggregate rows are read,
+    so this is as cheap with millions of reservations as with a handful.
+    """
+    if not getattr(app_instance, "database_ready", False):
+        return # Called again once init_db has created the summary tables
+    app_instance.db_worker.submit(database_operations.dashboard_stats_db, None, DASHBOARD_TOP_ROUTES,
+                                  DASHBOARD_UPCOMING_DAYS, on_success=lambda stats: _render_dashboard(app_instance, stats),
+                                  key="dashboard")
+
+def _render_dashboard(app_instance, stats):
+    widgets = getattr(app_instance, "dashboard_widgets", None)
+    if not stats or widgets is None:
+        return
+    widgets["totals"].configure(text=f"{stats['reservations']:,} reservations on {stats['flights']:,} flights")
+    widgets["routes"].configure(text="\n".join(f"{departure} → {destination}: {count:,}"
+                                               for departure, destination, count in stats["top_routes"]) or "No bookings yet")
+    widgets["dates"].configure(text="\n".join(f"{date}: {count:,}" for date, count in stats["upcoming_dates"])
+                               or "No upcoming bookings")
+
+    chart = widgets["load_chart"]
+    chart.delete("all")
+    loads = stats["load_factors"]
+    peak = max((flights for _, flights in loads), default=0) or 1
+    bar_width = int(chart["width"]) / len(loads)
+    for index, (label, flights) in enumerate(loads):
+        x = index * bar_width
+        bar_height = (LOAD_CHART_HEIGHT - 16) * flights / peak
+        chart.create_rectangle(x + 2, LOAD_CHART_HEIGHT - 14 - bar_height, x + bar_width - 2, LOAD_CHART_HEIGHT - 14,
+                               fill="#007bff", outline="")
+        chart.create_text(x + bar_width / 2, LOAD_CHART_HEIGHT - 6, text=label.rstrip("%+"), font=("Inter", 7), fill="#666666")
@@ -0,0 +1,491 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import signal
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import benchmark # Shared percentile summary, error counter and run metadata
+import database_operations # Import database functions
+import db_connection # Pooled, long-lived connections
+import db_worker # How long idle checkpoints wait for other desks
+import perf_stats # Log-scale histograms for whole-run totals
+import reservation_cache # Write-through cache the booking form goes through
+import synthetic_data # Deterministic reservation generator
+
+DEFAULT_SIZE = "10k"
+DEFAULT_AGENTS = 8
+DEFAULT_DURATION = 30.0
+DEFAULT_INTERVAL = 5.0
+DEFAULT_MIX = "book=15,edit=10,delete=5,search=30,list=40"
+DEFAULT_MAX_LATENCY_DRIFT = 1.5 # Recent p99 over baseline p99
+DEFAULT_MAX_RSS_GROWTH_MB = 64.0
+DEFAULT_MAX_WAL_GROWTH_MB = 64.0 # The journal_size_limit; a WAL that keeps growing means checkpoints never restart it
+OPERATIONS = ("book", "edit", "delete", "search", "list")
+FLIGHT_PREFIX = "LT" # Flights booked by agents, e.g. LT003000017: easy to find and remove, and their seats are free
+START_DELAY = 1.0 # Seconds for the worker processes to start before the agents begin together
+CHECKPOINT_INTERVAL = 1.0 # Seconds between the first worker's WAL checkpoints
+DONE = "done"
+
+
+def parse_mix(text):
+    """Parses 'book=15,edit=10,...' into {operation: weight}; operations left out are not run."""
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        operation, _, weight = part.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {operation!r} (choose from {', '.join(OPERATIONS)})")
+        try:
+            mix[operation] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for {operation}: {weight!r}")
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one operation with a positive weight")
+    return mix
+
+
+def rss_mb():
+    """Current resident memory of this process in MB, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576.0
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0 # Peak rather than current, in KB on Linux
+    except ImportError:
+        return None
+
+
+class AgentErrors(benchmark.ErrorCounter):
+    """Counts database errors like benchmark.ErrorCounter, except version conflicts: contention_stats counts those."""
+
+    def __call__(self, title, message):
+        if title != "Update Conflict":
+            super().__call__(title, message)
+
+
+class WindowStats:
+    """Latencies and errors of the current reporting window, shared by the agent threads of a worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+        self._last_error = None
+
+    def add(self, operation, latency, errors, message=None):
+        with self._lock:
+            self._latencies.setdefault(operation, []).append(latency)
+            if errors:
+                self._errors[operation] = self._errors.get(operation, 0) + errors
+                self._last_error = message
+
+    def take(self):
+        """Returns (latencies, errors, last error message) collected so far and starts a new window."""
+        with self._lock:
+            taken = (self._latencies, self._errors, self._last_error)
+            self._latencies, self._errors, self._last_error = {}, {}, None
+        return taken
+
+
+def agent_loop(agent_number, settings, stop, window):
+    """
+    One booking agent: runs the operation mix through the same entry points as the app until stopped.
+    Bookings go through the reservation cache like the booking form; edits read the row version first
+    and save against it like action_handlers; searches and listings load the first page like the
+    reservations view, and their rows are what the agent edits next.
+    """
+    rng = random.Random(settings["seed"] * 1000 + agent_number)
+    errors = AgentErrors()
+    database_operations.set_error_handler(errors)
+    cache = reservation_cache.get_cache()
+    operations, weights = zip(*settings["mix"].items())
+    think = settings["think_ms"] / 1000.0
+    own = [] # Ids of the reservations this agent booked and may delete
+    seen = [] # Ids of the reservations shown by the agent's last listing or search
+    booked = 0
+    while not stop.is_set():
+        operation = rng.choices(operations, weights)[0]
+        if operation == "delete" and not own:
+            operation = "book"
+        if operation == "edit" and not (seen or own):
+            operation = "list"
+        started = time.perf_counter()
+        try:
+            if operation == "book":
+                booked += 1
+                flight_number = f"{FLIGHT_PREFIX}{agent_number:03d}{booked:06d}"
+                reservation = next(synthetic_data.generate_reservations(
+                    1, seed=settings["seed"], start=rng.randrange(1000000)))._replace(flight_number=flight_number)
+                reservation_id = cache.insert_reservation(reservation)
+                if reservation_id:
+                    own.append(reservation_id)
+            elif operation == "edit":
+                reservation_id = rng.choice(seen or own)
+                result = database_operations.get_reservation_version_db(reservation_id)
+                if result is not None: # None: someone else deleted it since it was shown
+                    current, version = result
+                    # Move to a free seat like the booking form suggests; a full flight keeps its seat
+                    seat = database_operations.next_free_seat_db(current.flight_number, current.date)
+                    cache.update_reservation(reservation_id, current._replace(seat_number=seat or current.seat_number),
+                                             version)
+            elif operation == "delete":
+                cache.delete_reservation(own.pop(rng.randrange(len(own))))
+            elif operation == "search":
+                text = rng.choice(synthetic_data.FIRST_NAMES + synthetic_data.CITIES)[:rng.randint(2, 6)]
+                rows = database_operations.search_reservation_rows_db(text)
+                database_operations.count_search_matches_db(text)
+                seen = [cursor[-1] for cursor, _ in rows]
+            else:
+                database_operations.count_reservations_db()
+                rows = database_operations.query_reservation_rows_db(
+                    None, rng.choice(tuple(database_operations.SORT_COLUMNS)), rng.random() < 0.5)
+                seen = [cursor[-1] for cursor, _ in rows]
+        except Exception as e: # Anything the data layer let through counts as an error; the agent carries on
+            errors(type(e).__name__, str(e))
+        window.add(operation, time.perf_counter() - started, errors.take(), errors.last)
+        if think:
+            stop.wait(rng.expovariate(1.0 / think))
+
+
+def checkpoint_loop(stop):
+    database_operations.set_error_handler(lambda title, message: None) # A failed checkpoint is retried next time
+    while not stop.wait(CHECKPOINT_INTERVAL):
+        database_operations.checkpoint_db("TRUNCATE", db_worker.CHECKPOINT_WAIT_MS)
+
+
+def run_worker(worker_number, agent_numbers, db_path, settings, start_at, stop, reports):
+    """
+    A worker process running some of the agents as threads. Every interval it sends the window's
+    latencies and errors, the change in its write contention counters and its memory use. Every worker
+    ends the run itself at the deadline, so the last window is the same for all of them.
+    The first worker also checkpoints the WAL every CHECKPOINT_INTERVAL, standing in for the
+    checkpoints the app's database worker runs when idle, which agents at full load never are.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # The coordinator stops the run
+    db_connection.configure(db_path=db_path)
+    window = WindowStats()
+    time.sleep(max(0.0, start_at - time.time()))
+    threads = [threading.Thread(target=agent_loop, args=(number, settings, stop, window), daemon=True)
+               for number in agent_numbers]
+    if worker_number == 0:
+        threads.append(threading.Thread(target=checkpoint_loop, args=(stop,), daemon=True))
+    for thread in threads:
+        thread.start()
+    contention = database_operations.contention_stats()
+    index = 0
+    window_start = start_at
+    deadline = start_at + settings["duration"] if settings["duration"] else None
+    while True:
+        window_end = start_at + (index + 1) * settings["interval"]
+        if deadline is not None:
+            window_end = min(window_end, deadline)
+        stopped = stop.wait(max(0.0, window_end - time.time())) or (deadline is not None and time.time() >= deadline)
+        if stopped:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        latencies, errors, last_error = window.take()
+        now = database_operations.contention_stats()
+        reports.put({"worker": worker_number, "window": index, "started": window_start, "ended": time.time(),
+                     "latencies": latencies, "errors": errors, "last_error": last_error, "rss_mb": rss_mb(),
+                     "contention": {key: now[key] - contention[key] for key in now}})
+        if stopped:
+            break
+        contention = now
+        index += 1
+        window_start = start_at + index * settings["interval"]
+    db_connection.close_all()
+    reports.put({"worker": worker_number, "window": DONE})
+
+
+def summarize_window(index, reports, start_at, db_path, totals):
+    """Merges the workers' reports of one window into a timeline entry and adds its latencies to the totals."""
+    latencies, errors, contention = [], 0, {}
+    for report in reports:
+        for operation, values in report["latencies"].items():
+            latencies.extend(values)
+            histogram = totals.setdefault(operation, [perf_stats.Histogram(), 0])[0]
+            for value in values:
+                histogram.add(value * 1000.0)
+        for operation, count in report["errors"].items():
+            totals.setdefault(operation, [perf_stats.Histogram(), 0])[1] += count
+            errors += count
+        for key, value in report["contention"].items():
+            contention[key] = contention.get(key, 0) + value
+    ended = max(report["ended"] for report in reports)
+    elapsed = ended - min(report["started"] for report in reports)
+    summary = benchmark.summarize("all", None, latencies, errors)
+    rss = [report["rss_mb"] for report in reports if report["rss_mb"] is not None]
+    wal_path = db_path + "-wal"
+    return {
+        "window": index,
+        "ended_sec": round(ended - start_at, 1),
+        "ops": len(latencies),
+        "throughput_ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": summary["p50_ms"],
+        "p99_ms": summary["p99_ms"],
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 5) if latencies else None,
+        "lock_waits": contention.get("lock_waits", 0),
+        "retries": contention.get("retries", 0),
+        "lock_errors": contention.get("lock_errors", 0),
+        "conflicts": contention.get("conflicts", 0),
+        "lock_wait_ms": round(contention.get("lock_wait_ms", 0.0), 1),
+        "rss_mb": round(sum(rss), 1) if rss else None,
+        "wal_mb": round(os.path.getsize(wal_path) / 1048576.0, 2) if os.path.exists(wal_path) else 0.0,
+        "last_error": next((report["last_error"] for report in reports if report["last_error"]), None),
+    }
+
+
+def drift(timeline, warmup_windows, limits):
+    """
+    Compares the first and the last quarter of the windows after warm-up by their medians: p99 latency,
+    total worker memory and WAL size. Warnings are only given once there are at least four such windows.
+    :param limits: The parsed arguments holding max_latency_drift, max_rss_growth_mb and max_wal_growth_mb.
+    """
+    windows = [window for window in timeline[warmup_windows:] if window["ops"]]
+    if not windows:
+        return {"windows": 0, "warnings": {}}
+    quarter = max(1, len(windows) // 4)
+    baseline, recent = windows[:quarter], windows[-quarter:]
+
+    def median(part, key):
+        values = [window[key] for window in part if window[key] is not None]
+        return round(statistics.median(values), 4) if values else None
+
+    result = {"windows": len(windows), "warnings": {}}
+    for key in ("p99_ms", "rss_mb", "wal_mb"):
+        result["baseline_" + key] = median(baseline, key)
+        result["recent_" + key] = median(recent, key)
+    result["p99_drift"] = round(result["recent_p99_ms"] / result["baseline_p99_ms"], 3) if result["baseline_p99_ms"] else None
+    if result["baseline_rss_mb"] is not None and result["recent_rss_mb"] is not None:
+        result["rss_growth_mb"] = round(result["recent_rss_mb"] - result["baseline_rss_mb"], 1)
+    else:
+        result["rss_growth_mb"] = None
+    result["wal_growth_mb"] = round(result["recent_wal_mb"] - result["baseline_wal_mb"], 2)
+    if len(windows) >= 4:
+        if result["p99_drift"] is not None and result["p99_drift"] > limits.max_latency_drift:
+            result["warnings"]["latency"] = (f"p99 latency drifted from {result['baseline_p99_ms']} ms to "
+                                             f"{result['recent_p99_ms']} ms (x{result['p99_drift']})")
+        if result["rss_growth_mb"] is not None and result["rss_growth_mb"] > limits.max_rss_growth_mb:
+            result["warnings"]["memory"] = f"worker memory grew by {result['rss_growth_mb']} MB"
+        if result["wal_growth_mb"] > limits.max_wal_growth_mb:
+            result["warnings"]["wal"] = f"the WAL file grew by {result['wal_growth_mb']} MB"
+    return result
+
+
+def operation_totals(totals, elapsed):
+    """Whole-run entry per operation; percentiles are bucket bounds of perf_stats histograms, so memory stays flat."""
+    results = []
+    for operation in sorted(totals):
+        histogram, errors = totals[operation]
+        summary = histogram.to_dict()
+        results.append({
+            "operation": operation,
+            "ops": summary["count"],
+            "errors": errors,
+            "error_rate": round(errors / summary["count"], 5) if summary["count"] else None,
+            "throughput_ops_per_sec": round(summary["count"] / elapsed, 1) if elapsed > 0 else None,
+            "mean_ms": summary["mean_ms"],
+            **{key: round(summary[key], 4) if summary[key] is not None else None
+               for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")},
+        })
+    return results
+
+
+def copy_database(source_path, target_path):
+    """
+    Copies a database with sqlite3's online backup API, from a single WAL snapshot, so a file the app
+    is using is copied consistently and agents' edits never reach it.
+    """
+    source, target = sqlite3.connect(source_path), sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def run(db_path, args, log):
+    """Starts the worker processes, collects their windows until the run ends and returns the report."""
+    settings = {"mix": args.mix, "seed": args.seed, "think_ms": args.think_ms, "interval": args.interval,
+                "duration": args.duration}
+    processes = min(args.processes or args.agents, args.agents)
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    reports = context.Queue()
+    start_at = time.time() + START_DELAY
+    workers = [context.Process(target=run_worker, args=(number, list(range(number, args.agents, processes)),
+                                                        db_path, settings, start_at, stop, reports))
+               for number in range(processes)]
+    for worker in workers:
+        worker.start()
+    log(f"{args.agents} agent(s) in {processes} process(es), "
+        + (f"{args.duration:g} s" if args.duration else "until interrupted") + "...")
+
+    pending = {} # window index -> reports received so far
+    timeline, totals, warned = [], {}, set()
+    done = 0
+    warmup_windows = int(args.warmup // args.interval)
+
+    def finish(index):
+        window = summarize_window(index, pending.pop(index), start_at, db_path, totals)
+        timeline.append(window)
+        log(f"[{window['ended_sec']:>7.1f} s] {window['throughput_ops_per_sec'] or 0:>8,.1f} ops/s  "
+            f"p50 {window['p50_ms'] or 0:.2f} ms  p99 {window['p99_ms'] or 0:.2f} ms  errors {window['errors']}  "
+            f"lock waits {window['lock_waits']}  retries {window['retries']}  rss {window['rss_mb']} MB")
+        if args.soak:
+            for kind, warning in drift(timeline, warmup_windows, args)["warnings"].items():
+                if kind not in warned: # Once per kind; the final report has the latest figures
+                    warned.add(kind)
+                    log(f"WARNING: {warning}")
+
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    previous_handler = signal.signal(signal.SIGTERM, interrupt) # Stopped like Ctrl+C, e.g. by a process manager
+    while done < len(workers):
+        try:
+            try:
+                report = reports.get(timeout=0.5)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break # Crashed workers never send DONE
+                continue
+            if report["window"] == DONE:
+                done += 1
+                continue
+            pending.setdefault(report["window"], []).append(report)
+            if len(pending[report["window"]]) == len(workers):
+                finish(report["window"])
+        except KeyboardInterrupt:
+            log("stopping...")
+            stop.set()
+    for index in sorted(pending): # Last windows cut short by the stop
+        finish(index)
+    for worker in workers:
+        worker.join()
+    signal.signal(signal.SIGTERM, previous_handler)
+
+    elapsed = timeline[-1]["ended_sec"] if timeline else 0.0
+    all_ops = sum(window["ops"] for window in timeline)
+    all_errors = sum(window["errors"] for window in timeline)
+    return {
+        "elapsed_sec": elapsed,
+        "ops": all_ops,
+        "throughput_ops_per_sec": round(all_ops / elapsed, 1) if elapsed > 0 else None,
+        "errors": all_errors,
+        "error_rate": round(all_errors / all_ops, 5) if all_ops else None,
+        "contention": {key: round(sum(window[key] for window in timeline), 1)
+                       for key in ("lock_waits", "retries", "lock_errors", "conflicts", "lock_wait_ms")},
+        "operations": operation_totals(totals, elapsed),
+        "drift": drift(timeline, warmup_windows, args),
+        "timeline": timeline,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulate concurrent booking agents against one database and report throughput, latency, "
+                    "lock waits and errors over time (no display needed).")
+    parser.add_argument("--agents", type=int, default=DEFAULT_AGENTS, help="concurrent agents (default: %(default)s)")
+    parser.add_argument("--processes", type=int,
+                        help="worker processes the agents are spread over, as threads (default: one per agent, "
+                             "like separate app instances; 1 runs every agent as a thread of one process)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="operation weights (default: %(default)s)")
+    parser.add_argument("--duration", type=float,
+                        help=f"seconds to run (default: {DEFAULT_DURATION:g}; with --soak until interrupted)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds per reporting window (default: %(default)s)")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="mean pause between an agent's operations (default: none, full load)")
+    parser.add_argument("--soak", action="store_true",
+                        help="sustained run that warns about latency drift, memory and WAL growth, and exits "
+                             "with status 1 if any of them exceeds its limit")
+    parser.add_argument("--warmup", type=float, help="seconds left out of the drift comparison (default: one interval)")
+    parser.add_argument("--max-latency-drift", type=float, default=DEFAULT_MAX_LATENCY_DRIFT,
+                        help="largest accepted ratio of recent to baseline p99 latency (default: %(default)s)")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=DEFAULT_MAX_RSS_GROWTH_MB,
+                        help="largest accepted growth of the workers' memory (default: %(default)s)")
+    parser.add_argument("--max-wal-growth-mb", type=float, default=DEFAULT_MAX_WAL_GROWTH_MB,
+                        help="largest accepted growth of the WAL file (default: %(default)s)")
+    parser.add_argument("--db", help="run against a temporary copy of this existing database instead of synthetic "
+                                     "rows; the file itself is only read")
+    parser.add_argument("--size", type=synthetic_data.parse_count, default=DEFAULT_SIZE,
+                        help="reservations loaded into the temporary database (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=synthetic_data.DEFAULT_SEED, help="random seed")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    if args.agents < 1 or (args.processes is not None and args.processes < 1):
+        parser.error("--agents and --processes must be at least 1")
+    if args.agents > 999:
+        parser.error("--agents is limited to 999") # Agent numbers are part of the booked flight numbers
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+    if args.duration is None:
+        args.duration = 0.0 if args.soak else DEFAULT_DURATION
+    if args.warmup is None:
+        args.warmup = args.interval
+    if args.db and not os.path.exists(args.db):
+        parser.error(f"database not found: {args.db}")
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    workdir = tempfile.mkdtemp(prefix="flysky-load-")
+    db_path = os.path.join(workdir, "load_test.db")
+    try:
+        if args.db:
+            log(f"copying {args.db}...")
+            copy_database(args.db, db_path)
+        db_connection.configure(db_path=db_path)
+        with contextlib.redirect_stdout(sys.stderr): # Keep stdout for the JSON report
+            database_operations.init_db()
+        if not args.db:
+            log(f"loading {args.size:,} rows...")
+            synthetic_data.load_reservations(args.size, seed=args.seed)
+            db_connection.get_connection().execute("ANALYZE")
+        db_connection.close_all() # Worker processes open their own connections
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    report = {"environment": benchmark.environment(), "seed": args.seed, "agents": args.agents,
+              "processes": min(args.processes or args.agents, args.agents), "mix": args.mix,
+              "think_ms": args.think_ms, "interval_sec": args.interval, "soak": args.soak,
+              "size": None if args.db else args.size}
+    try:
+        report.update(run(db_path, args, log))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        log(f"Report written to {args.output}")
+    else:
+        print(text)
+    for warning in report["drift"]["warnings"].values():
+        log(f"WARNING: {warning}")
+    return 1 if args.soak and report["drift"]["warnings"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
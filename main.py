@@ -1,14 +1,27 @@
+import time
+STARTED = time.perf_counter() # Process start as seen by the app, for the startup timings
+
+import datetime
+import json
+import os
 import tkinter as tk
 from tkinter import ttk
 from tkinter import font as tkFont
 from tkinter import messagebox
 
-# Import UI and database modules
+# Import the modules the first frame needs; booking_ui, date_picker (and tkcalendar), reservations_ui,
+# action_handlers and debug_panel are imported on first use in the methods below
 import database_operations
+import db_worker
+import perf_stats
+import reservation_cache
+from reservation_record import Reservation
 import home_ui
-import booking_ui
-import reservations_ui
-import action_handlers
+
+STARTUP_PROBE_ENV_VAR = "FLYSKY_STARTUP_PROBE" # Set by startup_benchmark: print startup timings as JSON and exit
+API_URL_ENV_VAR = "FLYSKY_API_URL" # Same as api_client.API_URL_ENV_VAR, kept here so api_client loads only when used
+ARCHIVE_AFTER_ENV_VAR = "FLYSKY_ARCHIVE_AFTER_DAYS" # Archive reservations this many days past their date in the background
+ARCHIVE_INTERVAL_MS = 6 * 60 * 60 * 1000 # How often the background archiving job runs while the app is open
 
 class FlySkyApp:
     def __init__(self, root):
@@ -20,31 +33,108 @@ class FlySkyApp:
         # Instance variables for UI elements that need to be accessed across modules
         self.reservations_tree = None # Will be set in reservations_ui
         self.search_entry = None # Will be set in reservations_ui
+        self.search_status = None # Match count label, set in reservations_ui
+        self.search_after_id = None # Pending debounced search
+        self.pages = {} # Pages built once and kept across navigation, by name ("home", "book", "reservations")
+        self.database_ready = False # Set once init_db has run on the worker
+        self.reservations_view = None # VirtualReservationList of the reservations page
         self.date_var = tk.StringVar() # For date picker
 
-        # State variable for editing mode
-        self.editing_flight_number = None
+        # State variables for editing mode
+        self.editing_reservation_id = None
+        self.editing_version = None # Row version read when the edit started, None until it is loaded
 
         # Configure a style for better aesthetics
         self.style = ttk.Style()
         self.style.theme_use('clam')
 
-        # Custom fonts (defined here as they are used across multiple UI modules)
+        # Only the fonts and styles of the home page and navigation bar are set up before the first
+        # frame; the rest follow when Tk is idle (or on first use, see ensure_styles)
+        self._styles_ready = False
+        self.configure_base_styles()
+
+        # With FLYSKY_API_URL set, the data layer talks to a shared api_server instead of the local file.
+        # This must happen before instrumenting, so the remote calls are the ones timed.
+        api_url = os.environ.get(API_URL_ENV_VAR)
+        if api_url:
+            import api_client
+            api_client.install(database_operations, api_url)
+
+        # Time every database call and SQL statement; the stats are shown in the hidden debug panel (F12)
+        perf_stats.instrument_module(database_operations, "db",
+                                     predicate=lambda name: name.endswith("_db") or name == "init_db")
+        perf_stats.enable()
+
+        # Database calls made from the UI run on this worker so the mainloop never blocks
+        self.db_worker = db_worker.DatabaseWorker(
+            self.root, on_busy_change=self.show_loading,
+            checkpoint_idle=None if api_url else db_worker.IDLE_CHECKPOINT_SEC) # The server checkpoints its own file
+        # Exports can run for minutes, so they get their own thread and connection
+        self.export_worker = db_worker.DatabaseWorker(self.root, name="export-worker")
+        self.create_widgets()
+
+        # The database is initialized in the background while the first frame is drawn. It is the
+        # worker's first request, so every later database request runs after it.
+        self.startup_times = {}
+        self.db_worker.submit(database_operations.init_db, on_success=self._on_database_ready)
+        self.root.after_idle(self._on_first_frame)
+
+    def _on_database_ready(self, _):
+        self.database_ready = True
+        self._startup_milestone("db_ready")
+        home_ui.refresh_dashboard(self) # The home page was drawn before its summary tables existed
+        self._run_archive_job()
+
+    def _run_archive_job(self):
+        """
+        With FLYSKY_ARCHIVE_AFTER_DAYS set, moves reservations that many days past their date into the
+        archive file on the export worker, in short batches, and repeats every ARCHIVE_INTERVAL_MS.
+        In remote mode the server's database is archived with `cli.py archive` instead.
+        """
+        setting = os.environ.get(ARCHIVE_AFTER_ENV_VAR)
+        if not setting or os.environ.get(API_URL_ENV_VAR):
+            return
+        try:
+            days = int(setting)
+        except ValueError:
+            print(f"Ignoring {ARCHIVE_AFTER_ENV_VAR}={setting!r}: expected a number of days")
+            return
+        cutoff = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+
+        def on_archived(moved):
+            if moved:
+                # Rows left the hot table behind the cache's and the view's back
+                reservation_cache.get_cache().clear()
+                if self.reservations_view is not None:
+                    self.reservations_view.refresh()
+                home_ui.refresh_dashboard(self)
+
+        self.export_worker.submit(database_operations.archive_reservations_db, cutoff, on_success=on_archived,
+                                  key="archive")
+        self.root.after(ARCHIVE_INTERVAL_MS, self._run_archive_job)
+
+    def _startup_milestone(self, name):
+        elapsed = time.perf_counter() - STARTED
+        self.startup_times[name] = elapsed
+        perf_stats.record(f"startup.{name}", elapsed)
+        if os.environ.get(STARTUP_PROBE_ENV_VAR) and {"first_frame", "db_ready"} <= set(self.startup_times):
+            print(json.dumps({name: round(seconds * 1000, 3) for name, seconds in self.startup_times.items()}), flush=True)
+            self.root.after_idle(self.root.destroy)
+
+    def _on_first_frame(self):
+        # Idle callbacks run after the pending layout and redraw, so the window has been drawn by now
+        self._startup_milestone("first_frame")
+        self.ensure_styles()
+
+    def configure_base_styles(self):
+        """Fonts and styles used by the navigation bar and the home page."""
         self.title_font = tkFont.Font(family="Inter", size=24, weight="bold")
         self.subtitle_font = tkFont.Font(family="Inter", size=10)
         self.nav_font = tkFont.Font(family="Inter", size=10, weight="bold")
         self.card_title_font = tkFont.Font(family="Inter", size=14, weight="bold")
         self.card_desc_font = tkFont.Font(family="Inter", size=9)
         self.button_font = tkFont.Font(family="Inter", size=10, weight="bold")
-        self.large_button_font = tkFont.Font(family="Inter", size=12, weight="bold")
-        self.no_reservations_title_font = tkFont.Font(family="Inter", size=16, weight="bold")
-        self.no_reservations_subtitle_font = tkFont.Font(family="Inter", size=10)
-        self.form_label_font = tkFont.Font(family="Inter", size=10, weight="bold")
-        self.entry_font = tkFont.Font(family="Inter", size=10)
-        self.table_header_font = tkFont.Font(family="Inter", size=10, weight="bold")
-        self.table_row_font = tkFont.Font(family="Inter", size=10)
 
-        # Apply styles (can be moved to a separate styling module if it grows larger)
         self.style.configure("TFrame", background="#f0f2f5")
         self.style.configure("Blue.TFrame", background="#007bff")
         self.style.configure("Title.TLabel", font=self.title_font, foreground="#333333", background="#f0f2f5")
@@ -66,6 +156,20 @@ class FlySkyApp:
         self.style.map("Primary.TButton",
                        background=[('active', '#0056b3')],
                        foreground=[('active', 'white')])
+
+    def ensure_styles(self):
+        """Sets up the fonts and styles of the other pages once; cheap to call again."""
+        if self._styles_ready:
+            return
+        self._styles_ready = True
+        self.large_button_font = tkFont.Font(family="Inter", size=12, weight="bold")
+        self.no_reservations_title_font = tkFont.Font(family="Inter", size=16, weight="bold")
+        self.no_reservations_subtitle_font = tkFont.Font(family="Inter", size=10)
+        self.form_label_font = tkFont.Font(family="Inter", size=10, weight="bold")
+        self.entry_font = tkFont.Font(family="Inter", size=10)
+        self.table_header_font = tkFont.Font(family="Inter", size=10, weight="bold")
+        self.table_row_font = tkFont.Font(family="Inter", size=10)
+
         self.style.configure("Secondary.TButton", font=self.button_font, foreground="#007bff", background="white",
                              relief="flat", borderwidth=1, padding=(10, 5))
         self.style.map("Secondary.TButton",
@@ -87,9 +191,6 @@ class FlySkyApp:
         self.style.configure("Treeview", font=self.table_row_font, rowheight=30)
         self.style.map("Treeview", background=[('selected', '#cceeff')], foreground=[('selected', 'black')])
 
-        database_operations.init_db() # Initialize the database
-        self.create_widgets()
-
     def create_widgets(self):
         main_frame = ttk.Frame(self.root, style="TFrame")
         main_frame.pack(fill="both", expand=True)
@@ -101,6 +202,9 @@ class FlySkyApp:
         logo_label = ttk.Label(nav_frame, text="✈️ FlySky Reservations", style="Nav.TLabel", font=("Inter", 14, "bold"))
         logo_label.pack(side="left", padx=20)
 
+        self.status_label = ttk.Label(nav_frame, text="", style="Nav.TLabel")
+        self.status_label.pack(side="left", padx=10)
+
         nav_buttons_frame = ttk.Frame(nav_frame, style="Blue.TFrame")
         nav_buttons_frame.pack(side="right", padx=10)
 
@@ -111,72 +215,146 @@ class FlySkyApp:
         self.content_area = ttk.Frame(main_frame, style="TFrame")
         self.content_area.pack(fill="both", expand=True, padx=20, pady=20)
 
+        self.root.bind("<F12>", lambda e: self.toggle_debug_panel())
+
         self.show_home()
 
     def clear_content_area(self):
-        for widget in self.content_area.winfo_children():
-            widget.destroy()
+        # Results of loads for the page being left are no longer needed
+        for key in ("view", "search", "edit"):
+            self.db_worker.cancel(key)
+        kept = set(self.pages.values())
+        with perf_stats.timer("screen.clear_content_area"):
+            for widget in self.content_area.winfo_children():
+                if widget in kept:
+                    widget.pack_forget() # Hidden, not destroyed; shown again by the next visit
+                else:
+                    widget.destroy()
+
+    def show_page(self, name):
+        """Packs the kept page `name` into the content area; returns False if it has not been built yet."""
+        page = self.pages.get(name)
+        if page is None or not page.winfo_exists():
+            self.pages.pop(name, None)
+            return False
+        page.pack(fill="both", expand=True)
+        return True
+
+    def _navigate(self, name, show, *args):
+        """Runs a page's show function, timing the build and the time until Tk is idle (layout and redraw done)."""
+        start = time.perf_counter()
+        with perf_stats.timer(f"screen.{show.__name__}"):
+            show(self, *args)
+        self.root.after_idle(lambda: perf_stats.record(f"navigation.{name}", time.perf_counter() - start))
+
+    def show_loading(self, busy):
+        """Shows or hides the loading indicator while database requests are running."""
+        self.status_label.configure(text="⏳ Loading..." if busy else "")
+        self.root.configure(cursor="watch" if busy else "")
 
     # --- UI Navigation Methods (calling functions from other modules) ---
     def show_home(self):
-        home_ui.show_home_ui(self)
+        self._navigate("home", home_ui.show_home_ui)
 
-    def show_book_flight(self, reservation_data=None):
-        booking_ui.show_book_flight_ui(self, reservation_data)
+    def show_book_flight(self, reservation_data=None, reservation_id=None):
+        import booking_ui
+        self.ensure_styles()
+        self._navigate("book", booking_ui.show_book_flight_ui, reservation_data, reservation_id)
 
     def show_view_reservations(self):
-        reservations_ui.show_view_reservations_ui(self)
+        import reservations_ui
+        self.ensure_styles()
+        self._navigate("reservations", reservations_ui.show_view_reservations_ui)
 
     # --- Booking Logic (calls database operations) ---
     def submit_booking(self, name, flight_number, departure, destination, date, seat_number):
-        if not all([name, flight_number, departure, destination, date, seat_number]) or date == "Pick a date":
+        import booking_ui
+        if not all([name, flight_number, departure, destination, date, seat_number]) or date == booking_ui.DATE_PLACEHOLDER:
             messagebox.showerror("Booking Error", "Please fill in all fields.")
             return
 
-        reservation_data = {
-            "Name": name,
-            "Flight Number": flight_number,
-            "Departure": departure,
-            "Destination": destination,
-            "Date": date,
-            "Seat": seat_number
-        }
-
-        if self.editing_flight_number is not None:
-            success = database_operations.update_reservation_db(self.editing_flight_number, reservation_data)
-            if success:
-                messagebox.showinfo("Reservation Updated",
-                                    f"Reservation for {name} on flight {flight_number} has been updated!")
+        reservation_data = Reservation(flight_number=flight_number, name=name, departure=departure,
+                                       destination=destination, date=date, seat_number=seat_number)
+
+        if self.editing_reservation_id is not None:
+            if self.editing_version is None:
+                messagebox.showerror("Booking Error", "The reservation is still loading. Please try again in a moment.")
+                return
+            reservation_id = self.editing_reservation_id
+
+            def on_saved(success):
+                if success:
+                    messagebox.showinfo("Reservation Updated",
+                                        f"Reservation for {name} on flight {flight_number} has been updated!")
+                # On failure (e.g. a conflict with another desk) this shows the row as it is now
+                self.refresh_reservation_rows(deleted=[reservation_id], changed=[reservation_id])
+                self.show_view_reservations()
+
+            self.db_worker.submit(reservation_cache.get_cache().update_reservation, reservation_id,
+                                  reservation_data, self.editing_version, on_success=on_saved)
         else:
-            success = database_operations.insert_reservation_db(reservation_data)
-            if success:
-                messagebox.showinfo("Booking Confirmed",
-                                    f"Booking for {name} on flight {flight_number} from {departure} to {destination} on {date} (Seat: {seat_number}) has been submitted!")
+            def on_saved(reservation_id):
+                if reservation_id:
+                    messagebox.showinfo("Booking Confirmed",
+                                        f"Booking for {name} on flight {flight_number} from {departure} to {destination} on {date} (Seat: {seat_number}) has been submitted!")
+                    self.refresh_reservation_rows(changed=[reservation_id])
+                self.show_view_reservations()
 
-        self.editing_flight_number = None
-        self.show_view_reservations()
+            self.db_worker.submit(reservation_cache.get_cache().insert_reservation, reservation_data, on_success=on_saved)
+
+        self.editing_reservation_id = None
+        self.editing_version = None
 
     # --- Action Handlers (delegated to action_handlers module) ---
     def edit_reservation(self, event):
+        import action_handlers
         action_handlers.edit_reservation_handler(self, event)
 
     def delete_reservation(self, event):
+        import action_handlers
         action_handlers.delete_reservation_handler(self, event)
 
+    def delete_selected_reservations(self):
+        import action_handlers
+        action_handlers.delete_selected_handler(self)
+
+    def edit_selected_reservations(self):
+        import action_handlers
+        action_handlers.edit_selected_handler(self)
+
     # --- Search Logic (delegated to reservations_ui module) ---
     def _search_reservations(self):
+        import reservations_ui
         reservations_ui.search_reservations(self)
 
     # --- Date Picker (delegated to booking_ui module) ---
     def open_date_picker(self, date_entry_var):
+        import booking_ui
         booking_ui.open_date_picker(self, date_entry_var)
 
     # --- Populate Treeview (delegated to reservations_ui module) ---
     def _populate_reservations_tree(self, reservations_list):
+        import reservations_ui
         reservations_ui.populate_reservations_tree(self, reservations_list)
 
+    # --- Incremental Treeview refresh (delegated to reservations_ui module) ---
+    def refresh_reservation_rows(self, deleted=(), changed=()):
+        import reservations_ui
+        reservations_ui.refresh_reservation_rows(self, deleted, changed)
+
+    # --- Export (delegated to reservations_ui module) ---
+    def export_reservations(self):
+        import reservations_ui
+        reservations_ui.export_reservations_ui(self)
+
+    # --- Performance stats (delegated to debug_panel module) ---
+    def toggle_debug_panel(self):
+        import debug_panel
+        debug_panel.toggle_debug_panel(self)
+
     # --- Table Click Handler (delegated to reservations_ui module) ---
     def handle_table_click(self, event):
+        import reservations_ui
         reservations_ui.handle_table_click(self, event)
 
 
@@ -0,0 +1,209 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+
+import db_connection # Pooled, long-lived connections
+
+# Histogram bucket upper bounds in milliseconds: 0.01 ms doubling up to ~84 s, then overflow
+BUCKET_BOUNDS_MS = tuple(0.01 * 2 ** i for i in range(24))
+
+DUMP_ENV_VAR = "FLYSKY_PERF_DUMP" # Path the stats are written to when the process exits
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {} # metric name -> Histogram
+_tracing = threading.local() # Per thread: timed() nesting depth and the statement being timed (metric name, start, sql)
+
+_SPACE_RE = re.compile(r"\s+")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class Histogram:
+    """Fixed log-scale latency histogram; cheap to update and to merge into a snapshot."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+
+    def add(self, ms):
+        index = 0
+        while index < len(BUCKET_BOUNDS_MS) and ms > BUCKET_BOUNDS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = ms if self.max_ms is None else max(self.max_ms, ms)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (capped at the largest value seen)."""
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 4) if self.count else None,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": {("le_%g" % bound if index < len(BUCKET_BOUNDS_MS) else "overflow"): count
+                        for index, (bound, count) in enumerate(zip(BUCKET_BOUNDS_MS + (None,), self.buckets))
+                        if count},
+        }
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """Turns recording on or off; instrumented code costs one flag check while it is off."""
+    global _enabled
+    _enabled = on
+
+
+def record(name, seconds):
+    """Adds one duration (in seconds) to the histogram called `name`."""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds * 1000.0)
+
+
+class timer:
+    """Context manager timing its block into the histogram `name`, e.g. `with perf_stats.timer("screen.home"):`."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timed(name):
+    """Decorator timing every call of the function into the histogram `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            _tracing.depth = getattr(_tracing, "depth", 0) + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _tracing.depth -= 1
+                _finish_statement()
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def instrument_module(module, prefix, predicate=None):
+    """
+    Wraps the module's public functions with timed(), in place, so callers going through the module
+    (including the module's own functions) are measured. Generator functions are left alone.
+    :param predicate: Optional callable(name) choosing which functions to wrap.
+    """
+    for name, func in list(vars(module).items()):
+        if name.startswith("_") or not inspect.isfunction(func) or func.__module__ != module.__name__:
+            continue
+        if inspect.isgeneratorfunction(func) or getattr(func, "__wrapped__", None) is not None:
+            continue
+        if predicate is None or predicate(name):
+            setattr(module, name, timed(f"{prefix}.{name}")(func))
+
+
+# --- Per-statement SQL timing ---
+# Python's sqlite3 has no profile callback, so a statement is timed from its trace callback
+# to the next statement on the same thread or the end of the enclosing timed() call.
+# Statements outside timed() calls (e.g. streaming exports) are not timed.
+def normalize_statement(sql):
+    """Collapses whitespace and replaces literals with '?', so one statement shape is one metric."""
+    return _LITERAL_RE.sub("?", _SPACE_RE.sub(" ", sql).strip())[:160]
+
+
+def _finish_statement():
+    current = getattr(_tracing, "statement", None)
+    if current is not None:
+        _tracing.statement = None
+        record(current[0], time.perf_counter() - current[1])
+
+
+def _trace(sql):
+    if not _enabled or not getattr(_tracing, "depth", 0):
+        return
+    if sql.startswith("--"):
+        return # Statements run by triggers and virtual tables belong to the statement that caused them
+    current = getattr(_tracing, "statement", None)
+    if current is not None and current[2] == sql:
+        return # Trigger programs are reported again with the SQL of their statement
+    now = time.perf_counter()
+    _finish_statement()
+    _tracing.statement = ("sql." + normalize_statement(sql), now, sql)
+
+
+def _install_trace(conn):
+    conn.set_trace_callback(_trace)
+
+
+db_connection.add_open_hook(_install_trace)
+
+
+# --- Snapshots ---
+def snapshot():
+    """Returns {metric name: summary dict} for every histogram recorded so far."""
+    with _lock:
+        return {name: histogram.to_dict() for name, histogram in sorted(_histograms.items())}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def dump(path):
+    """Writes the current snapshot to a JSON file."""
+    data = {"generated": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "bucket_bounds_ms": BUCKET_BOUNDS_MS,
+            "metrics": snapshot()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def _dump_at_exit():
+    path = os.environ.get(DUMP_ENV_VAR)
+    if path and _histograms:
+        dump(path)
+
+
+atexit.register(_dump_at_exit)
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import change_journal # Sequence-numbered log of changes to replay
+import db_connection # Default database path
+
+DEFAULT_INTERVAL = 0.0 # Seconds between syncs in watch mode; 0 syncs once and exits
+BUSY_TIMEOUT = 5.0
+
+
+def connect(path):
+    # Autocommit mode: transactions are begun and ended explicitly below
+    return sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+
+
+def _remove(path, suffixes=("", "-wal", "-shm", "-journal")):
+    for suffix in suffixes:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _report(mode, changes, position, started):
+    return {"mode": mode, "changes": changes, "position": position, "elapsed_sec": round(time.perf_counter() - started, 3)}
+
+
+def seed(source_path, replica_path):
+    """
+    Makes a fresh replica with sqlite3's online backup API, written next to the replica and moved into
+    place when complete. Copying in one step reads a single WAL snapshot of the source: writers are not
+    blocked meanwhile, and the copy never restarts because of them.
+    :return: The journal position the replica starts from.
+    """
+    temp_path = replica_path + ".seed"
+    _remove(temp_path)
+    source, target = connect(source_path), connect(temp_path)
+    try:
+        source.backup(target)
+        change_journal.drop_triggers(target) # The replica copies the source's journal entries instead
+        position = change_journal.position(target)
+    finally:
+        target.close()
+        source.close()
+    _remove(replica_path, ("-wal", "-shm", "-journal")) # Left by the replaced file; never to be applied to the new one
+    os.replace(temp_path, replica_path)
+    return position
+
+
+def sync(source_path, replica_path, page_size=change_journal.DEFAULT_PAGE_SIZE):
+    """
+    Brings the replica up to date: replays the journal entries after the replica's position, page by
+    page, in one replica transaction. The source is read from a single snapshot, so the replica ends
+    up exactly as the source was at some point in time. Seeds a new replica when there is none yet or
+    the entries it needs were pruned.
+    :return: A report: mode ("seed" or "incremental"), changes applied, position and elapsed seconds.
+    """
+    started = time.perf_counter()
+    if not os.path.exists(replica_path):
+        return _report("seed", 0, seed(source_path, replica_path), started)
+
+    source, replica = connect(source_path), connect(replica_path)
+    gap = False
+    applied = 0
+    try:
+        position = change_journal.position(replica)
+        source.execute("BEGIN") # Every page comes from the same snapshot of the source
+        replica.execute("BEGIN IMMEDIATE")
+        while True:
+            page = change_journal.changes_since(source, position, page_size)
+            if page["gap"] or not page["changes"]:
+                gap = page["gap"]
+                break
+            change_journal.apply_changes(replica, page["changes"])
+            applied += len(page["changes"])
+            position = page["next"]
+        replica.execute("ROLLBACK" if gap else "COMMIT")
+    finally:
+        if replica.in_transaction:
+            replica.execute("ROLLBACK")
+        replica.close()
+        source.close()
+    if gap:
+        return _report("seed", 0, seed(source_path, replica_path), started)
+    return _report("incremental", applied, position, started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Keep a replica of the reservations database up to date from its change journal.")
+    parser.add_argument("--db", default=db_connection.DB_PATH, help="source database (default: %(default)s)")
+    parser.add_argument("--replica", required=True, help="replica file; created with the backup API if missing")
+    parser.add_argument("--page-size", type=int, default=change_journal.DEFAULT_PAGE_SIZE,
+                        help="journal entries read per query (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="keep syncing every this many seconds (default: sync once)")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        parser.error(f"database not found: {args.db}")
+    if os.path.abspath(args.db) == os.path.abspath(args.replica):
+        parser.error("--replica must be a different file than --db")
+
+    try:
+        while True:
+            print(json.dumps(sync(args.db, args.replica, args.page_size)), flush=True)
+            if args.interval <= 0:
+                return 0
+            time.sleep(args.interval)
+    except sqlite3.Error as e:
+        # e.g. a database from before the change journal: opening it once with the app or cli.py adds it
+        print(json.dumps({"error": f"Replica sync failed: {e}"}), file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
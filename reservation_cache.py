@@ -0,0 +1,162 @@
+import threading
+from collections import OrderedDict
+
+import database_operations # Import database functions
+from reservation_record import as_reservation
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class ReservationCache:
+    """
+    In-process write-through cache in front of database_operations.
+    Single-row lookups are kept in a bounded LRU keyed by reservation id; the full reservation list
+    is cached as well. Writes go to the database first and, when they succeed,
+    update exactly the affected entries instead of dropping the whole cache. The list holds no ids,
+    so every write drops it rather than guess which of its rows it touched.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.RLock() # Used from both the Tk thread and the database worker
+        self._rows = OrderedDict() # reservation id -> reservation, least recently used first
+        self._all = None # Cached result of get_all_reservations_db, or None
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.list_hits = 0
+            self.list_misses = 0
+
+    def stats(self):
+        """Returns the cache counters, e.g. to size max_entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._rows),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "list_hits": self.list_hits,
+                "list_misses": self.list_misses,
+                "list_cached": self._all is not None,
+            }
+
+    def clear(self):
+        """Drops every cached entry (e.g. after another process changed the database)."""
+        with self._lock:
+            self._rows.clear()
+            self._all = None
+
+    def _put(self, reservation_id, record):
+        self._rows[reservation_id] = record
+        self._rows.move_to_end(reservation_id)
+        while len(self._rows) > self.max_entries:
+            self._rows.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, reservation_id, record):
+        """Caches a reservation that is already known, e.g. a row shown in the Treeview."""
+        with self._lock:
+            self._put(reservation_id, as_reservation(record))
+
+    def peek(self, reservation_id):
+        """Returns the cached reservation without touching the database or the counters, or None."""
+        with self._lock:
+            return self._rows.get(reservation_id)
+
+    # --- Reads ---
+    def get_reservation(self, reservation_id):
+        """Cached get_reservation_db."""
+        with self._lock:
+            record = self._rows.get(reservation_id)
+            if record is not None:
+                self._rows.move_to_end(reservation_id)
+                self.hits += 1
+                return record
+            self.misses += 1
+        record = database_operations.get_reservation_db(reservation_id)
+        if record is not None:
+            with self._lock:
+                self._put(reservation_id, record)
+        return record
+
+    def get_all_reservations(self):
+        """Cached get_all_reservations_db; the returned table is shared and must not be modified."""
+        with self._lock:
+            if self._all is not None:
+                self.list_hits += 1
+                return self._all
+            self.list_misses += 1
+        reservations = database_operations.get_all_reservations_db()
+        with self._lock:
+            self._all = reservations
+        return reservations
+
+    # --- Write-through ---
+    def insert_reservation(self, reservation_data):
+        """insert_reservation_db, then caches the new row under the id it returned."""
+        reservation_id = database_operations.insert_reservation_db(reservation_data)
+        if reservation_id:
+            record = as_reservation(reservation_data)
+            with self._lock:
+                self._put(reservation_id, record)
+                # Copying the whole table to append one row costs more than reading it again
+                self._all = None
+        return reservation_id
+
+    def update_reservation(self, reservation_id, reservation_data, expected_version=None):
+        """update_reservation_db, then replaces the cached row."""
+        success = database_operations.update_reservation_db(reservation_id, reservation_data, expected_version)
+        with self._lock:
+            # On failure the row may have been changed or deleted by someone else, so it is re-read on next use
+            self._rows.pop(reservation_id, None)
+            if success:
+                self._put(reservation_id, as_reservation(reservation_data))
+                self._all = None
+        return success
+
+    def delete_reservation(self, reservation_id):
+        """delete_reservation_db, then drops the row from the cache."""
+        success = database_operations.delete_reservation_db(reservation_id)
+        with self._lock:
+            # On failure the row may already have been deleted by someone else, so it is re-read on next use
+            self._rows.pop(reservation_id, None)
+            if success:
+                self._all = None
+        return success
+
+    def delete_reservations(self, reservation_ids):
+        """delete_reservations_db, then drops the rows from the cache."""
+        deleted = database_operations.delete_reservations_db(reservation_ids)
+        if deleted is not None:
+            with self._lock:
+                for reservation_id in set(reservation_ids):
+                    self._rows.pop(reservation_id, None)
+                self._all = None
+        return deleted
+
+    def update_reservations(self, reservation_ids, changes):
+        """update_reservations_db, then applies the same changes to the cached rows."""
+        updated = database_operations.update_reservations_db(reservation_ids, changes)
+        with self._lock:
+            for reservation_id in set(reservation_ids):
+                record = self._rows.pop(reservation_id, None)
+                if record is not None and updated is not None:
+                    self._put(reservation_id, record._replace(**changes))
+            if updated is not None:
+                self._all = None
+        return updated
+
+
+_default_cache = ReservationCache()
+
+
+def get_cache():
+    """Returns the process-wide reservation cache."""
+    return _default_cache
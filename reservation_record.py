@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+# Database column order; every query that builds records selects these columns in this order
+FIELDS = ("flight_number", "name", "departure", "destination", "date", "seat_number")
+
+# Display labels of the fields, as used for Treeview headings and the legacy dictionary keys
+LABELS = ("Flight Number", "Name", "Departure", "Destination", "Date", "Seat")
+
+
+class Reservation(namedtuple("Reservation", FIELDS)):
+    """One reservation row. A slotted tuple: no per-row dict, cheap to build from a cursor."""
+
+    __slots__ = ()
+
+    @staticmethod
+    def row_factory(cursor, row):
+        """sqlite3 row_factory for queries selecting FIELDS in order."""
+        return Reservation._make(row)
+
+    @classmethod
+    def from_mapping(cls, data):
+        """Builds a Reservation from a dictionary keyed by field names or display labels."""
+        values = []
+        for field, label in zip(FIELDS, LABELS):
+            if field in data:
+                values.append(data[field])
+            elif label in data:
+                values.append(data[label])
+            else:
+                raise KeyError(label)
+        return cls._make(values)
+
+    def to_labels(self):
+        """Returns the reservation as a dictionary keyed by display label."""
+        return dict(zip(LABELS, self))
+
+
+def as_reservation(data):
+    """Accepts a Reservation, a plain tuple in FIELDS order or a dictionary, and returns a Reservation."""
+    if isinstance(data, Reservation):
+        return data
+    if isinstance(data, dict):
+        return Reservation.from_mapping(data)
+    return Reservation._make(data)
+
+
+class ReservationTable:
+    """
+    Columnar container for bulk reads: one list per field instead of one object per row.
+    Behaves as a read-only sequence of Reservation records, built on access.
+    """
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns=None):
+        self._columns = columns if columns is not None else tuple([] for _ in FIELDS)
+
+    @classmethod
+    def from_cursor(cls, cursor, batch_size=1000):
+        """Builds a table from a cursor selecting FIELDS in order, fetching in batches."""
+        table = cls()
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            table.extend(rows)
+        return table
+
+    def extend(self, rows):
+        """Appends rows given as tuples in FIELDS order."""
+        for column, values in zip(self._columns, zip(*rows)):
+            column.extend(values)
+
+    def column(self, field):
+        """Returns the list of values of one field (shared, do not modify)."""
+        return self._columns[FIELDS.index(field)]
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Reservation._make(column[index] for column in self._columns)
+
+    def __iter__(self):
+        return map(Reservation._make, zip(*self._columns))
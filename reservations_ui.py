@@ -1,52 +1,788 @@
+import datetime
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
+from tkinter import filedialog
+import bulk_export # Streaming CSV/JSONL export
 import database_operations # Import database functions
+import perf_stats # Render and population timings
+from reservation_record import FIELDS, LABELS
+
+ACTION_ICONS = "✏️  🗑️"
+PAGE_SIZE = 100 # Rows fetched from the database per request
+OVERSCAN_ROWS = 20 # Rows kept loaded above and below the visible window
+WHEEL_SCROLL_ROWS = 3
+SEARCH_PLACEHOLDER = "Search name, route or flight number..."
+SEARCH_DEBOUNCE_MS = 250 # Wait for a pause in typing before searching
+SEARCH_COUNT_PAGE = 1000 # Matches counted per background request while results stream in
+MAX_SEARCH_RESULTS = 10000
+MAX_SELECTED_ROWS = 10000 # Rows "Select All" picks from the current view
+MODIFIER_KEYS = 0x0005 # Shift and Control bits of event.state: clicks that extend the selection
+PAGE_REQUEST_KEY = "page" # Database worker key of the view's page loads; a newer load replaces a pending one
+LOADING_IID = "loading-" # Item id prefix of placeholder rows whose page is still being read
+LOADING_VALUES = ("Loading...",) + ("",) * len(FIELDS)
+# (field, label) pairs the "Edit Selected" dialog offers
+BATCH_EDIT_FIELDS = tuple((field, LABELS[FIELDS.index(field)]) for field in database_operations.BATCH_UPDATE_FIELDS)
+
+def reservation_values(res, actions=True):
+    """Returns the Treeview values tuple for a Reservation; archived rows get no edit/delete icons."""
+    return tuple(res) + (ACTION_ICONS if actions else "",)
+
+class VirtualReservationList:
+    """
+    Virtual list mode for the reservations Treeview.
+    Only the rows that fit on screen exist as Treeview items; the scrollbar is driven by the
+    total row count and rows are fetched from the source as the window moves. The loaded rows
+    form one contiguous block covering the visible window plus the overscan buffer, so memory
+    use does not grow with the size of the table. Each loaded row keeps its keyset cursor,
+    which lets the block grow page by page and lets single-row changes be placed without a reload.
+    A cursor ends with the row's reservation id, which is also its Treeview item id.
+    Pages and counts are read on the database worker (see load_rows), never on the Tk thread; rows
+    whose page has not arrived yet show as placeholders.
+    """
+
+    def __init__(self, tree, scrollbar, source, worker, page_size=PAGE_SIZE, overscan=OVERSCAN_ROWS, total=None):
+        """
+        :param tree: The Treeview to render into.
+        :param scrollbar: The vertical Scrollbar controlling the window.
+        :param source: A KeysetPageSource, SearchPageSource or ListPageSource providing the rows.
+        :param worker: The DatabaseWorker the rows are read on.
+        :param total: The row count if it is already known, to skip the initial count.
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.worker = worker
+        self.page_size = page_size
+        self.overscan = overscan
+        self.first = 0
+        self.total = 0
+        self.visible_count = 1
+        self._block_start = 0 # Row position of the first loaded row
+        self._block = [] # (cursor, values) of the loaded rows, in display order
+        self._count_due = False # The row count is re-read with the next page load
+        self._reload_due = False # The loaded rows are outdated; they stay on screen until the reload arrives
+        self._generation = 0 # Bumped whenever the loaded rows change here, so older page loads are dropped
+        self._requested = None # What the pending page load was submitted for, so it is not submitted twice
+        # Selected reservation ids; kept here rather than in the Treeview, whose items come and go while scrolling
+        self.selected = set()
+        self.on_selection_change = None # Called with the number of selected rows
+
+        self.scrollbar.configure(command=self.yview)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._sync_selection(), add="+")
+        self.tree.bind("<Configure>", self._on_configure, add="+")
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_units(-WHEEL_SCROLL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_units(WHEEL_SCROLL_ROWS))
+
+        self.set_source(source, total)
+
+    def set_source(self, source, total=None):
+        """Switches to a different row source and scrolls back to the top, starting from its prefetched page."""
+        self.source = source
+        self.first = 0
+        self.selected.clear()
+        self._selection_changed()
+        self._rows_changed()
+        self._block_start, self._block = 0, source.take_prefetched() or []
+        self._reload_due = False
+        self._set_count(total)
+        self._render()
+
+    def refresh(self, total=None):
+        """Reloads the current window, re-reading the row count with it unless the count is given."""
+        self._rows_changed()
+        self._reload_due = True
+        self._set_count(total)
+        self._render()
+
+    def _set_count(self, total):
+        if total is not None:
+            self.total = total
+        self._count_due = total is None
+
+    def _rows_changed(self):
+        """Drops the pending page load: it was read for the loaded rows as they were, and would undo the change."""
+        self._generation += 1
+        self._requested = None
+        self.worker.cancel(PAGE_REQUEST_KEY)
+
+    def apply_changes(self, deleted=(), upserted=()):
+        """
+        Applies row-level changes to the loaded rows instead of reloading the view.
+        :param deleted: Reservation ids of removed rows (for an update, its own id: the row is placed again).
+        :param upserted: (cursor, Reservation) pairs of inserted or updated rows, as returned by
+                         the source's changed_rows(); they are placed by their cursor.
+        """
+        for reservation_id in deleted:
+            self.selected.discard(reservation_id)
+        self._selection_changed()
+        self._rows_changed()
+        for reservation_id in deleted:
+            kept = [row for row in self._block if row[0][-1] != reservation_id]
+            if len(kept) == len(self._block):
+                # Not loaded, so its position relative to the window is unknown
+                self.refresh()
+                return
+            self.total -= len(self._block) - len(kept)
+            self._block = kept
+        for cursor, reservation in upserted:
+            reservation_id = cursor[-1]
+            for index, (row_cursor, _) in enumerate(self._block):
+                if row_cursor[-1] == reservation_id:
+                    del self._block[index]
+                    self.total -= 1
+                    break
+            self._place(cursor, reservation_values(reservation))
+        self._render()
+
+    def is_loaded(self, reservation_id):
+        """Whether the row of `reservation_id` is in the loaded block, so a change to it can be applied in place."""
+        return any(cursor[-1] == reservation_id for cursor, _ in self._block)
+
+    # --- Selection ---
+    def select(self, reservation_ids):
+        """Replaces the selection, including rows that are not loaded (e.g. "Select All")."""
+        self.selected = set(reservation_ids) if self.source.selectable else set()
+        self._selection_changed()
+        self._render()
+
+    def clear_selection(self):
+        self.select(())
+
+    def _sync_selection(self):
+        """Takes the Treeview's selection of the shown rows over; selected rows scrolled out of view stay selected."""
+        if not self.source.selectable:
+            return
+        shown = {int(iid) for iid in self.tree.get_children() if not iid.startswith(LOADING_IID)}
+        chosen = {int(iid) for iid in self.tree.selection() if not iid.startswith(LOADING_IID)} & shown
+        selected = (self.selected - shown) | chosen
+        if selected != self.selected:
+            self.selected = selected
+            self._selection_changed()
+
+    def _selection_changed(self):
+        if self.on_selection_change is not None:
+            self.on_selection_change(len(self.selected))
+
+    def _place(self, cursor, values):
+        """Inserts a row into the block at the position its cursor sorts to."""
+        total_before = self.total
+        self.total += 1
+        if not self._block:
+            return # Nothing loaded; the next render fetches the window including this row
+        sort_key = self.source.sort_key
+        key = sort_key(cursor)
+
+        def precedes(a, b):
+            return a > b if self.source.descending else a < b
+
+        if precedes(key, sort_key(self._block[0][0])) and self._block_start > 0:
+            # Sorts before the loaded rows: they all move down one position
+            self._block_start += 1
+            self.first += 1
+            return
+        index = len(self._block)
+        while index > 0 and precedes(key, sort_key(self._block[index - 1][0])):
+            index -= 1
+        if index == len(self._block) and self._block_start + len(self._block) < total_before:
+            return # Sorts after the loaded rows, which are not the end of the list
+        self._block.insert(index, (cursor, values))
+
+    def set_total(self, total):
+        """Updates the row count, e.g. while search results are still being counted."""
+        self.total = total
+        self._render()
+
+    def yview(self, *args):
+        """Scrollbar command: handles ('moveto', fraction) and ('scroll', n, 'units'|'pages')."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._move_to(int(round(float(args[1]) * self.total)))
+        elif args[0] == "scroll":
+            step = self.visible_count if args[2] == "pages" else 1
+            self._move_to(self.first + int(args[1]) * step)
+
+    def _scroll_units(self, rows):
+        self._move_to(self.first + rows)
+        return "break" # Keep the Treeview from scrolling its own items
+
+    def _on_mousewheel(self, event):
+        return self._scroll_units(-WHEEL_SCROLL_ROWS if event.delta > 0 else WHEEL_SCROLL_ROWS)
+
+    def _on_configure(self, event):
+        row_height = self._row_height()
+        visible_count = max(1, (event.height - self._heading_height(row_height)) // row_height)
+        if visible_count != self.visible_count:
+            self.visible_count = visible_count
+            self._render()
+
+    def _row_height(self):
+        style_name = self.tree.cget("style") or "Treeview"
+        try:
+            return int(ttk.Style().lookup(style_name, "rowheight")) or 20
+        except (ValueError, tk.TclError):
+            return 20
+
+    def _heading_height(self, row_height):
+        children = self.tree.get_children()
+        if children:
+            bbox = self.tree.bbox(children[0])
+            if bbox:
+                return bbox[1]
+        return row_height
+
+    def _move_to(self, first):
+        first = min(max(0, first), max(0, self.total - self.visible_count))
+        if first != self.first:
+            self.first = first
+            self._render()
+
+    def _request_rows(self, keep_start, keep_stop):
+        """Reads the rows of the window (and the row count, if due) on the database worker, then renders them."""
+        request = (self.source, self._generation, keep_start, keep_stop, self._count_due, self._reload_due)
+        if request == self._requested:
+            return # Already on its way
+        self._requested = request
+        source, generation, counting, reloading = self.source, self._generation, self._count_due, self._reload_due
+
+        def on_loaded(result):
+            if self.source is not source or self._generation != generation:
+                return # The rows changed meanwhile; the next render asks again
+            total, self._block_start, self._block = result
+            if total is not None:
+                self.total = total
+            if counting:
+                self._count_due = False
+            if reloading:
+                self._reload_due = False
+            self._requested = None
+            self._render()
+
+        def on_failed(error):
+            self._requested = None # Scrolling asks again
+            database_operations.report_error("Database Error", str(error))
+
+        block_start, block = (0, []) if reloading else (self._block_start, list(self._block))
+        self.worker.submit(load_rows, source, None if counting else self.total, self.first, self.visible_count,
+                           self.overscan, self.page_size, block_start, block,
+                           on_success=on_loaded, on_error=on_failed, key=PAGE_REQUEST_KEY)
+
+    def _render(self):
+        with perf_stats.timer("tree.render"):
+            self._render_rows()
+
+    def _render_rows(self):
+        self.first = min(max(0, self.first), max(0, self.total - self.visible_count))
+        keep_start = max(0, self.first - self.overscan)
+        keep_stop = min(self.total, self.first + self.visible_count + self.overscan)
+        offset = self._block_start
+        covered = bool(self._block) and offset <= keep_start and offset + len(self._block) >= keep_stop
+        if self._count_due or self._reload_due or (keep_stop > keep_start and not covered):
+            # Shows what is loaded and placeholders for the rest until the rows arrive
+            self._request_rows(keep_start, keep_stop)
+        else:
+            # Drop everything outside the window and its overscan buffer
+            self._block = self._block[max(0, keep_start - offset):max(0, keep_stop - offset)]
+            self._block_start = max(offset, keep_start)
+
+        # (item id, values, reservation id) of the visible rows
+        rows = []
+        for position in range(self.first, min(self.total, self.first + self.visible_count)):
+            index = position - self._block_start
+            if 0 <= index < len(self._block):
+                cursor, values = self._block[index]
+                rows.append((str(cursor[-1]), values, cursor[-1]))
+            else:
+                rows.append((f"{LOADING_IID}{position}", LOADING_VALUES, None))
+
+        # Diff the visible rows against the existing items, keyed by their row id, so unchanged rows are left alone
+        with perf_stats.timer("tree.populate"):
+            wanted_ids = {iid for iid, _, _ in rows}
+            stale = [iid for iid in self.tree.get_children() if iid not in wanted_ids]
+            if stale:
+                self.tree.delete(*stale)
+            for index, (iid, values, _) in enumerate(rows):
+                if not self.tree.exists(iid):
+                    self.tree.insert("", index, iid=iid, values=values)
+                    continue
+                if tuple(self.tree.item(iid, "values")) != values:
+                    self.tree.item(iid, values=values)
+                if self.tree.index(iid) != index:
+                    self.tree.move(iid, "", index)
+            # Rows scrolled back into view show as selected again
+            selected = [iid for iid, _, reservation_id in rows if reservation_id in self.selected]
+            if set(selected) != set(self.tree.selection()):
+                self.tree.selection_set(selected)
+
+        stop = self.first + len(rows)
+        if self.total:
+            self.scrollbar.set(self.first / self.total, stop / self.total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+def load_rows(source, total, first, visible_count, overscan, page_size, block_start, block):
+    """
+    Reads the rows a VirtualReservationList needs around row `first`, on the database worker: the loaded
+    block is extended by keyset pages, or replaced by seeking when the window moved far away from it.
+    :param total: The row count, or None to count the rows first.
+    :param block_start: Row position of the first row of `block`, the (cursor, values) rows loaded so far.
+    :return: (the row count if it was counted or corrected on the way, else None; block start; block).
+    """
+    counted = None
+    if total is None:
+        total = counted = source.count()
+    first = min(max(0, first), max(0, total - visible_count))
+    start = max(0, first - overscan)
+    stop = min(total, first + visible_count + overscan)
+    if stop <= start:
+        return counted, 0, []
+
+    block_stop = block_start + len(block)
+    if not block or block_start - stop >= page_size or start - block_stop >= page_size:
+        # Too far from the loaded rows: seek straight to the new position
+        # seek returns None both for the first row and past the end; only the first may read from the top
+        cursor = source.seek(start)
+        block_start = start
+        block = source.fetch_after(cursor, max(stop - start, page_size)) if cursor is not None or start == 0 else []
+        if not block:
+            # The list shrank under us; resynchronise with the real row count
+            total = counted = source.count()
+            block_start = max(0, total - visible_count)
+            return counted, block_start, source.fetch_after(source.seek(block_start), page_size)
+
+    while block_start > start:
+        rows = source.fetch_before(block[0][0], page_size)
+        block[:0] = rows
+        block_start -= len(rows)
+        if not rows:
+            block_start = 0 # Nothing before the block, so it starts the list
+            break
+    while block_start + len(block) < stop:
+        rows = source.fetch_after(block[-1][0], page_size)
+        block.extend(rows)
+        if not rows:
+            counted = block_start + len(block) # Nothing after the block, so it ends the list
+            break
+    return counted, block_start, block
+
+class KeysetPageSource:
+    """Row source for VirtualReservationList backed by the keyset query API of database_operations."""
+
+    selectable = True
+
+    def __init__(self, filters=None, sort_by=None, descending=False):
+        self.filters = filters
+        self.sort_by = sort_by
+        self.descending = descending
+        self._prefetched = None # First page loaded ahead of time, for the view to start from
+
+    def count(self):
+        # Without filters this reads the trigger-maintained total, so other desks' changes are counted too
+        return database_operations.count_reservations_db(self.filters)
+
+    def prefetch(self, limit):
+        """Counts the rows and loads the first page ahead of time (e.g. on the database worker); returns the count."""
+        total = self.count()
+        self._prefetched = self.fetch_after(None, limit) if total else []
+        return total
+
+    def take_prefetched(self):
+        """Hands the page loaded by prefetch() over, once; None if there is none."""
+        rows, self._prefetched = self._prefetched, None
+        return rows
+
+    def seek(self, offset):
+        """Returns the cursor continuing at row `offset`."""
+        return database_operations.get_reservation_cursor_at_db(offset, self.filters, self.sort_by, self.descending)
+
+    def fetch_after(self, cursor, limit):
+        """Returns up to `limit` (cursor, values) rows following `cursor` (None for the first page)."""
+        rows = database_operations.query_reservation_rows_db(
+            self.filters, self.sort_by, self.descending, cursor, limit)
+        return [(row_cursor, reservation_values(res)) for row_cursor, res in rows]
+
+    def fetch_before(self, cursor, limit):
+        """Returns up to `limit` (cursor, values) rows preceding `cursor`."""
+        rows = database_operations.query_reservation_rows_db(
+            self.filters, self.sort_by, self.descending, cursor, limit, backwards=True)
+        return [(row_cursor, reservation_values(res)) for row_cursor, res in rows]
+
+    def changed_rows(self, reservation_ids):
+        """Changed-rows query: the (cursor, Reservation) pairs of the given reservation ids that match the filters."""
+        changed = []
+        for reservation_id in reservation_ids:
+            changed.extend(database_operations.query_reservation_rows_db(
+                self.filters, self.sort_by, self.descending, reservation_id=reservation_id))
+        return changed
+
+    def sort_key(self, cursor):
+        return database_operations.cursor_sort_key(self.sort_by, cursor)
+
+class SearchPageSource:
+    """Row source for VirtualReservationList over full-text search matches, paged by reservation id."""
+
+    descending = False
+    selectable = True
+
+    def __init__(self, text):
+        self.text = text
+        self._prefetched = None
+        self._counted_cursor = None # Last match counted so far
+
+    def prefetch(self, limit):
+        """Loads the first page of matches ahead of time; returns how many matches it holds."""
+        rows = self._prefetched = self.fetch_after(None, limit)
+        self._counted_cursor = rows[-1][0] if rows else None
+        return len(rows)
+
+    def take_prefetched(self):
+        rows, self._prefetched = self._prefetched, None
+        return rows
+
+    def count_next(self, limit=SEARCH_COUNT_PAGE):
+        """Counts up to `limit` further matches (index only); called repeatedly to stream in the total."""
+        count, self._counted_cursor = database_operations.count_search_matches_db(
+            self.text, self._counted_cursor, limit)
+        return count
+
+    def count(self):
+        total, cursor = 0, None
+        while total < MAX_SEARCH_RESULTS:
+            count, cursor = database_operations.count_search_matches_db(self.text, cursor, SEARCH_COUNT_PAGE)
+            total += count
+            if count < SEARCH_COUNT_PAGE:
+                break
+        return min(total, MAX_SEARCH_RESULTS)
+
+    def seek(self, offset):
+        return database_operations.get_search_cursor_at_db(self.text, offset)
+
+    def fetch_after(self, cursor, limit):
+        rows = database_operations.search_reservation_rows_db(self.text, cursor, limit)
+        return [(row_cursor, reservation_values(res)) for row_cursor, res in rows]
+
+    def fetch_before(self, cursor, limit):
+        rows = database_operations.search_reservation_rows_db(self.text, cursor, limit, backwards=True)
+        return [(row_cursor, reservation_values(res)) for row_cursor, res in rows]
+
+    def changed_rows(self, reservation_ids):
+        changed = []
+        for reservation_id in reservation_ids:
+            changed.extend(database_operations.search_reservation_rows_db(self.text, reservation_id=reservation_id))
+        return changed
+
+    def sort_key(self, cursor):
+        return cursor
+
+class ListPageSource:
+    """
+    Read-only row source for VirtualReservationList over an in-memory list, e.g. archived reservations.
+    Its rows carry no reservation ids (their cursors are list positions), so they cannot be edited,
+    deleted or selected.
+    """
+
+    descending = False
+    selectable = False
+
+    def __init__(self, reservations_list):
+        self._rows = [((index,), reservation_values(res, actions=False)) for index, res in enumerate(reservations_list)]
+
+    def count(self):
+        return len(self._rows)
+
+    def take_prefetched(self):
+        return self._rows[:PAGE_SIZE] # Held in memory already
+
+    def seek(self, offset):
+        return (offset - 1,) if offset > 0 else None
+
+    def fetch_after(self, cursor, limit):
+        start = cursor[0] + 1 if cursor is not None else 0
+        return self._rows[start:start + limit]
+
+    def fetch_before(self, cursor, limit):
+        return self._rows[max(0, cursor[0] - limit):cursor[0]]
+
+    def changed_rows(self, reservation_ids):
+        return [] # A fixed result list does not pick up new rows
+
+    def sort_key(self, cursor):
+        return cursor
+
+def view_reservation_ids(source, limit=MAX_SELECTED_ROWS):
+    """Reservation ids of the first `limit` rows of a row source, read page by page (e.g. on the database worker)."""
+    reservation_ids, cursor = [], None
+    while len(reservation_ids) < limit:
+        rows = source.fetch_after(cursor, min(PAGE_SIZE * 10, limit - len(reservation_ids)))
+        reservation_ids.extend(row_cursor[-1] for row_cursor, _ in rows)
+        if not rows:
+            break
+        cursor = rows[-1][0]
+    return reservation_ids
+
+def sort_reservations(app_instance, column):
+    """Sorts the reservations view by `column`, toggling the direction on repeated clicks."""
+    view = getattr(app_instance, "reservations_view", None)
+    if view is None:
+        return
+
+    sort_by, descending = getattr(app_instance, "reservations_sort", (None, False))
+    descending = not descending if sort_by == column else False
+    app_instance.reservations_sort = (column, descending)
+
+    for col in database_operations.SORT_COLUMNS:
+        arrow = (" ▼" if descending else " ▲") if col == column else ""
+        app_instance.reservations_tree.heading(col, text=col + arrow)
+
+    _clear_search_entry(app_instance)
+    if isinstance(view.source, KeysetPageSource):
+        # Sorting does not change how many rows there are, so the count is reused
+        view.set_source(KeysetPageSource(view.source.filters, column, descending), total=view.total)
+    else:
+        _load_source(app_instance, KeysetPageSource(sort_by=column, descending=descending))
+
+def _load_source(app_instance, source):
+    """Counts and prefetches `source` on the database worker, then shows it in the reservations view."""
+    def on_loaded(total):
+        if app_instance.reservations_view is not None:
+            app_instance.reservations_view.set_source(source, total=total)
+
+    app_instance.db_worker.submit(source.prefetch, PAGE_SIZE, on_success=on_loaded, key="view")
+
+def show_history(app_instance):
+    """Looks the search text up in the archive of past reservations and lists the matches, newest first."""
+    view = app_instance.reservations_view
+    if view is None:
+        return
+    text = _search_text(app_instance)
+    app_instance.search_status.configure(text="Searching history...")
+
+    def on_loaded(reservations):
+        if app_instance.reservations_view is not view:
+            return
+        view.set_source(ListPageSource(reservations), total=len(reservations))
+        count = len(reservations)
+        app_instance.search_status.configure(
+            text=f"{count:,} archived reservation{'s' if count != 1 else ''}" if count else "No archived matches")
+
+    # The archive is only attached for this request; replaces a search that is still running
+    app_instance.db_worker.submit(database_operations.search_archive_db, text or None, on_success=on_loaded, key="search")
 
 def populate_reservations_tree(app_instance, reservations_list):
-    """Populates the Treeview with the given list of reservation dictionaries."""
+    """Populates the Treeview with the given sequence of Reservation records, read-only since they carry no ids."""
+    view = getattr(app_instance, "reservations_view", None)
+    if view is not None:
+        # Show the list through the virtual view so scrolling stays consistent
+        view.set_source(ListPageSource(reservations_list), total=len(reservations_list))
+        return
+
     for item in app_instance.reservations_tree.get_children():
         app_instance.reservations_tree.delete(item)
 
     for res in reservations_list:
-        action_icons = "✏️  🗑️"
-        app_instance.reservations_tree.insert("", "end", values=(
-            res["Flight Number"],
-            res["Name"],
-            res["Departure"],
-            res["Destination"],
-            res["Date"],
-            res["Seat"],
-            action_icons
-        ))
+        app_instance.reservations_tree.insert("", "end", values=reservation_values(res, actions=False))
+
+def refresh_reservation_rows(app_instance, deleted=(), changed=()):
+    """
+    Brings the kept-alive reservations view up to date after an operation, row by row.
+    :param deleted: Reservation ids that were deleted, or updated rows to take out before placing them again.
+    :param changed: Reservation ids that were inserted or updated; their rows are re-read with a changed-rows query.
+    """
+    view = getattr(app_instance, "reservations_view", None)
+    if view is None:
+        return # The view is built from scratch the next time it is shown
+    if changed and not all(view.is_loaded(reservation_id) for reservation_id in deleted):
+        # apply_changes would reload the window anyway, so skip re-reading the changed rows (e.g. a batch edit)
+        view.refresh()
+        return
+    if not changed:
+        view.apply_changes(deleted=deleted)
+        return
+
+    source = view.source
+    def on_loaded(upserted):
+        if app_instance.reservations_view is view and view.source is source:
+            view.apply_changes(deleted=deleted, upserted=upserted)
+
+    app_instance.db_worker.submit(source.changed_rows, list(changed), on_success=on_loaded)
+
+def _search_text(app_instance):
+    text = app_instance.search_entry.get().strip()
+    return "" if text == SEARCH_PLACEHOLDER else text
+
+def _clear_search_entry(app_instance):
+    app_instance.db_worker.cancel("search")
+    app_instance.search_entry.delete(0, "end")
+    app_instance.search_entry.insert(0, SEARCH_PLACEHOLDER)
+    app_instance.search_status.configure(text="")
+
+def _on_search_focus_in(app_instance):
+    if app_instance.search_entry.get() == SEARCH_PLACEHOLDER:
+        app_instance.search_entry.delete(0, "end")
+
+def _on_search_key(app_instance, event):
+    """Debounces search-as-you-type: the search runs once typing pauses."""
+    if event.keysym in ("Tab", "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"):
+        return
+    if app_instance.search_after_id is not None:
+        app_instance.root.after_cancel(app_instance.search_after_id)
+    app_instance.search_after_id = app_instance.root.after(SEARCH_DEBOUNCE_MS, lambda: search_reservations(app_instance))
 
 def search_reservations(app_instance):
-    """Searches for a reservation by Flight Number and updates the Treeview."""
-    search_flight_number_str = app_instance.search_entry.get().strip()
-    if not search_flight_number_str or search_flight_number_str == "Search by Flight Number...":
-        messagebox.showwarning("Search", "Please enter a Flight Number to search.")
-        show_view_reservations_ui(app_instance) # Show all if search box is empty
+    """Searches reservations by name, departure, destination and flight number and updates the Treeview."""
+    if app_instance.search_after_id is not None:
+        app_instance.root.after_cancel(app_instance.search_after_id)
+        app_instance.search_after_id = None
+
+    view = app_instance.reservations_view
+    if view is None:
+        return
+    text = _search_text(app_instance)
+    if not database_operations.build_search_query(text):
+        # Show all if search box is empty
+        app_instance.db_worker.cancel("search")
+        app_instance.search_status.configure(text="")
+        if not isinstance(view.source, KeysetPageSource) or view.source.filters:
+            sort_by, descending = app_instance.reservations_sort
+            _load_source(app_instance, KeysetPageSource(sort_by=sort_by, descending=descending))
         return
 
-    # Clear existing items in the treeview
-    for item in app_instance.reservations_tree.get_children():
-        app_instance.reservations_tree.delete(item)
+    if not database_operations.search_index_available():
+        app_instance.search_status.configure(text="Searching names only")
+        _load_source(app_instance, KeysetPageSource(filters={"Name": text}))
+        return
+
+    source = SearchPageSource(text)
+    app_instance.search_status.configure(text="Searching...")
+
+    def show_status(total, more):
+        if not total:
+            app_instance.search_status.configure(text="No matches")
+        else:
+            app_instance.search_status.configure(text=f"{total:,}{'+' if more else ''} match{'es' if total != 1 else ''}")
+
+    def on_counted(count):
+        # Streams the total in a page at a time; rows themselves are paged in as the view scrolls
+        if view.source is not source:
+            return
+        total = view.total + count
+        more = count == SEARCH_COUNT_PAGE and total < MAX_SEARCH_RESULTS
+        view.set_total(min(total, MAX_SEARCH_RESULTS))
+        show_status(view.total, more or total >= MAX_SEARCH_RESULTS)
+        if more:
+            app_instance.db_worker.submit(source.count_next, on_success=on_counted, key="search")
 
-    found_reservation = database_operations.get_reservation_by_flight_number_db(search_flight_number_str)
-
-    if found_reservation:
-        action_icons = "✏️  🗑️"
-        app_instance.reservations_tree.insert("", "end", values=(
-            found_reservation["Flight Number"],
-            found_reservation["Name"],
-            found_reservation["Departure"],
-            found_reservation["Destination"],
-            found_reservation["Date"],
-            found_reservation["Seat"],
-            action_icons
-        ))
+    def on_first_page(count):
+        view.set_source(source, total=count)
+        show_status(count, count == PAGE_SIZE)
+        if count == PAGE_SIZE:
+            app_instance.db_worker.submit(source.count_next, on_success=on_counted, key="search")
+
+    # A newer search replaces (and interrupts) one that is still running
+    app_instance.db_worker.submit(source.prefetch, PAGE_SIZE, on_success=on_first_page, key="search")
+
+def export_reservations_ui(app_instance):
+    """Exports the rows of the current view (filters, search and sort order) to a file chosen by the user."""
+    view = getattr(app_instance, "reservations_view", None)
+    source = view.source if view is not None else None
+    if isinstance(source, SearchPageSource):
+        query = {"search_text": source.text}
+    elif isinstance(source, KeysetPageSource):
+        query = {"filters": source.filters, "sort_by": source.sort_by, "descending": source.descending}
     else:
-        messagebox.showinfo("Search Results", f"No reservation found for Flight Number: {search_flight_number_str}")
+        query = {}
+    total = view.total if view is not None else None
+
+    path = filedialog.asksaveasfilename(
+        title="Export Reservations", defaultextension=".csv",
+        filetypes=[("CSV", "*.csv"), ("CSV (gzip)", "*.csv.gz"), ("JSON Lines", "*.jsonl"), ("JSON Lines (gzip)", "*.jsonl.gz")])
+    if not path:
+        return
+
+    def show_progress(exported):
+        of_total = f" of {total:,}" if total else ""
+        app_instance.search_status.configure(text=f"Exporting {exported:,}{of_total}...")
+
+    def on_progress(result):
+        # Runs on the export thread; the label is updated on the Tk thread
+        exported = result.exported
+        app_instance.export_worker.post(lambda: show_progress(exported))
+
+    def on_exported(result):
+        app_instance.search_status.configure(text="")
+        messagebox.showinfo("Export Complete", result.summary())
+
+    def on_failed(error):
+        app_instance.search_status.configure(text="")
+        messagebox.showerror("Export Failed", f"Could not export reservations: {error}")
+
+    show_progress(0)
+    app_instance.export_worker.submit(bulk_export.export_reservations, path, progress=on_progress,
+                                      on_success=on_exported, on_error=on_failed, key="export", **query)
+
+def select_all_reservations(app_instance):
+    """Selects every row of the current view (up to MAX_SELECTED_ROWS), including rows not scrolled into view."""
+    view = getattr(app_instance, "reservations_view", None)
+    if view is None or not view.source.selectable:
+        return
+    source = view.source
+    app_instance.selection_label.configure(text="Selecting...")
+
+    def on_loaded(reservation_ids):
+        if app_instance.reservations_view is view and view.source is source:
+            view.select(reservation_ids)
+
+    app_instance.db_worker.submit(view_reservation_ids, source, on_success=on_loaded, key="select")
+
+def _show_selection_count(app_instance, count):
+    """Shows how many rows are selected and enables the batch buttons when there are any."""
+    app_instance.selection_label.configure(text=f"{count:,} selected" if count else "")
+    for button in app_instance.batch_buttons:
+        button.state(["!disabled"] if count else ["disabled"])
+
+def open_batch_edit_dialog(app_instance, count, on_apply):
+    """Asks which fields to change on `count` selected reservations; calls on_apply({field: value}) with the filled-in ones."""
+    dialog = tk.Toplevel(app_instance.root)
+    dialog.title("Edit Selected Reservations")
+    dialog.transient(app_instance.root)
+    dialog.resizable(False, False)
+
+    form = ttk.Frame(dialog, style="Card.TFrame", padding="20 20 20 20")
+    form.pack(fill="both", expand=True)
+    ttk.Label(form, text=f"Change {count:,} reservation(s). Empty fields keep their current values.",
+              style="CardDesc.TLabel").grid(row=0, column=0, columnspan=3, sticky="w", pady=(0, 10))
+
+    variables = {}
+    for row, (field, label) in enumerate(BATCH_EDIT_FIELDS, start=1):
+        ttk.Label(form, text=label, style="FormLabel.TLabel", anchor="w").grid(row=row, column=0, sticky="w", pady=5, padx=(0, 10))
+        variables[field] = tk.StringVar()
+        ttk.Entry(form, width=25, style="TEntry", textvariable=variables[field]).grid(row=row, column=1, sticky="w", pady=5)
+        if field == "date":
+            calendar_icon = ttk.Label(form, text="🗓️", font=("Segoe UI Emoji", 12), cursor="hand2", background="white")
+            calendar_icon.grid(row=row, column=2, padx=(5, 0))
+            calendar_icon.bind("<Button-1>", lambda e, var=variables[field]: app_instance.open_date_picker(var))
+
+    def apply():
+        changes = {field: var.get().strip() for field, var in variables.items() if var.get().strip()}
+        if not changes:
+            messagebox.showerror("Edit Selected", "Fill in at least one field to change.", parent=dialog)
+            return
+        if "date" in changes:
+            try:
+                datetime.date.fromisoformat(changes["date"])
+            except ValueError:
+                messagebox.showerror("Edit Selected", "Please enter the date as YYYY-MM-DD.", parent=dialog)
+                return
+        dialog.destroy()
+        on_apply(changes)
+
+    button_frame = ttk.Frame(form, style="Card.TFrame")
+    button_frame.grid(row=len(BATCH_EDIT_FIELDS) + 1, column=0, columnspan=3, sticky="e", pady=(15, 0))
+    ttk.Button(button_frame, text="Cancel", style="Secondary.TButton", command=dialog.destroy).pack(side="right")
+    ttk.Button(button_frame, text="Apply", style="Primary.TButton", command=apply).pack(side="right", padx=(0, 5))
+    dialog.bind("<Return>", lambda e: apply())
+    dialog.bind("<Escape>", lambda e: dialog.destroy())
 
 def handle_table_click(app_instance, event):
     """Handles clicks on the Treeview to trigger edit or delete actions."""
@@ -54,10 +790,15 @@ def handle_table_click(app_instance, event):
     if not item_id:
         return
 
+    view = getattr(app_instance, "reservations_view", None)
+    if view is not None and not event.state & MODIFIER_KEYS:
+        # A plain click starts a new selection, which also drops selected rows scrolled out of view
+        view.selected.clear()
+
     column = app_instance.reservations_tree.identify_column(event.x)
     col_name = app_instance.reservations_tree.heading(column, 'text')
 
-    if col_name == "Actions":
+    if col_name == "Actions" and app_instance.reservations_tree.set(item_id, "Actions"):
         x, y, width, height = app_instance.reservations_tree.bbox(item_id, column)
         if x is not None:
             edit_icon_area_end = x + (width / 2)
@@ -68,10 +809,19 @@ def handle_table_click(app_instance, event):
                 app_instance.delete_reservation(event)
 
 def show_view_reservations_ui(app_instance):
-    """Displays the view reservations page UI."""
+    """Displays the view reservations page UI, reusing the page kept alive from the last visit."""
     app_instance.clear_content_area()
 
-    header_frame = ttk.Frame(app_instance.content_area, style="TFrame")
+    if app_instance.show_page("reservations"):
+        # Rows changed since the last visit were already applied by refresh_reservation_rows
+        return
+
+    # Kept across navigation once it holds a reservations list (see _show_reservations_list);
+    # the empty state is rebuilt on every visit
+    page = ttk.Frame(app_instance.content_area, style="TFrame")
+    page.pack(fill="both", expand=True)
+
+    header_frame = ttk.Frame(page, style="TFrame")
     header_frame.pack(fill="x", pady=(20, 10))
 
     ttk.Label(header_frame, text="Your Reservations", style="Title.TLabel", font=("Inter", 20, "bold")).pack(side="left", padx=20)
@@ -79,19 +829,57 @@ def show_view_reservations_ui(app_instance):
     search_frame = ttk.Frame(header_frame, style="TFrame")
     search_frame.pack(side="right", padx=20)
 
+    app_instance.search_status = ttk.Label(search_frame, text="", style="Subtitle.TLabel")
+    app_instance.search_status.pack(side="left", padx=(0, 10))
+
     app_instance.search_entry = ttk.Entry(search_frame, width=30, font=("Inter", 10))
-    app_instance.search_entry.insert(0, "Search by Flight Number...")
+    app_instance.search_entry.insert(0, SEARCH_PLACEHOLDER)
     app_instance.search_entry.pack(side="left", padx=(0, 10))
+    app_instance.search_entry.bind("<FocusIn>", lambda e: _on_search_focus_in(app_instance))
+    app_instance.search_entry.bind("<KeyRelease>", lambda e: _on_search_key(app_instance, e))
+    app_instance.search_entry.bind("<Return>", lambda e: search_reservations(app_instance))
 
     ttk.Button(search_frame, text="Search", style="Primary.TButton", command=lambda: search_reservations(app_instance)).pack(side="left", padx=(0, 5))
+    ttk.Button(search_frame, text="History", style="Primary.TButton", command=lambda: show_history(app_instance)).pack(side="left", padx=(0, 5))
+    ttk.Button(search_frame, text="Export", style="Primary.TButton", command=app_instance.export_reservations).pack(side="left", padx=(0, 5))
     ttk.Button(search_frame, text="Book New Flight", style="Primary.TButton", command=app_instance.show_book_flight).pack(side="left")
 
-    reservations_display_frame = ttk.Frame(app_instance.content_area, style="Card.TFrame", padding="20 20 20 20")
+    # Batch actions on the selected rows (Ctrl/Shift+click to select several)
+    selection_frame = ttk.Frame(page, style="TFrame")
+    selection_frame.pack(fill="x", padx=20)
+    app_instance.selection_label = ttk.Label(selection_frame, text="", style="Subtitle.TLabel")
+    app_instance.selection_label.pack(side="left")
+    app_instance.batch_buttons = [
+        ttk.Button(selection_frame, text="Delete Selected", style="Secondary.TButton", command=app_instance.delete_selected_reservations),
+        ttk.Button(selection_frame, text="Edit Selected...", style="Secondary.TButton", command=app_instance.edit_selected_reservations),
+    ]
+    for button in app_instance.batch_buttons:
+        button.pack(side="right", padx=(5, 0))
+        button.state(["disabled"])
+    ttk.Button(selection_frame, text="Select All", style="Secondary.TButton", command=lambda: select_all_reservations(app_instance)).pack(side="right", padx=(5, 0))
+
+    reservations_display_frame = ttk.Frame(page, style="Card.TFrame", padding="20 20 20 20")
     reservations_display_frame.pack(fill="both", expand=True, padx=20, pady=10)
 
-    app_instance.reservations = database_operations.get_all_reservations_db()
+    app_instance.reservations_view = None
+    loading_label = ttk.Label(reservations_display_frame, text="Loading reservations...", style="NoReservationsSubtitle.TLabel")
+    loading_label.pack(pady=50)
+
+    # Count and first page are read on the database worker; the page is built when they arrive
+    source = KeysetPageSource()
+    app_instance.db_worker.submit(
+        source.prefetch, PAGE_SIZE, key="view",
+        on_success=lambda total: _show_reservations_list(app_instance, page, reservations_display_frame, loading_label, source, total))
+
+def _show_reservations_list(app_instance, page, reservations_display_frame, loading_label, source, total):
+    """Builds the reservations Treeview (or the empty state) once the first page has been loaded."""
+    with perf_stats.timer("screen.show_reservations_list"):
+        _build_reservations_list(app_instance, page, reservations_display_frame, loading_label, source, total)
+
+def _build_reservations_list(app_instance, page, reservations_display_frame, loading_label, source, total):
+    loading_label.destroy()
 
-    if not app_instance.reservations:
+    if not total:
         no_reservations_frame = ttk.Frame(reservations_display_frame, style="NoReservations.TFrame", padding="40 40 40 40")
         no_reservations_frame.pack(fill="both", expand=True)
 
@@ -100,11 +888,14 @@ def show_view_reservations_ui(app_instance):
 
         ttk.Button(no_reservations_frame, text="Book Your First Flight", style="Large.Primary.TButton", command=app_instance.show_book_flight).pack(pady=(0, 50))
     else:
-        columns = ("Flight Number", "Name", "Departure", "Destination", "Date", "Seat", "Actions")
-        app_instance.reservations_tree = ttk.Treeview(reservations_display_frame, columns=columns, show="headings", style="Treeview")
+        columns = LABELS + ("Actions",)
+        app_instance.reservations_tree = ttk.Treeview(reservations_display_frame, columns=columns, show="headings",
+                                                   style="Treeview", selectmode="extended")
 
         for col in columns:
             app_instance.reservations_tree.heading(col, text=col, anchor="w")
+            if col in database_operations.SORT_COLUMNS:
+                app_instance.reservations_tree.heading(col, command=lambda c=col: sort_reservations(app_instance, c))
             if col == "Flight Number":
                 app_instance.reservations_tree.column(col, width=100, stretch=tk.NO, anchor="center")
             elif col == "Actions":
@@ -116,10 +907,16 @@ def show_view_reservations_ui(app_instance):
 
         app_instance.reservations_tree.pack(fill="both", expand=True)
 
-        scrollbar = ttk.Scrollbar(reservations_display_frame, orient="vertical", command=app_instance.reservations_tree.yview)
-        app_instance.reservations_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(reservations_display_frame, orient="vertical")
         scrollbar.pack(side="right", fill="y")
 
         app_instance.reservations_tree.bind("<Button-1>", lambda e: handle_table_click(app_instance, e))
 
-        populate_reservations_tree(app_instance, app_instance.reservations)
+        # Virtual list mode: rows are paged in from the database as the scrollbar moves
+        app_instance.reservations_sort = (None, False)
+        app_instance.reservations_view = VirtualReservationList(
+            app_instance.reservations_tree, scrollbar, source, app_instance.db_worker, total=total)
+        app_instance.reservations_view.on_selection_change = lambda count: _show_selection_count(app_instance, count)
+        app_instance.reservations_tree.bind("<Control-a>", lambda e: select_all_reservations(app_instance))
+        # From now on the page survives navigation and is updated row by row
+        app_instance.pages["reservations"] = page
@@ -0,0 +1,236 @@
+import re
+
+# Cabins of the seat map as (name, first row, last row, seat letters), front to back.
+# Seat numbers outside this map (e.g. free text in old databases) are not tracked.
+CABINS = (
+    ("First", 1, 2, "ACDF"),
+    ("Business", 3, 8, "ACDF"),
+    ("Economy", 9, 60, "ABCDEF"),
+)
+WINDOW_LETTERS = "AF"
+AISLE_LETTERS = "CD"
+PREFERENCES = ("window", "aisle")
+DEFAULT_CABIN = "Economy"
+
+SEAT_MAPS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS seat_maps (
+        flight_number TEXT NOT NULL,
+        date TEXT NOT NULL,
+        cabin TEXT NOT NULL,
+        taken BLOB NOT NULL,
+        PRIMARY KEY (flight_number, date, cabin)
+    ) WITHOUT ROWID
+'''
+
+_SEAT_RE = re.compile(r"^\s*(\d{1,3})\s*([A-Za-z])\s*$")
+
+
+class SeatError(Exception):
+    """A seat that cannot be assigned: not on the seat map, or already taken."""
+
+    def __init__(self, message, suggestion=None):
+        super().__init__(message)
+        self.suggestion = suggestion # Next best free seat of the same cabin, if any
+
+
+class Cabin:
+    """Bit layout of one cabin: seat (row, letter) is bit (row - first_row) * len(letters) + letter index."""
+
+    def __init__(self, name, first_row, last_row, letters):
+        self.name = name
+        self.first_row = first_row
+        self.last_row = last_row
+        self.letters = letters
+        self.capacity = (last_row - first_row + 1) * len(letters)
+        self.size = (self.capacity + 7) // 8 # Bytes of the stored bitset
+        self.full_mask = (1 << self.capacity) - 1
+        # Masks of the window and aisle seats, for "next best seat" preferences
+        self.masks = {
+            "window": self._mask(WINDOW_LETTERS),
+            "aisle": self._mask(AISLE_LETTERS),
+        }
+
+    def _mask(self, letters):
+        mask = 0
+        for bit in range(self.capacity):
+            if self.letters[bit % len(self.letters)] in letters:
+                mask |= 1 << bit
+        return mask
+
+    def seat(self, bit):
+        return f"{self.first_row + bit // len(self.letters)}{self.letters[bit % len(self.letters)]}"
+
+    def decode(self, blob):
+        return int.from_bytes(blob, "little") if blob else 0
+
+    def encode(self, bits):
+        return bits.to_bytes(self.size, "little")
+
+    def first_free(self, taken, preference=None):
+        """Front-most free seat, among the preferred ones first; returns its bit or None if the cabin is full."""
+        free = self.full_mask & ~taken
+        if preference:
+            preferred = free & self.masks[preference]
+            if preferred:
+                free = preferred
+        if not free:
+            return None
+        return (free & -free).bit_length() - 1 # Lowest set bit
+
+
+_CABINS = {name: Cabin(name, first, last, letters) for name, first, last, letters in CABINS}
+_SEAT_INDEX = {} # "12A" -> (Cabin, bit), so every seat check is a dictionary lookup
+for _cabin in _CABINS.values():
+    for _bit in range(_cabin.capacity):
+        _SEAT_INDEX[_cabin.seat(_bit)] = (_cabin, _bit)
+
+
+def locate(seat_number):
+    """Returns (Cabin, bit) of a seat number such as '12A' or ' 12a', or None if it is not on the seat map."""
+    found = _SEAT_INDEX.get(seat_number)
+    if found is None:
+        match = _SEAT_RE.match(seat_number or "")
+        if match:
+            found = _SEAT_INDEX.get(f"{int(match.group(1))}{match.group(2).upper()}")
+    return found
+
+
+def cabin_names():
+    return tuple(_CABINS)
+
+
+def seat_numbers():
+    """Every seat on the seat map, front to back."""
+    return tuple(_SEAT_INDEX)
+
+
+def _load(conn, flight_number, date, cabin):
+    row = conn.execute("SELECT taken FROM seat_maps WHERE flight_number = ? AND date = ? AND cabin = ?",
+                       (flight_number, date, cabin.name)).fetchone()
+    return cabin.decode(row[0]) if row else 0
+
+
+def _store(conn, flight_number, date, cabin, taken):
+    if taken:
+        conn.execute("INSERT OR REPLACE INTO seat_maps (flight_number, date, cabin, taken) VALUES (?, ?, ?, ?)",
+                     (flight_number, date, cabin.name, cabin.encode(taken)))
+    else:
+        conn.execute("DELETE FROM seat_maps WHERE flight_number = ? AND date = ? AND cabin = ?",
+                     (flight_number, date, cabin.name))
+
+
+def assign(conn, flight_number, date, seat_number):
+    """
+    Marks a seat as taken. Must run inside the write transaction that stores the reservation,
+    so the seat and the booking are committed (or rolled back) together.
+    :raises SeatError: If the seat is not on the seat map or is already taken.
+    """
+    found = locate(seat_number)
+    if found is None:
+        raise SeatError(f"Seat '{seat_number}' is not on the seat map (rows 1-{CABINS[-1][2]}, e.g. 12A).")
+    cabin, bit = found
+    taken = _load(conn, flight_number, date, cabin)
+    if taken >> bit & 1:
+        free = cabin.first_free(taken)
+        suggestion = cabin.seat(free) if free is not None else None
+        raise SeatError(f"Seat {cabin.seat(bit)} on flight {flight_number} on {date} is already taken."
+                        + (f" The next free {cabin.name} seat is {suggestion}." if suggestion else
+                           f" {cabin.name} is full."), suggestion)
+    _store(conn, flight_number, date, cabin, taken | 1 << bit)
+
+
+def release(conn, flight_number, date, seat_number):
+    """Frees a seat again (seats that are not on the seat map are ignored)."""
+    found = locate(seat_number)
+    if found is None:
+        return
+    cabin, bit = found
+    taken = _load(conn, flight_number, date, cabin)
+    if taken >> bit & 1:
+        _store(conn, flight_number, date, cabin, taken & ~(1 << bit))
+
+
+def _apply_rows(conn, rows, take):
+    """
+    Takes or releases the seats of many (flight_number, ..., date, seat_number) rows with one read and
+    one write per affected seat map. Returns the indexes of the rows whose seat could not be taken.
+    """
+    maps = {} # (flight_number, date, cabin name) -> [cabin, taken bits, changed]
+    rejected = []
+    for index, row in enumerate(rows):
+        flight_number, date, seat_number = row[0], row[4], row[5]
+        found = locate(seat_number)
+        if found is None:
+            if take:
+                rejected.append(index)
+            continue
+        cabin, bit = found
+        key = (flight_number, date, cabin.name)
+        entry = maps.get(key)
+        if entry is None:
+            entry = maps[key] = [cabin, _load(conn, flight_number, date, cabin), False]
+        if take:
+            if entry[1] >> bit & 1:
+                rejected.append(index)
+                continue
+            entry[1] |= 1 << bit
+        else:
+            entry[1] &= ~(1 << bit)
+        entry[2] = True
+    stored, emptied = [], []
+    for (flight_number, date, name), (cabin, taken, changed) in maps.items():
+        if changed:
+            if taken:
+                stored.append((flight_number, date, name, cabin.encode(taken)))
+            else:
+                emptied.append((flight_number, date, name))
+    conn.executemany("INSERT OR REPLACE INTO seat_maps (flight_number, date, cabin, taken) VALUES (?, ?, ?, ?)", stored)
+    conn.executemany("DELETE FROM seat_maps WHERE flight_number = ? AND date = ? AND cabin = ?", emptied)
+    return rejected
+
+
+def take_rows(conn, rows):
+    """
+    Bulk version of assign() for reservation rows in column order, e.g. a batch of an import.
+    :return: Indexes of rows that were not given their seat (taken, or not on the seat map).
+    """
+    return _apply_rows(conn, rows, True)
+
+
+def release_rows(conn, rows):
+    """Bulk version of release() for reservation rows in column order."""
+    _apply_rows(conn, rows, False)
+
+
+def next_free_seat(conn, flight_number, date, cabin=DEFAULT_CABIN, preference=None):
+    """Front-most free seat of a cabin, preferring window or aisle seats if asked; None if the cabin is full."""
+    if cabin not in _CABINS:
+        raise ValueError(f"Unknown cabin '{cabin}'; expected one of {', '.join(_CABINS)}")
+    if preference is not None and preference not in PREFERENCES:
+        raise ValueError(f"Unknown seat preference '{preference}'; expected one of {', '.join(PREFERENCES)}")
+    cabin = _CABINS[cabin]
+    free = cabin.first_free(_load(conn, flight_number, date, cabin), preference)
+    return cabin.seat(free) if free is not None else None
+
+
+def availability(conn, flight_number, date):
+    """Free and total seats per cabin: {cabin: {"free": n, "capacity": n}}."""
+    taken = {}
+    for name, blob in conn.execute("SELECT cabin, taken FROM seat_maps WHERE flight_number = ? AND date = ?",
+                                   (flight_number, date)):
+        if name in _CABINS:
+            taken[name] = _CABINS[name].decode(blob)
+    return {name: {"free": cabin.capacity - taken.get(name, 0).bit_count(), "capacity": cabin.capacity}
+            for name, cabin in _CABINS.items()}
+
+
+def rebuild(conn, batch_size=10000):
+    """Recomputes every seat map from the reservations table (e.g. when the table is created over existing data)."""
+    conn.execute("DELETE FROM seat_maps")
+    cursor = conn.execute("SELECT flight_number, name, departure, destination, date, seat_number FROM reservations "
+                          "ORDER BY flight_number, date")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        take_rows(conn, rows) # Seats booked twice in old data simply stay taken
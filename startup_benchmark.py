@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import benchmark # Shared percentile summary and run metadata
+
+DEFAULT_RUNS = 10
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_app(command, timeout):
+    """Starts the app once in startup probe mode; returns its startup timings in ms plus the process wall time."""
+    env = dict(os.environ)
+    env["FLYSKY_STARTUP_PROBE"] = "1"
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=timeout)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else
+                           f"exit code {completed.returncode}")
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("{"):
+            timings = json.loads(line)
+            timings["process_wall"] = wall_ms
+            return timings
+    raise RuntimeError("the app did not report its startup timings")
+
+
+def time_imports(timeout):
+    """Wall time of a fresh interpreter importing main (no window is opened, so no display is needed)."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=APP_DIR, check=True, capture_output=True, timeout=timeout)
+    return (time.perf_counter() - started) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time-to-first-frame of the app over several cold starts.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="number of app starts (default: %(default)s)")
+    parser.add_argument("--command", help="command starting the app, e.g. the frozen build in dist/ "
+                                          "(default: this Python running main.py)")
+    parser.add_argument("--imports-only", action="store_true", help="only time 'import main' (works without a display)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per start")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    command = args.command.split() if args.command else [sys.executable, "main.py"]
+    samples = {"import_main": []}
+    for run in range(args.runs):
+        samples["import_main"].append(time_imports(args.timeout))
+        if args.imports_only:
+            continue
+        try:
+            timings = run_app(command, args.timeout)
+        except (RuntimeError, subprocess.SubprocessError) as e:
+            print(f"Startup run {run + 1} failed: {e}", file=sys.stderr)
+            return 1
+        for name, ms in timings.items():
+            samples.setdefault(name, []).append(ms)
+        print(f"  run {run + 1}: first frame {timings.get('first_frame', 0):.1f} ms, "
+              f"database ready {timings.get('db_ready', 0):.1f} ms", file=sys.stderr)
+
+    report = {"environment": benchmark.environment(), "command": " ".join(command), "results": [
+        # summarize() expects seconds
+        benchmark.summarize(name, None, [ms / 1000 for ms in values]) for name, values in samples.items()
+    ]}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import seat_inventory # Seat capacity of a flight, for load factors
+
+# Aggregates of the reservations table kept current by triggers, so the dashboard reads a handful
+# of small rows instead of grouping the whole table:
+#   stats_totals  - named counters ('reservations')
+#   stats_routes  - reservations per departure/destination pair
+#   stats_dates   - reservations per date
+#   stats_flights - reservations per flight and date, for load factors
+#   stats_load    - flights per load factor bucket (0 = under 10% full ... 9 = 90% or more)
+# Rows whose count drops to zero are kept (and skipped when read); it saves a statement per write.
+LOAD_BUCKETS = 10
+FLIGHT_CAPACITY = sum((last - first + 1) * len(letters) for _, first, last, letters in seat_inventory.CABINS)
+
+STATS_TABLES = (
+    'CREATE TABLE IF NOT EXISTS stats_totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID',
+    '''CREATE TABLE IF NOT EXISTS stats_routes (
+        departure TEXT NOT NULL, destination TEXT NOT NULL, reservations INTEGER NOT NULL,
+        PRIMARY KEY (departure, destination)
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS idx_stats_routes_reservations ON stats_routes (reservations)',
+    'CREATE TABLE IF NOT EXISTS stats_dates (date TEXT PRIMARY KEY, reservations INTEGER NOT NULL) WITHOUT ROWID',
+    '''CREATE TABLE IF NOT EXISTS stats_flights (
+        flight_number TEXT NOT NULL, date TEXT NOT NULL, reservations INTEGER NOT NULL,
+        PRIMARY KEY (flight_number, date)
+    ) WITHOUT ROWID''',
+    'CREATE TABLE IF NOT EXISTS stats_load (bucket INTEGER PRIMARY KEY, flights INTEGER NOT NULL)',
+)
+
+
+def _bucket(count_sql):
+    return f"min(({count_sql}) * {LOAD_BUCKETS} / {FLIGHT_CAPACITY}, {LOAD_BUCKETS - 1})"
+
+
+def _add_statements(row, step):
+    """SQL adding `step` (1 or -1) to every aggregate for the reservation `row` ('new' or 'old' in a trigger)."""
+    flight = f"flight_number = {row}.flight_number AND date = {row}.date"
+    current = f"SELECT reservations FROM stats_flights WHERE {flight}"
+    return f'''
+        INSERT INTO stats_totals (name, value) VALUES ('reservations', {step})
+            ON CONFLICT (name) DO UPDATE SET value = value + {step};
+        INSERT INTO stats_routes (departure, destination, reservations) VALUES ({row}.departure, {row}.destination, {step})
+            ON CONFLICT (departure, destination) DO UPDATE SET reservations = reservations + {step};
+        INSERT INTO stats_dates (date, reservations) VALUES ({row}.date, {step})
+            ON CONFLICT (date) DO UPDATE SET reservations = reservations + {step};
+        -- Move the flight out of its load factor bucket, change its count, and put it back in; a flight
+        -- whose count is zero (kept, see above) is in no bucket
+        UPDATE stats_load SET flights = flights - 1 WHERE bucket = ({_bucket(current)}) AND ({current}) > 0;
+        INSERT INTO stats_flights (flight_number, date, reservations) VALUES ({row}.flight_number, {row}.date, {step})
+            ON CONFLICT (flight_number, date) DO UPDATE SET reservations = reservations + {step};
+        INSERT INTO stats_load (bucket, flights) SELECT {_bucket(current)}, 1 WHERE ({current}) > 0
+            ON CONFLICT (bucket) DO UPDATE SET flights = flights + 1;
+    '''
+
+
+STATS_TRIGGERS = {
+    "stats_insert": f'''CREATE TRIGGER IF NOT EXISTS stats_insert AFTER INSERT ON reservations BEGIN
+        {_add_statements("new", 1)}
+    END''',
+    "stats_delete": f'''CREATE TRIGGER IF NOT EXISTS stats_delete AFTER DELETE ON reservations BEGIN
+        {_add_statements("old", -1)}
+    END''',
+    "stats_update": f'''CREATE TRIGGER IF NOT EXISTS stats_update AFTER UPDATE OF flight_number, departure, destination, date
+    ON reservations WHEN old.flight_number IS NOT new.flight_number OR old.departure IS NOT new.departure
+        OR old.destination IS NOT new.destination OR old.date IS NOT new.date BEGIN
+        {_add_statements("old", -1)}
+        {_add_statements("new", 1)}
+    END''',
+}
+
+
+def create(conn):
+    """
+    Creates the summary tables and triggers, filling them from existing rows the first time. Triggers
+    from an older version of this module are replaced, and the tables they kept are recomputed.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_totals'").fetchone()
+    # SQLite keeps each statement without its IF NOT EXISTS
+    wanted = {name: sql.replace(" IF NOT EXISTS", "", 1) for name, sql in STATS_TRIGGERS.items()}
+    stale = [name for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+             if name in wanted and sql != wanted[name]]
+    for name in stale:
+        conn.execute(f"DROP TRIGGER {name}")
+    for statement in STATS_TABLES + tuple(STATS_TRIGGERS.values()):
+        conn.execute(statement)
+    if not exists or stale:
+        rebuild(conn)
+
+
+def rebuild(conn):
+    """Recomputes every summary table from the reservations table with one pass of GROUP BY queries."""
+    for table in ("stats_totals", "stats_routes", "stats_dates", "stats_flights", "stats_load"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute("INSERT INTO stats_totals (name, value) SELECT 'reservations', COUNT(*) FROM reservations")
+    conn.execute('''INSERT INTO stats_routes (departure, destination, reservations)
+                    SELECT departure, destination, COUNT(*) FROM reservations GROUP BY departure, destination''')
+    conn.execute("INSERT INTO stats_dates (date, reservations) SELECT date, COUNT(*) FROM reservations GROUP BY date")
+    conn.execute('''INSERT INTO stats_flights (flight_number, date, reservations)
+                    SELECT flight_number, date, COUNT(*) FROM reservations GROUP BY flight_number, date''')
+    conn.execute(f'''INSERT INTO stats_load (bucket, flights)
+                     SELECT {_bucket("reservations")} AS b, COUNT(*) FROM stats_flights GROUP BY b''')
+
+
+def total(conn, name="reservations"):
+    row = conn.execute("SELECT value FROM stats_totals WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def daily_counts(conn, first_date, last_date):
+    return conn.execute("SELECT date, reservations FROM stats_dates WHERE date BETWEEN ? AND ? AND reservations > 0 "
+                        "ORDER BY date", (first_date, last_date)).fetchall()
+
+
+def dashboard(conn, today, top_routes=5, upcoming_days=7):
+    """
+    Everything the home screen dashboard shows, read from the summary tables only: each query touches
+    at most top_routes, upcoming_days or LOAD_BUCKETS rows, however many reservations there are.
+    """
+    loads = dict(conn.execute("SELECT bucket, flights FROM stats_load WHERE flights > 0"))
+    return {
+        "reservations": total(conn, "reservations"),
+        "flights": sum(loads.values()),
+        "top_routes": conn.execute('''SELECT departure, destination, reservations FROM stats_routes
+                                      WHERE reservations > 0
+                                      ORDER BY reservations DESC LIMIT ?''', (top_routes,)).fetchall(),
+        "upcoming_dates": conn.execute('''SELECT date, reservations FROM stats_dates
+                                          WHERE date >= ? AND reservations > 0
+                                          ORDER BY date LIMIT ?''', (today, upcoming_days)).fetchall(),
+        "load_factors": [(f"{bucket * 100 // LOAD_BUCKETS}%+", loads.get(bucket, 0)) for bucket in range(LOAD_BUCKETS)],
+    }
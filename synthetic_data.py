@@ -0,0 +1,163 @@
+import argparse
+import csv
+import datetime
+import json
+import random
+import sys
+import time
+
+import db_connection # Pooled, long-lived connections
+import seat_inventory # Seat maps kept in step with loaded rows
+from reservation_record import FIELDS, Reservation
+
+DEFAULT_SEED = 42
+DEFAULT_BATCH_SIZE = 10000
+
+FIRST_NAMES = (
+    "Ahmed", "Amira", "Anna", "Carlos", "Chen", "David", "Elena", "Émile", "Fatima", "Hana",
+    "Ivan", "James", "José", "Karim", "Laila", "Lucas", "Maria", "Mohamed", "Nadia", "Noah",
+    "Olivia", "Omar", "Priya", "Rahul", "Sara", "Sofia", "Tomás", "Yara", "Yusuf", "Zoë",
+)
+LAST_NAMES = (
+    "Abdullah", "Ali", "Brown", "Chen", "Dubois", "Fischer", "García", "Haddad", "Hassan", "Ibrahim",
+    "Ivanova", "Khan", "Kim", "Kowalski", "López", "Mahmoud", "Martin", "Müller", "Nakamura", "Nguyen",
+    "Novak", "Okafor", "Patel", "Rossi", "Said", "Santos", "Silva", "Smith", "Tanaka", "Yilmaz",
+)
+CITIES = (
+    "Amsterdam", "Athens", "Bangkok", "Berlin", "Cairo", "Casablanca", "Doha", "Dubai", "Frankfurt",
+    "Istanbul", "Jeddah", "Lisbon", "London", "Madrid", "Mumbai", "New York", "Paris", "Riyadh",
+    "Rome", "São Paulo", "Singapore", "Sydney", "Tokyo", "Toronto", "Vienna",
+)
+AIRLINE_CODES = ("FS", "EK", "QR", "MS", "LH", "AF", "BA", "TK")
+SEATS = seat_inventory.seat_numbers()
+FIRST_DATE = datetime.date(2025, 1, 1)
+DATE_RANGE_DAYS = 730
+FLIGHT_COUNT = 500 # Distinct flight numbers, each flying once a day at most
+FLIGHTS_PER_BLOCK = 64 # Consecutive records are spread over this many departures
+
+
+def departure(index):
+    """
+    Returns (flight id, day, seat) of record `index`. Every index below
+    FLIGHT_COUNT * DATE_RANGE_DAYS * len(SEATS) gets its own seat on its own departure.
+    """
+    block, offset = divmod(index, FLIGHTS_PER_BLOCK * len(SEATS))
+    number = block * FLIGHTS_PER_BLOCK + offset % FLIGHTS_PER_BLOCK
+    flight_id, trip = number % FLIGHT_COUNT, number // FLIGHT_COUNT
+    day = (trip * 389 + flight_id) % DATE_RANGE_DAYS # 389 is coprime to 730, so a flight never repeats a day
+    return flight_id, day, SEATS[(offset // FLIGHTS_PER_BLOCK) * 7 % len(SEATS)]
+
+
+def flight_number(index):
+    """Returns the flight number of record `index`; many records share one flight."""
+    flight_id = departure(index)[0]
+    return f"{AIRLINE_CODES[flight_id % len(AIRLINE_CODES)]}{100 + flight_id // len(AIRLINE_CODES)}"
+
+
+def route(flight_id):
+    """Returns the fixed (departure, destination) of a flight."""
+    origin = flight_id % len(CITIES)
+    return CITIES[origin], CITIES[(origin + 1 + flight_id // len(CITIES) % (len(CITIES) - 1)) % len(CITIES)]
+
+
+def generate_reservations(count, seed=DEFAULT_SEED, start=0):
+    """
+    Lazily yields `count` deterministic Reservation records numbered from `start`.
+    The same (count, seed, start) always produces the same records, so runs are comparable.
+    Flights, dates and seats follow from the record number alone, so no two records share a seat;
+    the seed only varies the passenger names.
+    """
+    rng = random.Random(f"{seed}:{start}")
+    for index in range(start, start + count):
+        flight_id, day, seat = departure(index)
+        yield Reservation(
+            flight_number(index),
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            *route(flight_id),
+            (FIRST_DATE + datetime.timedelta(days=day)).isoformat(),
+            seat,
+        )
+
+
+def load_reservations(count, seed=DEFAULT_SEED, start=0, batch_size=DEFAULT_BATCH_SIZE, conn=None, progress=None):
+    """
+    Inserts generated reservations in batched transactions (the database must already be initialized).
+    :param progress: Optional callable receiving the number of rows inserted so far after every batch.
+    :return: Elapsed seconds.
+    """
+    import bulk_import
+    conn = conn or db_connection.get_connection()
+    started = time.perf_counter()
+    inserted = 0
+    batch = []
+    for reservation in generate_reservations(count, seed, start):
+        batch.append(reservation)
+        if len(batch) >= batch_size:
+            with conn:
+                conn.executemany(bulk_import.INSERT_SQL, batch)
+                seat_inventory.take_rows(conn, batch) # Records never share a seat, so none is refused here
+            inserted += len(batch)
+            batch = []
+            if progress:
+                progress(inserted)
+    if batch:
+        with conn:
+            conn.executemany(bulk_import.INSERT_SQL, batch)
+            seat_inventory.take_rows(conn, batch)
+        inserted += len(batch)
+        if progress:
+            progress(inserted)
+    return time.perf_counter() - started
+
+
+def write_reservations(path, count, seed=DEFAULT_SEED, start=0):
+    """Writes generated reservations to a CSV or JSONL file that bulk_import can read."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            for reservation in generate_reservations(count, seed, start):
+                f.write(json.dumps(dict(zip(FIELDS, reservation)), ensure_ascii=False) + "\n")
+        else:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(generate_reservations(count, seed, start))
+
+
+def parse_count(text):
+    """Parses a row count such as '10000', '10k' or '1m'."""
+    text = text.strip().lower().replace("_", "")
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1000000, text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid row count: {text!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic reservations.")
+    parser.add_argument("count", type=parse_count, help="number of reservations, e.g. 10000, 10k or 1m")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="random seed (default: %(default)s)")
+    parser.add_argument("--start", type=int, default=0, help="index of the first record (keeps seats unique across runs)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--db", help="insert into this database file")
+    target.add_argument("--out", help="write a CSV or JSONL file instead")
+    args = parser.parse_args(argv)
+
+    if args.out:
+        write_reservations(args.out, args.count, args.seed, args.start)
+        print(f"Wrote {args.count} reservation(s) to {args.out}")
+        return 0
+
+    db_connection.configure(db_path=args.db)
+    import database_operations
+    database_operations.init_db()
+    elapsed = load_reservations(args.count, args.seed, args.start)
+    print(f"Inserted {args.count} reservation(s) in {elapsed:.2f}s ({args.count / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
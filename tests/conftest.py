@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# The application modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database_operations # noqa: E402
+import db_connection # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh, initialized database file; database errors fail the test instead of being reported."""
+    def fail(title, message):
+        raise AssertionError(f"{title}: {message}")
+
+    db_connection.configure(db_path=str(tmp_path / "flights.db"))
+    database_operations.set_error_handler(fail)
+    database_operations.init_db()
+    yield db_connection.get_connection()
+    database_operations.set_error_handler(None)
+    db_connection.close_all()
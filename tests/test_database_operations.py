@@ -0,0 +1,26 @@
+import database_operations
+from reservation_record import Reservation
+
+BOOKING = Reservation("FS100", "Anna Silva", "Paris", "Rome", "2026-05-01", "12A")
+
+
+def collect_errors():
+    errors = []
+    database_operations.set_error_handler(lambda title, message: errors.append(title))
+    return errors
+
+
+def test_delete_of_a_missing_reservation_fails(db):
+    reservation_id = database_operations.insert_reservation_db(BOOKING)
+    assert database_operations.delete_reservation_db(reservation_id)
+
+    errors = collect_errors()
+    assert database_operations.delete_reservation_db(reservation_id) is False
+    assert errors == ["Not Found"]
+
+
+def test_update_of_a_missing_reservation_fails(db):
+    errors = collect_errors()
+    assert database_operations.update_reservation_db(12345, BOOKING) is False
+    assert errors == ["Not Found"]
+    assert len(database_operations.get_all_reservations_db()) == 0
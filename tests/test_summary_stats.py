@@ -0,0 +1,48 @@
+import database_operations
+import summary_stats
+from reservation_record import Reservation
+
+BOOKING = Reservation("FS100", "Anna Silva", "Paris", "Rome", "2026-05-01", "12A")
+
+
+def stats_after_rebuild(conn):
+    with conn:
+        summary_stats.rebuild(conn)
+    return summary_stats.dashboard(conn, "2026-01-01")
+
+
+def test_book_cancel_rebook_counts_the_flight_once(db):
+    reservation_id = database_operations.insert_reservation_db(BOOKING)
+    database_operations.delete_reservation_db(reservation_id)
+    database_operations.insert_reservation_db(BOOKING)
+
+    stats = database_operations.dashboard_stats_db("2026-01-01")
+    assert stats["reservations"] == 1
+    assert stats["flights"] == 1
+    assert dict(stats["load_factors"])["0%+"] == 1
+    assert all(flights >= 0 for _, flights in stats["load_factors"])
+    assert stats == stats_after_rebuild(db)
+
+
+def test_moving_the_last_booking_off_a_flight_and_back(db):
+    reservation_id = database_operations.insert_reservation_db(BOOKING)
+    database_operations.update_reservation_db(reservation_id, BOOKING._replace(date="2026-05-02"))
+    database_operations.update_reservation_db(reservation_id, BOOKING)
+
+    stats = database_operations.dashboard_stats_db("2026-01-01")
+    assert (stats["reservations"], stats["flights"]) == (1, 1)
+    assert stats == stats_after_rebuild(db)
+
+
+def test_create_replaces_outdated_triggers_and_recomputes(db):
+    with db:
+        db.execute("DROP TRIGGER stats_insert")
+        db.execute("CREATE TRIGGER stats_insert AFTER INSERT ON reservations BEGIN SELECT 1; END")
+    database_operations.insert_reservation_db(BOOKING) # Missed by the outdated trigger
+
+    with db:
+        summary_stats.create(db)
+    assert summary_stats.dashboard(db, "2026-01-01")["reservations"] == 1
+    database_operations.insert_reservation_db(BOOKING._replace(seat_number="12B"))
+    assert summary_stats.dashboard(db, "2026-01-01")["flights"] == 1
+    assert summary_stats.dashboard(db, "2026-01-01") == stats_after_rebuild(db)